@@ -0,0 +1,35 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .models import MODERATORS_GROUP
+
+
+# Access token claims carrying the user's role (see RoleTokenObtainPairSerializer)
+MODERATOR_CLAIM = 'is_moderator'
+ROLE_VERSION_CLAIM = 'role_version'
+
+
+def add_role_claims(token, user):
+    """Record moderators group membership and the role version in a token."""
+    token[MODERATOR_CLAIM] = user.groups.filter(name=MODERATORS_GROUP).exists()
+    token[ROLE_VERSION_CLAIM] = user.role_version
+    return token
+
+
+class RoleClaimJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves moderator status from the access token.
+    
+    The claim is trusted only while its role_version matches the user row that
+    authentication loads anyway, so requests with a fresh token learn their
+    role without touching the groups tables. Group changes bump role_version
+    (see signals.py), after which the role is resolved from the database.
+    """
+    
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if (
+            MODERATOR_CLAIM in validated_token and
+            validated_token.get(ROLE_VERSION_CLAIM) == user.role_version
+        ):
+            user._in_moderators_group = bool(validated_token[MODERATOR_CLAIM])
+        return user
@@ -2,6 +2,9 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 
 
+MODERATORS_GROUP = 'moderators'
+
+
 class User(AbstractUser):
     """
     Custom User model extending Django's AbstractUser.
@@ -20,6 +23,11 @@ class User(AbstractUser):
         blank=True,
         help_text='Date and time when user was banned.'
     )
+    role_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text='Bumped when group membership changes, invalidating role claims in tokens.'
+    )
     
     class Meta:
         db_table = 'users'
@@ -31,5 +39,18 @@ class User(AbstractUser):
     
     @property
     def is_moderator(self):
-        """Check if user is a moderator (staff or in moderators group)."""
-        return self.is_staff or self.groups.filter(name='moderators').exists()
+        """
+        Check if user is a moderator (staff or in moderators group).
+        
+        Group membership is resolved at most once per instance (and so once
+        per request), or not at all when the access token carries it.
+        """
+        if self.is_staff:
+            return True
+        if getattr(self, '_in_moderators_group', None) is None:
+            self._in_moderators_group = self.groups.filter(name=MODERATORS_GROUP).exists()
+        return self._in_moderators_group
+    
+    def clear_role_cache(self):
+        """Forget the resolved group membership."""
+        self._in_moderators_group = None
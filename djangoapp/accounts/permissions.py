@@ -1,17 +1,18 @@
 from rest_framework import permissions
 
 
+def is_moderator(user):
+    """Return True for authenticated moderators, resolving the role once per user instance."""
+    return bool(user and user.is_authenticated and user.is_moderator)
+
+
 class IsModerator(permissions.BasePermission):
     """
     Custom permission to only allow moderators (staff or in moderators group).
     """
     
     def has_permission(self, request, view):
-        return (
-            request.user and 
-            request.user.is_authenticated and 
-            (request.user.is_staff or request.user.groups.filter(name='moderators').exists())
-        )
+        return is_moderator(request.user)
 
 
 class IsOwnerOrModerator(permissions.BasePermission):
@@ -25,9 +26,4 @@ class IsOwnerOrModerator(permissions.BasePermission):
             return True
         
         # Write permissions are only allowed to the owner or moderators
-        is_moderator = (
-            request.user.is_staff or 
-            request.user.groups.filter(name='moderators').exists()
-        )
-        
-        return obj.user == request.user or is_moderator
+        return is_moderator(request.user) or obj.uploaded_by == request.user
@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from .authentication import add_role_claims
 
 User = get_user_model()
 
@@ -60,3 +63,11 @@ class RegisterSerializer(serializers.ModelSerializer):
 class BanUserSerializer(serializers.Serializer):
     """Serializer for banning a user."""
     reason = serializers.CharField(required=True, max_length=500)
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Token pair serializer that adds role claims to issued tokens."""
+    
+    @classmethod
+    def get_token(cls, user):
+        return add_role_claims(super().get_token(user), user)
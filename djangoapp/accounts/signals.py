@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+User = get_user_model()
+
+
+def bump_role_version(user_ids):
+    """Invalidate role claims issued to these users."""
+    User.objects.filter(pk__in=user_ids).update(role_version=F('role_version') + 1)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def group_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Bump role_version for users whose groups changed."""
+    if action == 'pre_clear' and reverse:
+        # pk_set is empty on clear; remember who is about to be removed.
+        instance._cleared_user_ids = list(instance.user_set.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    
+    if not reverse:
+        instance.clear_role_cache()
+        bump_role_version([instance.pk])
+    elif action == 'post_clear':
+        bump_role_version(getattr(instance, '_cleared_user_ids', []))
+    else:
+        bump_role_version(pk_set)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    """A renamed or deleted group can change its members' roles."""
+    if instance.pk:
+        bump_role_version(instance.user_set.values('pk'))
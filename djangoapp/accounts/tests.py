@@ -1,5 +1,8 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
@@ -119,3 +122,70 @@ class AuthAPITest(APITestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class RoleClaimTest(APITestCase):
+    """Test moderator role resolution from JWT claims."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.moderators = Group.objects.create(name='moderators')
+        self.user = get_user_model().objects.create_user(
+            username='moderator',
+            password='modpass123'
+        )
+        self.user.groups.add(self.moderators)
+    
+    def login(self):
+        response = self.client.post(
+            reverse('login'),
+            {'username': 'moderator', 'password': 'modpass123'},
+            format='json'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + response.data['access'])
+    
+    def group_queries(self, queries):
+        return [q for q in queries if 'auth_group' in q['sql']]
+    
+    def test_login_token_carries_role(self):
+        """Test the access token includes the moderator claim."""
+        from rest_framework_simplejwt.tokens import AccessToken
+        
+        response = self.client.post(
+            reverse('login'),
+            {'username': 'moderator', 'password': 'modpass123'},
+            format='json'
+        )
+        token = AccessToken(response.data['access'])
+        
+        self.assertTrue(token['is_moderator'])
+        self.assertEqual(token['role_version'], get_user_model().objects.get(pk=self.user.pk).role_version)
+    
+    def test_valid_claim_skips_group_queries(self):
+        """Test a current role claim resolves moderator status without group queries."""
+        self.login()
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('document-pending-documents'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.group_queries(queries.captured_queries), [])
+    
+    def test_membership_change_invalidates_claim(self):
+        """Test a stale role claim is ignored after group membership changes."""
+        self.login()
+        self.user.groups.remove(self.moderators)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('document-pending-documents'))
+        
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(len(self.group_queries(queries.captured_queries)), 1)
+    
+    def test_group_clear_bumps_role_version(self):
+        """Test clearing a group's members bumps their role version."""
+        version = get_user_model().objects.get(pk=self.user.pk).role_version
+        
+        self.moderators.user_set.clear()
+        
+        self.assertEqual(get_user_model().objects.get(pk=self.user.pk).role_version, version + 1)
@@ -8,7 +8,12 @@ from django.utils import timezone
 from django_ratelimit.decorators import ratelimit
 from django.utils.decorators import method_decorator
 
-from .serializers import RegisterSerializer, UserSerializer, BanUserSerializer
+from .serializers import (
+    RegisterSerializer,
+    UserSerializer,
+    BanUserSerializer,
+    RoleTokenObtainPairSerializer
+)
 from .permissions import IsModerator
 
 User = get_user_model()
@@ -31,7 +36,9 @@ class LoginView(TokenObtainPairView):
     """
     API endpoint for user login (JWT token generation).
     Rate limited to prevent brute force attacks.
+    Access tokens carry the user's moderator role (see authentication.py).
     """
+    serializer_class = RoleTokenObtainPairSerializer
     
     @method_decorator(ratelimit(key='ip', rate='5/m', method='POST'))
     def post(self, request, *args, **kwargs):
@@ -6,8 +6,9 @@ from .models import Category
 class CategoryAdmin(admin.ModelAdmin):
     """Admin interface for Category model."""
     
-    list_display = ['name', 'slug', 'icon', 'order', 'created_at']
+    list_display = ['name', 'slug', 'icon', 'order', 'approved_count', 'created_at']
     list_editable = ['order']
     search_fields = ['name', 'description']
     prepopulated_fields = {'slug': ('name',)}
+    readonly_fields = ['approved_count']
     ordering = ['order', 'name']
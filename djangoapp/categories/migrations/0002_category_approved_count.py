@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:57
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_approved_documents(apps, schema_editor):
+    Category = apps.get_model('categories', 'Category')
+    Document = apps.get_model('documents', 'Document')
+    db_alias = schema_editor.connection.alias
+    counts = Document.objects.using(db_alias).filter(
+        category=OuterRef('pk'), status='approved'
+    ).order_by().values('category').annotate(count=Count('pk')).values('count')
+    Category.objects.using(db_alias).update(approved_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0001_initial'),
+        ('documents', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='approved_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of approved documents (maintained by Document.save)'),
+        ),
+        migrations.RunPython(count_approved_documents, migrations.RunPython.noop),
+    ]
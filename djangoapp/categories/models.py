@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from slugify import slugify
 
 
@@ -18,6 +20,11 @@ class Category(models.Model):
         default=0,
         help_text='Display order (lower numbers appear first)'
     )
+    approved_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text='Number of approved documents (maintained by Document.save)'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -38,4 +45,21 @@ class Category(models.Model):
     @property
     def document_count(self):
         """Return count of approved documents in this category."""
-        return self.documents.filter(status='approved').count()
+        return self.approved_count
+    
+    @classmethod
+    def adjust_approved_count(cls, category_id, delta):
+        """Atomically add delta to a category's approved document count."""
+        categories = cls.objects.filter(pk=category_id)
+        if delta < 0:
+            categories = categories.filter(approved_count__gte=-delta)
+        categories.update(approved_count=F('approved_count') + delta)
+    
+    @classmethod
+    def recount_approved(cls):
+        """Recompute every category's approved document count in one query."""
+        from djangoapp.documents.models import Document
+        counts = Document.objects.filter(
+            category=OuterRef('pk'), status='approved'
+        ).order_by().values('category').annotate(count=Count('pk')).values('count')
+        return cls.objects.update(approved_count=Coalesce(Subquery(counts), 0))
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from djangoapp.core.cache import bump_version
+
+from .models import Category
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_categories_version(sender, **kwargs):
+    """Invalidate ETags and cached responses built from categories."""
+    bump_version('categories')
@@ -4,15 +4,20 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from .models import Category
 from .serializers import CategorySerializer, CategoryListSerializer
 from djangoapp.accounts.permissions import IsModerator
+from djangoapp.core.mixins import AnonymousCacheMixin, ConditionalGetMixin
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(AnonymousCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     API endpoint for viewing and managing categories.
     List and retrieve are public, create/update/delete require moderator permissions.
+    Both send ETags and answer matching revalidations with 304 Not Modified,
+    and are cached for anonymous users.
     """
     queryset = Category.objects.all()
     lookup_field = 'slug'
+    # Document counts change with documents
+    conditional_versions = cached_versions = ('categories', 'documents')
     
     def get_serializer_class(self):
         if self.action == 'list':
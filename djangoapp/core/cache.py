@@ -0,0 +1,100 @@
+"""
+Version stamps for validating and caching API responses.
+
+Each data set ('documents', 'categories') has a version stamp in the cache
+that is bumped whenever a change to its rows commits (see the signals of
+each app).
+ETags and cache keys built from the stamps change with the data without
+querying it.
+"""
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+VERSION_KEY = 'api:version:%s'
+
+
+def api_caching_enabled():
+    """
+    Return True if version stamps may validate and cache API responses.
+
+    A process-local cache gives every process its own stamps, which changes
+    made in other processes never bump, so it is only trusted with
+    ``API_CACHE_ALLOW_LOCAL`` (development and tests).
+    """
+    return settings.API_CACHE_ALLOW_LOCAL or not isinstance(
+        caches['default'], (LocMemCache, DummyCache)
+    )
+
+
+def initial_version():
+    # Start from the clock so an evicted stamp never repeats an earlier value.
+    return time.time_ns()
+
+
+def get_versions(*names):
+    """Return the current version stamps of the given data sets."""
+    keys = [VERSION_KEY % name for name in names]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, initial_version(), timeout=None)
+            versions[key] = cache.get(key, initial_version())
+    return [versions[key] for key in keys]
+
+
+def bump_version(*names, using=None):
+    """
+    Mark the given data sets as changed once the current transaction commits.
+
+    Bumping earlier would let a request read the new stamp with the old rows
+    and cache them under it.
+    """
+    transaction.on_commit(partial(incr_versions, names), using=using)
+
+
+def incr_versions(names):
+    for name in names:
+        try:
+            cache.incr(VERSION_KEY % name)
+        except ValueError:
+            cache.add(VERSION_KEY % name, initial_version(), timeout=None)
+
+
+def make_etag(*parts):
+    """Return a quoted ETag for the given parts."""
+    return '"%s"' % hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def get_or_compute(key, compute, timeout, lock_timeout=10, wait_interval=0.05):
+    """
+    Return the cached value for ``key``, computing and caching it on a miss.
+
+    Only one caller computes a missing key at a time; the others wait for its
+    result instead of all hitting the database. ``compute`` may return None
+    for results that must not be cached.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = '%s:lock' % key
+    while not cache.add(lock_key, 1, timeout=lock_timeout):
+        time.sleep(wait_interval)
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+    try:
+        value = compute()
+        if value is not None:
+            cache.set(key, value, timeout)
+    finally:
+        cache.delete(lock_key)
+    return value
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from djangoapp.documents.models import Document
+from djangoapp.documents.uploads import inspect_chunks
+
+
+class Command(BaseCommand):
+    help = 'Record size, content hash and page count of documents uploaded before they were captured'
+
+    def handle(self, *args, **options):
+        """Read each file once and store its metadata without calling save()."""
+        documents = Document.objects.filter(content_hash='').exclude(file='').only('pk', 'file')
+        updated = 0
+        for document in documents.iterator():
+            try:
+                with document.file.open('rb') as file:
+                    info = inspect_chunks(file.chunks())
+            except OSError as error:
+                self.stderr.write(f'Skipping {document.pk}: {error}')
+                continue
+            Document.objects.filter(pk=document.pk).update(
+                file_size=info.size, content_hash=info.content_hash, page_count=info.page_count
+            )
+            updated += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Recorded file metadata for {updated} documents.')
+        )
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from djangoapp.documents.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = 'Delete resumable upload sessions that have been inactive for too long'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age',
+            type=int,
+            default=settings.UPLOAD_SESSION_MAX_AGE,
+            help='Seconds without a received chunk after which a session is stale '
+                 '(default: UPLOAD_SESSION_MAX_AGE)'
+        )
+
+    def handle(self, *args, **options):
+        """Remove stale sessions and their part files."""
+        cutoff = timezone.now() - timedelta(seconds=options['max_age'])
+        stale = UploadSession.objects.filter(updated_at__lt=cutoff)
+        deleted = 0
+        for session in stale.iterator():
+            session.discard()
+            deleted += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Deleted {deleted} stale upload sessions.')
+        )
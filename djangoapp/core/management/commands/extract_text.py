@@ -0,0 +1,90 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import F, Min, Q
+
+from djangoapp.documents.extraction import store_document_text
+from djangoapp.documents.models import Document, DocumentText
+from djangoapp.documents.ocr import ocr_document_text
+
+logger = logging.getLogger(__name__)
+
+
+def extract(document_id):
+    """Extract one document, counting storage errors as failures."""
+    try:
+        return store_document_text(document_id)
+    except OSError:
+        logger.exception('Could not read the file of document %s', document_id)
+        return False
+
+
+def ocr(document_id):
+    """OCR one document, counting storage errors as no pages read."""
+    try:
+        return ocr_document_text(document_id)
+    except OSError:
+        logger.exception('Could not read the file of document %s', document_id)
+        return 0
+
+
+def run(func, document_ids, workers):
+    if workers > 0:
+        # Forked workers must not share this process's database connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            return list(pool.map(func, document_ids, chunksize=16))
+    return [func(document_id) for document_id in document_ids]
+
+
+class Command(BaseCommand):
+    help = 'Extract the searchable text of documents without text for their current file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Extraction processes (default: one per CPU; 0 extracts in this process)'
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Also retry files whose text could not be extracted before'
+        )
+        parser.add_argument(
+            '--ocr',
+            action='store_true',
+            help='Also OCR the scanned pages of documents extracted without OCR'
+        )
+
+    def handle(self, *args, **options):
+        """Each pdftotext run is bounded by DOCUMENT_TEXT_TIMEOUT and DOCUMENT_TEXT_MEMORY_LIMIT."""
+        missing = Q(text__isnull=True) | ~Q(text__content_hash=F('content_hash'))
+        if options['retry_failed']:
+            missing |= ~Q(text__error='')
+        document_ids = list(
+            Document.objects.exclude(content_hash='').filter(missing)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        results = run(extract, document_ids, options['workers'])
+        extracted = sum(results)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Extracted the text of {extracted} documents ({len(results) - extracted} failed).'
+            )
+        )
+
+        if options['ocr']:
+            # One document per file; OCR results are shared by content hash.
+            document_ids = list(
+                DocumentText.objects.filter(error='', ocr_pages=0)
+                .order_by().values('content_hash').annotate(first_id=Min('document_id'))
+                .values_list('first_id', flat=True)
+            )
+            pages = sum(run(ocr, document_ids, options['workers']))
+            self.stdout.write(self.style.SUCCESS(f'Read {pages} scanned pages by OCR.'))
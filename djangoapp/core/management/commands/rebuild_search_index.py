@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from djangoapp.documents.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the document full-text search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database alias to rebuild the index for (default: default)'
+        )
+
+    def handle(self, *args, **options):
+        """Rebuild the index with the configured search backend."""
+        backend = get_search_backend(options['database'])
+        backend.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Search index rebuilt ({backend.__class__.__name__}).')
+        )
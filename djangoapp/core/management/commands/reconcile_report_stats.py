@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from djangoapp.reports.models import DocumentReportStats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the pending report counters of every document from the reports table'
+
+    def handle(self, *args, **options):
+        """Counters drift only when reports are changed with queryset updates or raw SQL."""
+        documents = DocumentReportStats.reconcile()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt the report counters of {documents} documents.')
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from djangoapp.categories.models import Category
+
+
+class Command(BaseCommand):
+    help = 'Recompute the approved document count of every category'
+
+    def handle(self, *args, **options):
+        """Recount all categories with a single UPDATE."""
+        updated = Category.recount_approved()
+        self.stdout.write(
+            self.style.SUCCESS(f'Recounted approved documents for {updated} categories.')
+        )
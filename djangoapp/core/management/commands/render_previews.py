@@ -0,0 +1,56 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Min
+
+from djangoapp.documents.models import Document
+from djangoapp.documents.previews import generate_previews
+
+logger = logging.getLogger(__name__)
+
+
+def render(document_id):
+    """Render one document, counting storage errors as failures."""
+    try:
+        return generate_previews(document_id)
+    except OSError:
+        logger.exception('Could not read the file of document %s', document_id)
+        return 0
+
+
+class Command(BaseCommand):
+    help = 'Render thumbnails and preview pages of documents that have none (run backfill_file_metadata first)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Rendering processes (default: one per CPU; 0 renders in this process)'
+        )
+
+    def handle(self, *args, **options):
+        """Render each distinct file once; its previews are shared by all its documents."""
+        document_ids = list(
+            Document.objects.filter(preview_pages=0).exclude(content_hash='')
+            .order_by().values('content_hash').annotate(first_id=Min('pk'))
+            .values_list('first_id', flat=True)
+        )
+        if options['workers'] > 0:
+            # Forked workers must not share this process's database connections.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+                results = list(pool.map(render, document_ids))
+        else:
+            results = [render(document_id) for document_id in document_ids]
+
+        rendered = sum(1 for pages in results if pages)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rendered previews of {rendered} files ({len(results) - rendered} failed).'
+            )
+        )
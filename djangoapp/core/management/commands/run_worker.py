@@ -0,0 +1,67 @@
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from djangoapp.jobs.queue import claim_job, requeue_stale_jobs, run_job
+
+# Seconds between looks for jobs left running by workers that died
+STALE_CHECK_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = 'Process queued background jobs (run several workers for parallelism)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when no job can be claimed instead of polling for more'
+        )
+        parser.add_argument(
+            '--worker-id',
+            default=f'{socket.gethostname()}:{os.getpid()}',
+            help='Name recorded on claimed jobs (default: host:pid)'
+        )
+
+    def handle(self, *args, **options):
+        """Claim and run jobs one at a time until stopped; SIGTERM finishes the current job first."""
+        self.stopping = False
+        previous_handlers = {
+            signum: signal.signal(signum, self.stop) for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        processed = failed = 0
+        last_requeue = None
+        try:
+            while not self.stopping:
+                if not connection.in_atomic_block:
+                    # Replace connections the database dropped while idle.
+                    close_old_connections()
+                if last_requeue is None or time.monotonic() - last_requeue >= STALE_CHECK_INTERVAL:
+                    requeue_stale_jobs()
+                    last_requeue = time.monotonic()
+
+                job = claim_job(options['worker_id'])
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(settings.JOB_POLL_INTERVAL)
+                    continue
+
+                processed += 1
+                if not run_job(job):
+                    failed += 1
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Processed {processed} jobs ({failed} failed).')
+        )
+
+    def stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,157 @@
+"""
+View mixins shared by the API viewsets.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, urlencode
+from rest_framework.response import Response
+
+from djangoapp.accounts.permissions import is_moderator
+
+from .cache import api_caching_enabled, get_or_compute, get_versions, make_etag
+
+
+class ConditionalGetMixin:
+    """
+    Answer list and retrieve with 304 Not Modified while the client's
+    validators still match.
+
+    ETags combine the version stamps named in ``conditional_versions`` with
+    the audience (moderators see more documents), the response format and the
+    full request path, so checking them runs no queries and no serializer.
+    Without a shared cache (see ``api_caching_enabled``) no ETag is sent.
+    """
+    conditional_versions = ()
+
+    def get_audience(self):
+        return 'moderator' if is_moderator(self.request.user) else 'public'
+
+    def get_etag(self, *parts, versions=None):
+        if not api_caching_enabled():
+            return None
+        versions = self.conditional_versions if versions is None else versions
+        return make_etag(
+            *get_versions(*versions),
+            self.get_audience(),
+            self.request.accepted_renderer.format,
+            *(parts or [self.request.get_full_path()])
+        )
+
+    def get_not_modified_response(self, etag, last_modified=None):
+        """Return a 304 (or 412) response if the request's validators match, else None."""
+        last_modified = last_modified and int(last_modified.timestamp())
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def set_validators(self, response, etag, last_modified=None):
+        if response.status_code == 200:
+            if etag:
+                response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified.timestamp())
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_etag()
+        return (
+            self.get_not_modified_response(etag) or
+            self.set_validators(super().list(request, *args, **kwargs), etag)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        etag = self.get_etag()
+        return (
+            self.get_not_modified_response(etag) or
+            self.set_validators(super().retrieve(request, *args, **kwargs), etag)
+        )
+
+
+class AnonymousCacheMixin:
+    """
+    Cache list and retrieve responses for anonymous users.
+
+    Anonymous users all get the same public data, so response data is cached
+    per normalized query string under a key built from the version stamps in
+    ``cached_versions``: bumping a stamp drops every response built from it.
+    Only one request recomputes a missing response (see ``get_or_compute``).
+    Validators are cached with the data, so conditional GETs are answered
+    from the cache too.
+    """
+    cached_versions = ()
+    cached_headers = ('ETag', 'Last-Modified')
+
+    def response_cache_applies(self):
+        return (
+            settings.API_RESPONSE_CACHE_TIMEOUT > 0 and
+            api_caching_enabled() and
+            self.request.method == 'GET' and
+            not self.request.user.is_authenticated
+        )
+
+    def get_response_cache_parts(self):
+        """Return extra parts of the cache key, for responses that change without the data."""
+        return ()
+    
+    def get_response_cache_key(self):
+        params = sorted(self.request.query_params.lists())
+        return 'api:response:%s:%s' % (self.basename, make_etag(
+            *get_versions(*self.cached_versions),
+            *self.get_response_cache_parts(),
+            self.request.accepted_renderer.format,
+            self.request.path,
+            urlencode(params, doseq=True)
+        ).strip('"'))
+
+    def get_cached_response(self, build, on_hit=None):
+        """
+        Return the cached response, or the one returned by ``build``.
+
+        ``on_hit`` is called with the cached data when it is served.
+        """
+        if not self.response_cache_applies():
+            return build()
+
+        built = []
+
+        def compute():
+            response = build()
+            built.append(response)
+            if response.status_code != 200:
+                return None
+            return {
+                'data': response.data,
+                'headers': {
+                    header: response[header] for header in self.cached_headers
+                    if response.has_header(header)
+                },
+            }
+
+        entry = get_or_compute(
+            self.get_response_cache_key(), compute, settings.API_RESPONSE_CACHE_TIMEOUT
+        )
+        if built:
+            return built[0]
+
+        headers = entry['headers']
+        response = get_conditional_response(
+            self.request,
+            etag=headers.get('ETag'),
+            last_modified=parse_http_date_safe(headers.get('Last-Modified'))
+        )
+        if response is None:
+            if on_hit:
+                on_hit(entry['data'])
+            response = Response(entry['data'], headers=headers)
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(partial(super().list, request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(partial(super().retrieve, request, *args, **kwargs))
@@ -0,0 +1,109 @@
+"""
+Keyset (cursor) pagination shared by the API viewsets.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset pagination.
+
+    Rows are ordered by ``ordering``, whose last field must be unique, and the
+    ``cursor`` query parameter carries the ordering values of the last row of
+    the previous page. Each page is a single range scan on the ordering index:
+    there is no COUNT(*) and no OFFSET, and rows inserted while a client walks
+    the list never shift the pages that follow.
+
+    Rows may be model instances or ``values()`` dicts.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.position_filter(position))
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = [self.get_value(self.page[-1], field) for field in self.ordering]
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(position))
+
+    def get_value(self, row, field):
+        name = field.lstrip('-')
+        value = row[name] if isinstance(row, dict) else getattr(row, name)
+        return value.isoformat() if hasattr(value, 'isoformat') else value
+
+    def position_filter(self, position):
+        """
+        Match rows strictly after ``position``, e.g. for ('-created_at', '-id'):
+        created_at <= c AND (created_at < c OR (created_at = c AND id < i)).
+        """
+        after = Q()
+        for index, field in enumerate(self.ordering):
+            clause = Q(**{self.lookup(field, 'lt', 'gt'): position[index]})
+            for previous, value in zip(self.ordering[:index], position):
+                clause &= Q(**{previous.lstrip('-'): value})
+            after |= clause
+        # Bound the leading field so the database can use a plain index range.
+        return Q(**{self.lookup(self.ordering[0], 'lte', 'gte'): position[0]}) & after
+
+    def lookup(self, field, descending, ascending):
+        if field.startswith('-'):
+            return f'{field[1:]}__{descending}'
+        return f'{field}__{ascending}'
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
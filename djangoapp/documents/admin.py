@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import Document
+from .models import Document, Tag
+
+
+# Admin rejections carry no reason of their own; it can be edited per document.
+ADMIN_REJECTION_REASON = 'Rejected by a moderator.'
 
 
 @admin.register(Document)
@@ -11,7 +15,8 @@ class DocumentAdmin(admin.ModelAdmin):
     list_filter = ['status', 'language', 'category', 'license', 'created_at']
     search_fields = ['title', 'description', 'tags', 'uploaded_by__username']
     prepopulated_fields = {'slug': ('title',)}
-    readonly_fields = ['view_count', 'download_count', 'file_size', 'created_at', 'updated_at']
+    readonly_fields = ['view_count', 'download_count', 'file_size', 'page_count', 'preview_pages', 'content_hash',
+                       'claimed_by', 'claim_expires_at', 'version', 'created_at', 'updated_at']
     
     fieldsets = (
         ('Basic Information', {
@@ -21,13 +26,14 @@ class DocumentAdmin(admin.ModelAdmin):
             'fields': ('category', 'language', 'tags')
         }),
         ('File', {
-            'fields': ('file', 'file_size')
+            'fields': ('file', 'file_size', 'page_count', 'preview_pages', 'content_hash')
         }),
         ('License', {
             'fields': ('license', 'license_details')
         }),
         ('Moderation', {
-            'fields': ('status', 'uploaded_by', 'reviewed_by', 'reviewed_at', 'rejection_reason')
+            'fields': ('status', 'uploaded_by', 'reviewed_by', 'reviewed_at', 'rejection_reason',
+                       'claimed_by', 'claim_expires_at', 'version')
         }),
         ('Statistics', {
             'fields': ('view_count', 'download_count')
@@ -37,5 +43,28 @@ class DocumentAdmin(admin.ModelAdmin):
         }),
     )
     
+    actions = ['approve_documents', 'reject_documents']
+    
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('category', 'uploaded_by', 'reviewed_by')
+    
+    @admin.action(description='Approve selected documents')
+    def approve_documents(self, request, queryset):
+        """Approve documents in bulk with set-based updates (see Document.moderate)."""
+        updated = Document.moderate(queryset, 'approve', request.user)
+        self.message_user(request, f'{len(updated)} documents approved.')
+    
+    @admin.action(description='Reject selected documents')
+    def reject_documents(self, request, queryset):
+        """Reject documents in bulk with set-based updates (see Document.moderate)."""
+        updated = Document.moderate(queryset, 'reject', request.user, ADMIN_REJECTION_REASON)
+        self.message_user(request, f'{len(updated)} documents rejected.')
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    """Admin interface for Tag model."""
+    
+    list_display = ['name', 'slug', 'created_at']
+    search_fields = ['name', 'slug']
+    prepopulated_fields = {'slug': ('name',)}
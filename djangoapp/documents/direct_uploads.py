@@ -0,0 +1,121 @@
+"""
+Direct-to-S3 uploads.
+
+Browsers upload files straight to the bucket with a presigned POST whose
+policy pins the object key, the PDF content type and the size limit. The API
+only signs the policy, then verifies the uploaded object and turns it into a
+pending Document, so no uploaded byte passes through the workers on its way
+in (S3 computes the content hash, see ``inspect_staged_upload``). Staged
+objects live under ``uploads/<user id>/``; a bucket lifecycle rule should
+expire that prefix to drop uploads that are never finalized.
+"""
+import base64
+import re
+import uuid
+from contextlib import closing
+
+from django.conf import settings
+from rest_framework import serializers
+from storages.utils import clean_name
+
+from .uploads import FileInfo
+
+STAGING_PREFIX = 'uploads'
+
+# Bytes read from a staged object to check its signature
+SIGNATURE_BYTES = 1024
+
+
+def get_s3_storage(document_model):
+    """Return the S3 storage of the document file field, or None on other storages."""
+    storage = document_model._meta.get_field('file').storage
+    if getattr(storage, 'bucket', None) is None:
+        return None
+    return storage
+
+
+def s3_key(storage, name):
+    return storage._normalize_name(clean_name(name))
+
+
+def staging_prefix(user):
+    return f'{STAGING_PREFIX}/{user.pk}/'
+
+
+def is_staged_name(user, name):
+    """Tell whether ``name`` is a staged upload name signed for ``user``."""
+    return re.fullmatch(re.escape(staging_prefix(user)) + r'[0-9a-f]{32}\.pdf', name) is not None
+
+
+def create_presigned_post(storage, user):
+    """Return the URL, form fields and staged name for one PDF upload."""
+    name = f'{staging_prefix(user)}{uuid.uuid4().hex}.pdf'
+    post = storage.bucket.meta.client.generate_presigned_post(
+        Bucket=storage.bucket.name,
+        Key=s3_key(storage, name),
+        Fields={'Content-Type': 'application/pdf'},
+        Conditions=[
+            {'Content-Type': 'application/pdf'},
+            ['content-length-range', 1, settings.MAX_UPLOAD_SIZE],
+        ],
+        ExpiresIn=settings.DIRECT_UPLOAD_EXPIRE
+    )
+    return {'url': post['url'], 'fields': post['fields'], 'key': name}
+
+
+def inspect_staged_upload(storage, name):
+    """
+    Check a staged object's size and PDF signature and return its FileInfo.
+
+    Only the first bytes are downloaded: the SHA-256 is computed by S3, which
+    checksums the object while copying it onto itself. The page count is
+    left to text extraction. Raises ValidationError when the object is
+    missing, too large or not a PDF.
+    """
+    client = storage.bucket.meta.client
+    bucket = storage.bucket.name
+    key = s3_key(storage, name)
+    try:
+        head = client.head_object(Bucket=bucket, Key=key)
+    except client.exceptions.ClientError:
+        raise serializers.ValidationError('Uploaded file not found.')
+    if head['ContentLength'] > settings.MAX_UPLOAD_SIZE:
+        max_size_mb = settings.MAX_UPLOAD_SIZE / (1024 * 1024)
+        raise serializers.ValidationError(f'File size cannot exceed {max_size_mb}MB.')
+
+    body = client.get_object(Bucket=bucket, Key=key, Range=f'bytes=0-{SIGNATURE_BYTES - 1}')['Body']
+    with closing(body):
+        if not body.read().startswith(b'%PDF-'):
+            raise serializers.ValidationError('Only PDF files are allowed.')
+
+    copied = client.copy_object(
+        Bucket=bucket,
+        Key=key,
+        CopySource={'Bucket': bucket, 'Key': key},
+        ChecksumAlgorithm='SHA256',
+        ContentType='application/pdf',
+        MetadataDirective='REPLACE'
+    )
+    checksum = base64.b64decode(copied['CopyObjectResult']['ChecksumSHA256'])
+    return FileInfo(head['ContentLength'], checksum.hex(), None)
+
+
+def copy_staged_upload(storage, name, target):
+    """
+    Copy a staged object to its final name inside the bucket and return that name.
+    
+    Names are content-addressed, so an existing object already holds the same
+    bytes and is not copied again.
+    """
+    if storage.exists(target):
+        return target
+    client = storage.bucket.meta.client
+    bucket = storage.bucket.name
+    client.copy_object(
+        Bucket=bucket,
+        Key=s3_key(storage, target),
+        CopySource={'Bucket': bucket, 'Key': s3_key(storage, name)},
+        ContentType='application/pdf',
+        MetadataDirective='REPLACE'
+    )
+    return target
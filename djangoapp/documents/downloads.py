@@ -0,0 +1,123 @@
+"""
+Serving document files.
+
+The API authorizes and counts downloads; how the bytes are sent depends on
+the ``DOCUMENT_DOWNLOAD_BACKEND`` setting:
+
+- ``django``: stream the file from the worker (development default).
+- ``nginx``: return an empty response with ``X-Accel-Redirect`` pointing at
+  the internal ``DOCUMENT_DOWNLOAD_ACCEL_LOCATION``, so nginx sends the file
+  with sendfile and HTTP Range support (see docker/nginx.conf).
+- ``s3``: redirect to a short-lived presigned S3 URL (default when
+  ``USE_S3`` is on), so the object never passes through the worker.
+
+Files are reached through expiring signed links to the download endpoint,
+which work without an Authorization header (iframes, download managers).
+A link carries the user it was issued to, and only reaches documents that
+user may see.
+"""
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect
+from django.urls import reverse
+from django.utils.http import content_disposition_header, urlencode
+from storages.utils import clean_name
+
+DOWNLOAD_SALT = 'documents.download'
+
+
+def sign_download(document, user=None):
+    """Return a signed token granting ``user`` (or anyone, if None) access to the document's file."""
+    user_id = user.pk if user is not None and user.is_authenticated else ''
+    return signing.TimestampSigner(salt=DOWNLOAD_SALT).sign(f'{document.slug}:{user_id}')
+
+
+def verify_download(token, slug):
+    """
+    Return the id of the user a token for this slug was issued to ('' for
+    anyone), or None if the token is invalid or expired.
+    """
+    try:
+        value = signing.TimestampSigner(salt=DOWNLOAD_SALT).unsign(
+            token, max_age=settings.DOCUMENT_DOWNLOAD_LINK_MAX_AGE
+        )
+    except signing.BadSignature:
+        return None
+    signed_slug, separator, user_id = value.rpartition(':')
+    return user_id if separator and signed_slug == slug else None
+
+
+def signed_download_url(document, request=None, inline=False):
+    """Return an expiring download link for the document, issued to the request's user."""
+    params = {'token': sign_download(document, getattr(request, 'user', None))}
+    if inline:
+        params['inline'] = 1
+    url = '%s?%s' % (reverse('document-download', kwargs={'slug': document.slug}), urlencode(params))
+    return request.build_absolute_uri(url) if request else url
+
+
+def link_period():
+    """
+    Return the number of the current signing period, half a link's lifetime.
+
+    Responses embedding signed links are validated and cached per period, so
+    a link served from a cache or kept after a 304 has at least half of its
+    lifetime left.
+    """
+    return int(time.time()) // max(settings.DOCUMENT_DOWNLOAD_LINK_MAX_AGE // 2, 1)
+
+
+def is_initial_request(request):
+    """Return False for Range requests resuming a transfer past the first byte."""
+    range_header = request.headers.get('Range', '')
+    return not range_header or range_header.replace(' ', '').startswith('bytes=0-')
+
+
+def presigned_url(document, inline=False):
+    """Return a presigned S3 GET URL for the document's file."""
+    storage = document.file.storage
+    # Sign with the client rather than storage.url(), which returns unsigned
+    # URLs when AWS_S3_CUSTOM_DOMAIN is set.
+    return storage.bucket.meta.client.generate_presigned_url(
+        'get_object',
+        Params={
+            'Bucket': storage.bucket.name,
+            'Key': storage._normalize_name(clean_name(document.file.name)),
+            'ResponseContentType': 'application/pdf',
+            'ResponseContentDisposition': content_disposition_header(
+                not inline, f'{document.title}.pdf'
+            ),
+        },
+        ExpiresIn=settings.DOCUMENT_DOWNLOAD_PRESIGNED_EXPIRE
+    )
+
+
+def serve_document(document, inline=False):
+    """Return the response sending the document's file."""
+    filename = f'{document.title}.pdf'
+    backend = settings.DOCUMENT_DOWNLOAD_BACKEND
+
+    if backend == 's3':
+        response = HttpResponseRedirect(presigned_url(document, inline=inline))
+        response['Cache-Control'] = 'private, no-store'
+        return response
+
+    if backend == 'nginx':
+        response = HttpResponse(content_type='application/pdf')
+        response['X-Accel-Redirect'] = '%s/%s' % (
+            settings.DOCUMENT_DOWNLOAD_ACCEL_LOCATION.rstrip('/'), quote(document.file.name)
+        )
+        response['Content-Disposition'] = content_disposition_header(not inline, filename)
+        return response
+
+    if backend != 'django':
+        raise ValueError(f'Unknown DOCUMENT_DOWNLOAD_BACKEND: {backend}')
+    return FileResponse(
+        document.file.open('rb'),
+        as_attachment=not inline,
+        filename=filename,
+        content_type='application/pdf'
+    )
@@ -0,0 +1,157 @@
+"""
+Plain-text extraction from document files, for full-text search.
+
+Text is extracted with ``pdftotext`` (poppler-utils) by a background job
+after an upload, or in bulk by the ``extract_text`` command, and stored in
+the ``DocumentText`` side table so document lists never load it. Each run
+is a separate process with a timeout and an address-space limit, so a
+malformed PDF fails its own extraction instead of stalling or exhausting
+the worker. Pages without a text layer are read by OCR afterwards (see
+``ocr.py``). Search backends index the text as the lowest-weighted field.
+"""
+import logging
+import os
+import subprocess
+
+from django.conf import settings
+from django.utils import timezone
+
+from djangoapp.core.cache import bump_version
+from djangoapp.jobs.queue import enqueue
+
+from .uploads import local_copy
+
+logger = logging.getLogger(__name__)
+
+EXTRACT_TEXT_JOB = 'documents.extract_text'
+
+
+class ExtractionError(Exception):
+    """Raised when the text of a PDF cannot be extracted."""
+
+
+def limited(args):
+    """
+    Return the command running ``args`` under the memory limit.
+
+    The limit is set by ``prlimit`` rather than in a ``preexec_fn``, which is
+    not safe to run in a process with threads (OCR reads pages in a pool).
+    """
+    if not settings.DOCUMENT_TEXT_MEMORY_LIMIT:
+        return list(args)
+    limit = settings.DOCUMENT_TEXT_MEMORY_LIMIT * 1024 * 1024
+    return [settings.DOCUMENT_TEXT_PRLIMIT, f'--as={limit}', '--', *args]
+
+
+def run_tool(args, timeout, **kwargs):
+    """Run an extraction tool under the memory limit and return its output."""
+    try:
+        result = subprocess.run(
+            limited(args),
+            check=True,
+            capture_output=True,
+            timeout=timeout,
+            **kwargs
+        )
+    except (OSError, subprocess.SubprocessError) as error:
+        raise ExtractionError(f'{os.path.basename(args[0])} failed: {error}') from error
+    return result.stdout
+
+
+def run_pdftotext(source):
+    """Return the text of a PDF, one form feed after each page."""
+    output = run_tool(
+        [settings.DOCUMENT_TEXT_PDFTOTEXT, '-enc', 'UTF-8', '-eol', 'unix', source, '-'],
+        settings.DOCUMENT_TEXT_TIMEOUT
+    )
+    return output.decode('utf-8', errors='replace')
+
+
+def split_pages(output):
+    """Return the page texts of pdftotext output."""
+    pages = output.split('\f')
+    if pages[-1] == '':
+        pages.pop()
+    return pages
+
+
+def join_pages(pages):
+    """Return the searchable text of a document's pages."""
+    # Layout whitespace is not searchable, and PostgreSQL text cannot hold NUL.
+    text = ' '.join(' '.join(pages).replace('\x00', ' ').split())
+    return text[:settings.DOCUMENT_TEXT_MAX_LENGTH]
+
+
+def extract_pages(file):
+    """Return the text of each page of a stored PDF."""
+    with local_copy(file) as source:
+        return split_pages(run_pdftotext(source))
+
+
+def blank_pages(pages):
+    """Return the numbers of pages with (almost) no text layer, like scans."""
+    return [
+        number for number, page in enumerate(pages, start=1)
+        if len(''.join(page.split())) < settings.DOCUMENT_OCR_MIN_CHARACTERS
+    ]
+
+
+def store_document_text(document_id):
+    """
+    Extract and store the text of a document. Returns True if text was stored.
+
+    PDFs that cannot be read get an empty text with the error recorded;
+    storage errors are raised so the job is retried. Pages without a text
+    layer are left to the OCR job.
+    """
+    from .models import Document, DocumentText
+    from .ocr import ocr_enabled, schedule_ocr
+
+    document = Document.objects.filter(pk=document_id).exclude(content_hash='').only(
+        'pk', 'file', 'content_hash', 'page_count'
+    ).first()
+    if document is None:
+        return False
+
+    # Identical files have identical text.
+    known = DocumentText.objects.filter(
+        content_hash=document.content_hash, error=''
+    ).values('text', 'page_count', 'ocr_pages').first()
+    pages = []
+    if known:
+        text, page_count, ocr_pages, error = (
+            known['text'], known['page_count'], known['ocr_pages'], ''
+        )
+    else:
+        try:
+            pages = extract_pages(document.file)
+            error = ''
+        except ExtractionError as extraction_error:
+            logger.warning('Could not extract the text of document %s: %s', document_id, extraction_error)
+            error = str(extraction_error)
+        text, page_count, ocr_pages = join_pages(pages), len(pages) or None, 0
+
+    DocumentText.objects.update_or_create(document_id=document.pk, defaults={
+        'content_hash': document.content_hash,
+        'text': text,
+        'page_count': page_count,
+        'ocr_pages': ocr_pages,
+        'error': error,
+        'extracted_at': timezone.now(),
+    })
+    # pdftotext reads the page tree; the count taken at upload is an estimate.
+    if page_count and document.page_count != page_count:
+        # updated_at too, so the detail ETag changes with the count.
+        Document.objects.filter(pk=document.pk).update(
+            page_count=page_count, updated_at=timezone.now()
+        )
+    if ocr_enabled() and blank_pages(pages):
+        schedule_ocr(document.pk)
+    # Search results are cached with the documents version.
+    bump_version('documents')
+    return not error
+
+
+def schedule_text_extraction(document_id):
+    """Queue extraction; the job becomes visible to workers when the transaction commits."""
+    enqueue(EXTRACT_TEXT_JOB, document_id=document_id)
@@ -0,0 +1,11 @@
+from django.conf import settings
+
+from djangoapp.jobs.queue import register
+
+from .extraction import EXTRACT_TEXT_JOB, store_document_text
+from .ocr import OCR_TEXT_JOB, ocr_document_text
+from .previews import RENDER_PREVIEWS_JOB, generate_previews
+
+register(RENDER_PREVIEWS_JOB, concurrency=settings.DOCUMENT_PREVIEW_CONCURRENCY)(generate_previews)
+register(EXTRACT_TEXT_JOB, concurrency=settings.DOCUMENT_TEXT_CONCURRENCY)(store_document_text)
+register(OCR_TEXT_JOB, concurrency=settings.DOCUMENT_OCR_CONCURRENCY)(ocr_document_text)
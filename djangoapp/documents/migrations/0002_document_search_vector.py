@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:48
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+CREATE_SEARCH_TRIGGER = """
+CREATE OR REPLACE FUNCTION documents_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.tags, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER documents_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, tags, description, search_vector ON documents
+    FOR EACH ROW EXECUTE FUNCTION documents_search_vector_update();
+
+CREATE INDEX documents_search_vector_gin ON documents USING gin (search_vector);
+
+UPDATE documents SET search_vector = NULL;
+"""
+
+DROP_SEARCH_TRIGGER = """
+DROP INDEX IF EXISTS documents_search_vector_gin;
+DROP TRIGGER IF EXISTS documents_search_vector_trigger ON documents;
+DROP FUNCTION IF EXISTS documents_search_vector_update();
+"""
+
+
+def create_search_trigger(apps, schema_editor):
+    """Install the search vector trigger and GIN index (PostgreSQL only)."""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_SEARCH_TRIGGER, params=None)
+
+
+def drop_search_trigger(apps, schema_editor):
+    """Remove the search vector trigger and GIN index (PostgreSQL only)."""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEARCH_TRIGGER, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
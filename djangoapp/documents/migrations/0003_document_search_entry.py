@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_fts_table(apps, schema_editor):
+    """Create and populate the FTS5 search index (SQLite only)."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pragma_compile_options WHERE compile_options = 'ENABLE_FTS5'")
+        if cursor.fetchone() is None:
+            return  # SQLite built without FTS5: search falls back to icontains
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE documents_fts USING fts5("
+        "title, tags, description, tokenize='unicode61 remove_diacritics 2')",
+        params=None,
+    )
+    # Weight title > tags > description in the default ``rank`` column.
+    schema_editor.execute(
+        "INSERT INTO documents_fts(documents_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)')",
+        params=None,
+    )
+    schema_editor.execute(
+        "INSERT INTO documents_fts(rowid, title, tags, description) "
+        "SELECT id, title, tags, description FROM documents",
+        params=None,
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS documents_fts', params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0002_document_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSearchEntry',
+            fields=[
+                ('document', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='documents.document')),
+                ('title', models.TextField()),
+                ('tags', models.TextField()),
+                ('description', models.TextField()),
+                ('fts', models.TextField(db_column='documents_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'documents_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0003_document_search_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Tag',
+                'verbose_name_plural': 'Tags',
+                'db_table': 'tags',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DocumentTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='document_tags', to='documents.document')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='document_tags', to='documents.tag')),
+            ],
+            options={
+                'db_table': 'document_tags',
+            },
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='tag_set',
+            field=models.ManyToManyField(blank=True, help_text='Normalized tags, kept in sync with the tags field', related_name='documents', through='documents.DocumentTag', to='documents.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='documenttag',
+            index=models.Index(fields=['tag', 'document'], name='document_ta_tag_id_58ab8d_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='documenttag',
+            unique_together={('document', 'tag')},
+        ),
+    ]
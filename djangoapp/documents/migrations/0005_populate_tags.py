@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:53
+
+from django.db import migrations
+from slugify import slugify
+
+
+def populate_tags(apps, schema_editor):
+    """Create Tag rows and links from the comma-separated tags strings."""
+    Document = apps.get_model('documents', 'Document')
+    Tag = apps.get_model('documents', 'Tag')
+    DocumentTag = apps.get_model('documents', 'DocumentTag')
+    db_alias = schema_editor.connection.alias
+
+    document_slugs = {}
+    tag_names = {}
+    documents = Document.objects.using(db_alias).exclude(tags='').values_list('id', 'tags')
+    for document_id, tags in documents.iterator():
+        slugs = set()
+        for name in tags.split(','):
+            name = name.strip()
+            slug = slugify(name)[:100]
+            if slug:
+                tag_names.setdefault(slug, name[:100])
+                slugs.add(slug)
+        document_slugs[document_id] = slugs
+
+    Tag.objects.using(db_alias).bulk_create(
+        [Tag(name=name, slug=slug) for slug, name in tag_names.items()],
+        ignore_conflicts=True
+    )
+    tag_ids = dict(Tag.objects.using(db_alias).values_list('slug', 'id'))
+    DocumentTag.objects.using(db_alias).bulk_create(
+        [
+            DocumentTag(document_id=document_id, tag_id=tag_ids[slug])
+            for document_id, slugs in document_slugs.items()
+            for slug in slugs
+        ],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0004_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_tags, migrations.RunPython.noop),
+    ]
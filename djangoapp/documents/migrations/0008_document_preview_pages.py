@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0007_upload_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='preview_pages',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Number of rendered preview pages; 0 until previews exist'),
+        ),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Extracted text joins the search vector with the lowest weight. Only its
+# first 200k characters are indexed, which keeps the vector under the 1MB
+# tsvector limit.
+INDEX_TEXT_PG = """
+CREATE OR REPLACE FUNCTION documents_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.tags, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'C') ||
+        setweight(to_tsvector('simple', coalesce(
+            (SELECT left(text, 200000) FROM document_texts WHERE document_id = NEW.id), ''
+        )), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION document_texts_reindex_document() RETURNS trigger AS $$
+BEGIN
+    -- Writing the column fires the documents trigger, which recomputes it.
+    UPDATE documents SET search_vector = NULL
+        WHERE id = CASE WHEN TG_OP = 'DELETE' THEN OLD.document_id ELSE NEW.document_id END;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER document_texts_reindex_trigger
+    AFTER INSERT OR UPDATE OF text OR DELETE ON document_texts
+    FOR EACH ROW EXECUTE FUNCTION document_texts_reindex_document();
+"""
+
+UNINDEX_TEXT_PG = """
+DROP TRIGGER IF EXISTS document_texts_reindex_trigger ON document_texts;
+DROP FUNCTION IF EXISTS document_texts_reindex_document();
+
+CREATE OR REPLACE FUNCTION documents_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.tags, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+
+def create_fts_table(schema_editor, columns, weights, select):
+    schema_editor.execute('DROP TABLE documents_fts', params=None)
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE documents_fts USING fts5("
+        f"{columns}, tokenize='unicode61 remove_diacritics 2')",
+        params=None,
+    )
+    schema_editor.execute(
+        f"INSERT INTO documents_fts(documents_fts, rank) VALUES ('rank', 'bm25({weights})')",
+        params=None,
+    )
+    schema_editor.execute(f"INSERT INTO documents_fts(rowid, {columns}) {select}", params=None)
+
+
+def has_fts_table(schema_editor):
+    return 'documents_fts' in schema_editor.connection.introspection.table_names()
+
+
+def index_text(apps, schema_editor):
+    """Add extracted text to the search index of the database in use."""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(INDEX_TEXT_PG, params=None)
+    elif schema_editor.connection.vendor == 'sqlite' and has_fts_table(schema_editor):
+        create_fts_table(
+            schema_editor,
+            'title, tags, description, content',
+            '10.0, 5.0, 1.0, 0.5',
+            "SELECT d.id, d.title, d.tags, d.description, coalesce(t.text, '') "
+            "FROM documents d LEFT JOIN document_texts t ON t.document_id = d.id"
+        )
+
+
+def unindex_text(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(UNINDEX_TEXT_PG, params=None)
+    elif schema_editor.connection.vendor == 'sqlite' and has_fts_table(schema_editor):
+        create_fts_table(
+            schema_editor,
+            'title, tags, description',
+            '10.0, 5.0, 1.0',
+            'SELECT id, title, tags, description FROM documents'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0008_document_preview_pages'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentText',
+            fields=[
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='text', serialize=False, to='documents.document')),
+                ('content_hash', models.CharField(help_text='SHA-256 of the file the text comes from', max_length=64)),
+                ('text', models.TextField(blank=True)),
+                ('page_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, help_text='Why the text could not be extracted')),
+                ('extracted_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Document Text',
+                'verbose_name_plural': 'Document Texts',
+                'db_table': 'document_texts',
+            },
+        ),
+        migrations.RunPython(index_text, unindex_text),
+    ]
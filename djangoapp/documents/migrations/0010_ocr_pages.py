@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0009_document_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documenttext',
+            name='ocr_pages',
+            field=models.PositiveIntegerField(default=0, help_text='Pages without a text layer read by OCR'),
+        ),
+        migrations.CreateModel(
+            name='OcrPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('page', models.PositiveIntegerField()),
+                ('languages', models.CharField(max_length=100)),
+                ('text', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'OCR Page',
+                'verbose_name_plural': 'OCR Pages',
+                'db_table': 'ocr_pages',
+                'unique_together': {('content_hash', 'languages', 'page')},
+            },
+        ),
+    ]
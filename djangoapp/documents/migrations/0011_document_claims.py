@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('documents', '0010_ocr_pages'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='claim_expires_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Moderator reviewing the document, until claim_expires_at', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_documents', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Incremented on every change, for optimistic concurrency checks'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0012_alter_document_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='document',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Number of pages: estimated at upload, then read by text extraction', null=True),
+        ),
+    ]
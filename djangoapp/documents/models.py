@@ -1,13 +1,39 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import (
+    Case, CharField, Count, Exists, IntegerField, Min, OuterRef, Q, Value, When
+)
+from django.db.models.functions import Cast, Concat, Substr
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import FileExtensionValidator
+from django.utils import timezone
 from slugify import slugify
+from collections import Counter
+from datetime import timedelta
+import fcntl
 import os
+import re
+import uuid
+
+from .extraction import schedule_text_extraction
+from .previews import schedule_previews
+from .uploads import inspect_upload
+
+
+# Saves attempted with freshly allocated slugs before giving up
+SLUG_ATTEMPTS = 5
 
 
 def document_upload_path(instance, filename):
-    """Generate upload path for documents."""
+    """
+    Generate upload path for documents.
+    
+    Files are content-addressed by their SHA-256 so identical uploads share
+    one stored object; files without a known hash keep the slug name.
+    """
     ext = filename.split('.')[-1]
+    if instance.content_hash:
+        return os.path.join('documents', instance.content_hash[:2], f"{instance.content_hash}.{ext}")
     filename = f"{instance.slug}.{ext}"
     return os.path.join('documents', filename)
 
@@ -20,6 +46,7 @@ class Document(models.Model):
         ('pending', 'Pending Review'),
         ('approved', 'Approved'),
         ('rejected', 'Rejected'),
+        ('hidden', 'Hidden After Reports'),
     ]
     
     LANGUAGE_CHOICES = [
@@ -55,6 +82,13 @@ class Document(models.Model):
         blank=True,
         help_text='Comma-separated tags'
     )
+    tag_set = models.ManyToManyField(
+        'Tag',
+        through='DocumentTag',
+        related_name='documents',
+        blank=True,
+        help_text='Normalized tags, kept in sync with the tags field'
+    )
     
     # File
     file = models.FileField(
@@ -62,6 +96,24 @@ class Document(models.Model):
         validators=[FileExtensionValidator(allowed_extensions=['pdf'])]
     )
     file_size = models.BigIntegerField(default=0, help_text='File size in bytes')
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text='SHA-256 of the file, computed at upload'
+    )
+    page_count = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='Number of pages: estimated at upload, then read by text extraction'
+    )
+    preview_pages = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        help_text='Number of rendered preview pages; 0 until previews exist'
+    )
     
     # License
     license = models.CharField(max_length=20, choices=LICENSE_CHOICES, default='cc-by')
@@ -86,6 +138,21 @@ class Document(models.Model):
     )
     reviewed_at = models.DateTimeField(null=True, blank=True)
     rejection_reason = models.TextField(blank=True)
+    claimed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='claimed_documents',
+        help_text='Moderator reviewing the document, until claim_expires_at'
+    )
+    claim_expires_at = models.DateTimeField(null=True, blank=True, editable=False)
+    version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text='Incremented on every change, for optimistic concurrency checks'
+    )
     
     # Counters
     view_count = models.IntegerField(default=0)
@@ -95,6 +162,9 @@ class Document(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Search (PostgreSQL only, maintained by a database trigger)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         db_table = 'documents'
         verbose_name = 'Document'
@@ -109,31 +179,348 @@ class Document(models.Model):
     def __str__(self):
         return self.title
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember loaded values so save() can tell which fields changed.
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values)
+            if value is not models.DEFERRED
+        }
+        return instance
+    
+    def field_changed(self, attname):
+        """Return True if the field differs from the value loaded from the database."""
+        loaded_values = getattr(self, '_loaded_values', {})
+        if self._state.adding or attname not in loaded_values:
+            return True
+        return loaded_values[attname] != getattr(self, attname)
+    
+    def lock_stored_values(self, *attnames):
+        """
+        Lock this document's row and return the stored values of fields, or
+        None if it is not stored. Must run inside a transaction: the values
+        cannot change until it ends.
+        """
+        return Document.objects.select_for_update().filter(pk=self.pk).values(*attnames).first()
+    
+    @classmethod
+    def find_duplicate(cls, content_hash):
+        """Return the earliest pending or approved document with the same file, if any."""
+        return cls.objects.filter(content_hash=content_hash).exclude(
+            status='rejected'
+        ).order_by('created_at').only('slug').first()
+    
+    @classmethod
+    def allocate_slug(cls, title):
+        """
+        Return a free slug for the title: its slugified form, or that form
+        suffixed with the lowest free "-<n>".
+        
+        Runs one query over the slug index, however many duplicates exist.
+        Numbers that belong to other titles ("Rapport 2024") are only
+        skipped, never continued from.
+        """
+        max_length = cls._meta.get_field('slug').max_length
+        base_slug = slugify(title)[:max_length - 10].strip('-') or 'document'
+        prefix = f'{base_slug}-'
+        # Each taken slug proposes the next number; the lowest one not taken wins.
+        taken = cls.objects.filter(
+            Q(slug=base_slug) |
+            Q(slug__startswith=prefix, slug__regex=r'^%s[1-9][0-9]{0,8}$' % re.escape(prefix))
+        ).annotate(
+            next_number=Case(
+                When(slug=base_slug, then=Value(1)),
+                default=Cast(Substr('slug', len(prefix) + 1), IntegerField()) + 1
+            )
+        ).annotate(
+            next_free=~Exists(cls.objects.filter(
+                slug=Concat(Value(prefix), Cast(OuterRef('next_number'), CharField()))
+            ))
+        ).aggregate(
+            base=Count('pk', filter=Q(slug=base_slug)),
+            lowest=Min('next_number', filter=Q(next_free=True))
+        )
+        if not taken['base']:
+            return base_slug
+        return f'{prefix}{taken["lowest"]}'
+    
     def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            counter = 1
-            while Document.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
+        allocates_slug = not self.slug
+        if allocates_slug:
+            self.slug = self.allocate_slug(self.title)
+        
+        update_fields = kwargs.get('update_fields')
+        
+        # Read file metadata once, from the upload stream of a new file,
+        # unless the caller already did (upload serializers hash while validating)
+        if self.file and not self.file._committed:
+            if not (self.content_hash and self.field_changed('content_hash')):
+                self.file_size, self.content_hash, self.page_count = inspect_upload(self.file)
+            if update_fields is not None:
+                kwargs['update_fields'] = update_fields = {
+                    *update_fields, 'file_size', 'content_hash', 'page_count'
+                }
+            stored_name = self.file.field.generate_filename(self, self.file.name)
+            if self.file.storage.exists(stored_name):
+                # The same bytes are already stored: share them instead of writing a copy.
+                self.file.name = stored_name
+                self.file._committed = True
+        
+        # Previews and extracted text belong to the file: redo them for a new one.
+        file_changed = (
+            (update_fields is None or 'content_hash' in update_fields) and
+            self.field_changed('content_hash')
+        )
+        if file_changed:
+            self.preview_pages = 0
+            if update_fields is not None:
+                kwargs['update_fields'] = update_fields = {*update_fields, 'preview_pages'}
+        
+        saves_tags = update_fields is None or 'tags' in update_fields
+        saves_counted = update_fields is None or bool(
+            {'status', 'category', 'category_id'} & set(update_fields)
+        )
+        tags_changed = saves_tags and self.field_changed('tags')
+        
+        bumps_version = not self._state.adding
+        if bumps_version:
+            # Incremented in the database, so concurrent saves are all counted.
+            version_requested = update_fields is None or 'version' in update_fields
+            stored_version = self.__dict__.get('version')
+            self.version = models.F('version') + 1
+            if update_fields is not None:
+                kwargs['update_fields'] = update_fields = {*update_fields, 'version'}
+        
+        try:
+            for attempt in range(SLUG_ATTEMPTS):
+                try:
+                    with transaction.atomic():
+                        # Read under the row lock: concurrent saves count each change once.
+                        previous = None
+                        if saves_counted and not self._state.adding:
+                            previous = self.lock_stored_values('status', 'category_id')
+                        super().save(*args, **kwargs)
+                        if saves_counted:
+                            self.update_category_counts(previous)
+                        if tags_changed:
+                            self.sync_tags()
+                    break
+                except IntegrityError:
+                    # A concurrent upload took the allocated slug: allocate again.
+                    if (
+                        not allocates_slug or attempt == SLUG_ATTEMPTS - 1 or
+                        not Document.objects.filter(slug=self.slug).exists()
+                    ):
+                        raise
+                    self.slug = self.allocate_slug(self.title)
+        except Exception:
+            # Nothing was saved: do not leave the expression on the instance.
+            if bumps_version:
+                del self.version
+                if stored_version is not None:
+                    self.version = stored_version
+            raise
         
-        # Set file size if file exists
-        if self.file:
-            self.file_size = self.file.size
+        if file_changed and self.content_hash:
+            schedule_previews(self.pk)
+            schedule_text_extraction(self.pk)
+        if bumps_version:
+            if version_requested:
+                self.refresh_from_db(fields=['version'])
+            else:
+                # Deferred: read from the database only if it is used.
+                del self.version
         
-        super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields if field.attname in self.__dict__
+        }
+    
+    def update_category_counts(self, previous):
+        """
+        Move this document's contribution to Category.approved_count after
+        it entered or left the approved status or changed category.
+        """
+        from djangoapp.categories.models import Category
+        was_approved = previous is not None and previous['status'] == 'approved'
+        is_approved = self.status == 'approved'
+        moved = previous is not None and previous['category_id'] != self.category_id
+        
+        if was_approved and (moved or not is_approved):
+            Category.adjust_approved_count(previous['category_id'], -1)
+        if is_approved and (moved or not was_approved):
+            Category.adjust_approved_count(self.category_id, 1)
+    
+    @classmethod
+    def moderate(cls, documents, action, reviewer, rejection_reason=''):
+        """
+        Approve or reject the documents of a queryset at once and return the
+        primary keys of those updated. Documents claimed by another
+        moderator are left alone.
+        
+        Uses one UPDATE for the documents and one per category whose count
+        changes, in a single transaction. No save() runs and no signals are
+        sent, so the documents cache version is bumped here.
+        """
+        from djangoapp.categories.models import Category
+        from djangoapp.core.cache import bump_version
+        
+        new_status = 'approved' if action == 'approve' else 'rejected'
+        now = timezone.now()
+        with transaction.atomic():
+            rows = list(
+                cls.objects.select_for_update().filter(pk__in=documents.values('pk'))
+                .filter(cls.claimable(reviewer, now))
+                .order_by('pk').values('pk', 'status', 'category_id')
+            )
+            if not rows:
+                return []
+            cls.objects.filter(pk__in=[row['pk'] for row in rows]).update(
+                status=new_status,
+                reviewed_by=reviewer,
+                reviewed_at=now,
+                rejection_reason=rejection_reason if new_status == 'rejected' else '',
+                claimed_by=None,
+                claim_expires_at=None,
+                version=models.F('version') + 1,
+                updated_at=now
+            )
+            deltas = Counter()
+            for row in rows:
+                if row['status'] == 'approved' and new_status != 'approved':
+                    deltas[row['category_id']] -= 1
+                elif row['status'] != 'approved' and new_status == 'approved':
+                    deltas[row['category_id']] += 1
+            for category_id, delta in deltas.items():
+                if delta:
+                    Category.adjust_approved_count(category_id, delta)
+        bump_version('documents')
+        return [row['pk'] for row in rows]
+    
+    @classmethod
+    def hide_for_review(cls, document_id):
+        """
+        Take an approved document out of public view until a moderator
+        approves or rejects it again. Returns True if it was hidden.
+        """
+        from djangoapp.categories.models import Category
+        from djangoapp.core.cache import bump_version
+        
+        with transaction.atomic():
+            category_id = cls.objects.select_for_update().filter(
+                pk=document_id, status='approved'
+            ).values_list('category_id', flat=True).first()
+            if category_id is None:
+                return False
+            cls.objects.filter(pk=document_id).update(
+                status='hidden', version=models.F('version') + 1, updated_at=timezone.now()
+            )
+            Category.adjust_approved_count(category_id, -1)
+        bump_version('documents')
+        return True
+    
+    @staticmethod
+    def visible_to(user):
+        """Filter for the documents a user may see: all for moderators, else approved and their own."""
+        from djangoapp.accounts.permissions import is_moderator
+        if is_moderator(user):
+            return Q()
+        if user is not None and user.is_authenticated:
+            return Q(status='approved') | Q(uploaded_by=user)
+        return Q(status='approved')
+    
+    @staticmethod
+    def claimable(moderator, now):
+        """Filter for documents without a live claim of another moderator."""
+        return Q(claimed_by__isnull=True) | Q(claimed_by=moderator) | Q(claim_expires_at__lte=now)
+    
+    @classmethod
+    def claim_pending(cls, moderator, count):
+        """
+        Lease up to ``count`` pending documents to a moderator, oldest first,
+        for ``MODERATION_CLAIM_TIMEOUT`` seconds, and return their primary keys.
+        
+        Documents the moderator already holds count towards ``count`` and
+        have their lease renewed. Rows another moderator is claiming are
+        skipped (``FOR UPDATE SKIP LOCKED``) rather than waited on, and
+        leases that ran out are free to claim again.
+        """
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=settings.MODERATION_CLAIM_TIMEOUT)
+        with transaction.atomic():
+            held = list(
+                cls.objects.filter(status='pending', claimed_by=moderator, claim_expires_at__gt=now)
+                .order_by('created_at', 'pk').values_list('pk', flat=True)[:count]
+            )
+            free = []
+            if len(held) < count:
+                free = list(
+                    cls.objects.select_for_update(skip_locked=True)
+                    .filter(status='pending')
+                    .filter(Q(claimed_by__isnull=True) | Q(claim_expires_at__lte=now))
+                    .order_by('created_at', 'pk').values_list('pk', flat=True)[:count - len(held)]
+                )
+            # Compare-and-set, for databases without row locks (SQLite).
+            cls.objects.filter(pk__in=held + free, status='pending').filter(
+                cls.claimable(moderator, now)
+            ).update(claimed_by=moderator, claim_expires_at=expires_at)
+        return list(
+            cls.objects.filter(pk__in=held + free, claimed_by=moderator, claim_expires_at=expires_at)
+            .order_by('created_at', 'pk').values_list('pk', flat=True)
+        )
+    
+    @classmethod
+    def release_claims(cls, moderator, documents=None):
+        """End the moderator's leases, on the given documents or all of them."""
+        claims = cls.objects.filter(claimed_by=moderator)
+        if documents is not None:
+            claims = claims.filter(pk__in=documents)
+        return claims.update(claimed_by=None, claim_expires_at=None)
+    
+    def is_claimed_by_other(self, moderator):
+        """True if another moderator holds a live lease on this document."""
+        return (
+            self.claimed_by_id is not None and self.claimed_by_id != moderator.pk and
+            self.claim_expires_at is not None and self.claim_expires_at > timezone.now()
+        )
+    
+    def sync_tags(self):
+        """Mirror the comma-separated tags field into Tag rows."""
+        names = {}
+        for name in self.tag_list:
+            slug = slugify(name)[:100]
+            if slug:
+                names.setdefault(slug, name[:100])
+        
+        current = set(self.document_tags.values_list('tag__slug', flat=True))
+        if current == set(names):
+            return
+        
+        self.document_tags.exclude(tag__slug__in=names).delete()
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=slug) for slug, name in names.items()],
+            ignore_conflicts=True
+        )
+        DocumentTag.objects.bulk_create(
+            [
+                DocumentTag(document=self, tag=tag)
+                for tag in Tag.objects.filter(slug__in=names).exclude(slug__in=current)
+            ],
+            ignore_conflicts=True
+        )
     
     def increment_view_count(self):
-        """Increment view counter."""
+        """Increment view counter (buffered, see counters.py)."""
+        from .counters import counter_buffer
+        counter_buffer.increment(self.pk, 'view_count')
         self.view_count += 1
-        self.save(update_fields=['view_count'])
     
     def increment_download_count(self):
-        """Increment download counter."""
+        """Increment download counter (buffered, see counters.py)."""
+        from .counters import counter_buffer
+        counter_buffer.increment(self.pk, 'download_count')
         self.download_count += 1
-        self.save(update_fields=['download_count'])
     
     @property
     def is_approved(self):
@@ -146,3 +533,222 @@ class Document(models.Model):
         if self.tags:
             return [tag.strip() for tag in self.tags.split(',') if tag.strip()]
         return []
+
+
+class Tag(models.Model):
+    """
+    Normalized document tag, looked up by its indexed slug.
+    """
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'tags'
+        verbose_name = 'Tag'
+        verbose_name_plural = 'Tags'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+class DocumentTag(models.Model):
+    """
+    Through table linking documents to tags.
+    """
+    document = models.ForeignKey(
+        Document,
+        on_delete=models.CASCADE,
+        related_name='document_tags'
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='document_tags'
+    )
+    
+    class Meta:
+        db_table = 'document_tags'
+        unique_together = ['document', 'tag']
+        indexes = [
+            models.Index(fields=['tag', 'document']),
+        ]
+
+
+class DocumentText(models.Model):
+    """
+    Plain text extracted from a document's file, for full-text search.
+    
+    Kept out of the documents table so list queries stay narrow; filled by
+    ``extraction.store_document_text``.
+    """
+    document = models.OneToOneField(
+        Document,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='text'
+    )
+    content_hash = models.CharField(max_length=64, help_text='SHA-256 of the file the text comes from')
+    text = models.TextField(blank=True)
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True, help_text='Why the text could not be extracted')
+    ocr_pages = models.PositiveIntegerField(default=0, help_text='Pages without a text layer read by OCR')
+    extracted_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'document_texts'
+        verbose_name = 'Document Text'
+        verbose_name_plural = 'Document Texts'
+    
+    def __str__(self):
+        return f'Text of document {self.document_id}'
+
+
+class OcrPage(models.Model):
+    """
+    OCR text of one page of a file, cached by content hash and languages so
+    re-runs and duplicate files never read a page twice (see ``ocr.py``).
+    """
+    content_hash = models.CharField(max_length=64)
+    page = models.PositiveIntegerField()
+    languages = models.CharField(max_length=100)
+    text = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'ocr_pages'
+        unique_together = ['content_hash', 'languages', 'page']
+        verbose_name = 'OCR Page'
+        verbose_name_plural = 'OCR Pages'
+    
+    def __str__(self):
+        return f'Page {self.page} of {self.content_hash}'
+
+
+class UploadSession(models.Model):
+    """
+    Resumable upload of a document file, appended chunk by chunk.
+    
+    Bytes are written to a part file under ``UPLOAD_SESSION_DIR`` and
+    ``offset`` counts how many have been received. Chunks are written under
+    an exclusive flock() of the part file, so the directory must be shared
+    by every backend process. A complete session is finalized into a
+    pending Document (see ``UploadSessionViewSet``).
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions'
+    )
+    filename = models.CharField(max_length=255)
+    length = models.BigIntegerField(help_text='Total file size in bytes')
+    offset = models.BigIntegerField(default=0, help_text='Bytes received so far')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'upload_sessions'
+        verbose_name = 'Upload Session'
+        verbose_name_plural = 'Upload Sessions'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
+    
+    def __str__(self):
+        return f'{self.filename} ({self.offset}/{self.length})'
+    
+    @property
+    def part_path(self):
+        return os.path.join(settings.UPLOAD_SESSION_DIR, f'{self.pk}.part')
+    
+    @property
+    def is_complete(self):
+        return self.offset == self.length
+    
+    def append(self, offset, stream, length, chunk_size=64 * 1024):
+        """
+        Write ``length`` bytes from ``stream`` at ``offset`` without holding
+        them in memory, and return the new offset.
+        
+        The part file is locked first: if another request is appending, or
+        has moved the offset since ``offset`` was read, nothing is written
+        and None is returned.
+        """
+        os.makedirs(settings.UPLOAD_SESSION_DIR, exist_ok=True)
+        descriptor = os.open(self.part_path, os.O_RDWR | os.O_CREAT, 0o600)
+        with open(descriptor, 'r+b') as part:
+            try:
+                fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            if not UploadSession.objects.filter(pk=self.pk, offset=offset).exists():
+                return None
+            
+            part.seek(offset)
+            written = 0
+            while written < length:
+                chunk = stream.read(min(chunk_size, length - written))
+                if not chunk:
+                    break
+                part.write(chunk)
+                written += len(chunk)
+            part.flush()
+            # Still under the lock, so no other chunk saw the old offset meanwhile.
+            UploadSession.objects.filter(pk=self.pk, offset=offset).update(
+                offset=offset + written, updated_at=timezone.now()
+            )
+        return offset + written
+    
+    def discard(self):
+        """Delete the session and its part file."""
+        try:
+            os.remove(self.part_path)
+        except FileNotFoundError:
+            pass
+        self.delete()
+
+
+class FullTextMatch(models.Lookup):
+    """``<column> MATCH <query>`` lookup for the SQLite FTS5 search index."""
+    lookup_name = 'match'
+    
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class DocumentSearchEntry(models.Model):
+    """
+    Row of the SQLite FTS5 search index, keyed by document id.
+    
+    The ``documents_fts`` virtual table only exists on SQLite (see migrations
+    0003 and 0009) and is kept in sync by ``search.SQLiteSearchBackend``.
+    """
+    document = models.OneToOneField(
+        Document,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        related_name='search_entry'
+    )
+    title = models.TextField()
+    tags = models.TextField()
+    description = models.TextField()
+    content = models.TextField()
+    
+    # FTS5 hidden columns: the table-named column takes MATCH queries and
+    # ``rank`` holds the weighted bm25() score (lower is better).
+    fts = models.TextField(db_column='documents_fts')
+    rank = models.FloatField()
+    
+    class Meta:
+        managed = False
+        db_table = 'documents_fts'
+
+
+DocumentSearchEntry._meta.get_field('fts').register_lookup(FullTextMatch)
@@ -0,0 +1,136 @@
+"""
+OCR of scanned pages, for PDFs without a text layer.
+
+When text extraction finds pages with (almost) no text, a background job
+renders those pages with ``pdftoppm`` and reads them with ``tesseract`` in
+``DOCUMENT_OCR_LANGUAGES`` (French and English by default), running at most
+``DOCUMENT_OCR_WORKERS`` tesseract processes at once. Each page's result is
+cached in ``OcrPage`` under the file's content hash as soon as it is read,
+so retries, re-runs and duplicate files only OCR pages never read before.
+The text is merged into ``DocumentText``, which the search index reads.
+"""
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+
+from djangoapp.core.cache import bump_version
+from djangoapp.jobs.queue import enqueue
+
+from .extraction import (
+    ExtractionError, blank_pages, join_pages, run_pdftotext, run_tool, split_pages
+)
+from .uploads import local_copy
+
+logger = logging.getLogger(__name__)
+
+OCR_TEXT_JOB = 'documents.ocr_text'
+
+
+def ocr_enabled():
+    return bool(settings.DOCUMENT_OCR_LANGUAGES)
+
+
+def ocr_page(source, number, directory):
+    """Return the text tesseract reads on one page of a PDF."""
+    image = os.path.join(directory, f'page-{number}')
+    run_tool(
+        [settings.DOCUMENT_PREVIEW_PDFTOPPM, '-png', '-gray', '-r', str(settings.DOCUMENT_OCR_DPI),
+         '-f', str(number), '-l', str(number), '-singlefile', source, image],
+        settings.DOCUMENT_OCR_TIMEOUT
+    )
+    try:
+        # Pages are already read in parallel; one thread per tesseract process.
+        output = run_tool(
+            [settings.DOCUMENT_OCR_TESSERACT, f'{image}.png', 'stdout',
+             '-l', settings.DOCUMENT_OCR_LANGUAGES],
+            settings.DOCUMENT_OCR_TIMEOUT,
+            env={**os.environ, 'OMP_THREAD_LIMIT': '1'}
+        )
+    finally:
+        os.remove(f'{image}.png')
+    return output.decode('utf-8', errors='replace')
+
+
+def ocr_pages(source, content_hash, numbers):
+    """
+    Return the OCR text of the given pages of a PDF by page number.
+
+    Cached pages are not read again; pages tesseract cannot read are left out.
+    """
+    from .models import OcrPage
+
+    languages = settings.DOCUMENT_OCR_LANGUAGES
+    texts = dict(
+        OcrPage.objects.filter(
+            content_hash=content_hash, languages=languages, page__in=numbers
+        ).values_list('page', 'text')
+    )
+    missing = [number for number in numbers if number not in texts]
+    if not missing:
+        return texts
+
+    with tempfile.TemporaryDirectory() as directory, \
+            ThreadPoolExecutor(max_workers=settings.DOCUMENT_OCR_WORKERS) as pool:
+        futures = {pool.submit(ocr_page, source, number, directory): number for number in missing}
+        for future in as_completed(futures):
+            number = futures[future]
+            try:
+                text = future.result()
+            except ExtractionError as error:
+                logger.warning('Could not OCR page %s of %s: %s', number, content_hash, error)
+                continue
+            # Cached right away, so a retry resumes where this run stopped.
+            OcrPage.objects.get_or_create(
+                content_hash=content_hash, languages=languages, page=number,
+                defaults={'text': text}
+            )
+            texts[number] = text
+    return texts
+
+
+def ocr_document_text(document_id):
+    """
+    OCR the pages of a document without a text layer and store the merged
+    text for every document with the same file. Returns the number of pages
+    read; storage errors are raised so the job is retried.
+    """
+    from .models import Document, DocumentText
+
+    document = Document.objects.filter(pk=document_id).exclude(content_hash='').only(
+        'pk', 'file', 'content_hash'
+    ).first()
+    if document is None or not ocr_enabled():
+        return 0
+
+    with local_copy(document.file) as source:
+        try:
+            pages = split_pages(run_pdftotext(source))
+        except ExtractionError as error:
+            logger.warning('Could not extract the text of document %s: %s', document_id, error)
+            return 0
+        numbers = blank_pages(pages)[:settings.DOCUMENT_OCR_MAX_PAGES]
+        if not numbers:
+            return 0
+        texts = ocr_pages(source, document.content_hash, numbers)
+
+    for number, text in texts.items():
+        pages[number - 1] = text
+    text = join_pages(pages)
+    # Saved one by one so the search index of each document is refreshed.
+    for document_text in DocumentText.objects.filter(
+        content_hash=document.content_hash, error=''
+    ).select_related('document'):
+        document_text.text = text
+        document_text.ocr_pages = len(texts)
+        document_text.save(update_fields=['text', 'ocr_pages'])
+    # Search results are cached with the documents version.
+    bump_version('documents')
+    return len(texts)
+
+
+def schedule_ocr(document_id):
+    """Queue OCR; the job becomes visible to workers when the transaction commits."""
+    enqueue(OCR_TEXT_JOB, document_id=document_id)
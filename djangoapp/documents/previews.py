@@ -0,0 +1,164 @@
+"""
+First-page thumbnails and low-resolution page previews.
+
+Pages are rendered to JPEG with ``pdftoppm`` (poppler-utils) by a
+background job after an upload, or by the ``render_previews`` command. Assets are
+stored under the file's content hash (``previews/<ab>/<hash>/``): identical
+files share them and are rendered once, and since a name never changes
+content the assets are served with a long-lived immutable Cache-Control.
+``Document.preview_pages`` records how many pages were rendered, so
+serializers build URLs without asking the storage.
+"""
+import glob
+import logging
+import os
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from storages.utils import clean_name
+
+from djangoapp.core.cache import bump_version
+from djangoapp.jobs.queue import enqueue
+
+from .uploads import local_copy
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_PREFIX = 'previews'
+
+RENDER_PREVIEWS_JOB = 'documents.render_previews'
+
+
+class PreviewError(Exception):
+    """Raised when a PDF cannot be rendered."""
+
+
+def preview_dir(content_hash):
+    return f'{PREVIEW_PREFIX}/{content_hash[:2]}/{content_hash}'
+
+
+def thumbnail_name(content_hash):
+    return f'{preview_dir(content_hash)}/thumbnail.jpg'
+
+
+def page_name(content_hash, number):
+    return f'{preview_dir(content_hash)}/page-{number}.jpg'
+
+
+def run_pdftoppm(source, output, *options):
+    """Render pages of ``source`` to JPEG files named after ``output``."""
+    try:
+        subprocess.run(
+            [settings.DOCUMENT_PREVIEW_PDFTOPPM, '-jpeg', '-jpegopt', 'quality=80',
+             *options, source, output],
+            check=True,
+            capture_output=True,
+            timeout=settings.DOCUMENT_PREVIEW_TIMEOUT
+        )
+    except (OSError, subprocess.SubprocessError) as error:
+        raise PreviewError(f'pdftoppm failed: {error}') from error
+
+
+def render_pages(source, directory):
+    """
+    Render the thumbnail and preview pages of a PDF into ``directory``.
+
+    Returns the thumbnail path and the preview page paths in page order.
+    """
+    thumbnail = os.path.join(directory, 'thumbnail')
+    run_pdftoppm(
+        source, thumbnail, '-f', '1', '-l', '1', '-singlefile',
+        '-scale-to', str(settings.DOCUMENT_THUMBNAIL_SIZE)
+    )
+    run_pdftoppm(
+        source, os.path.join(directory, 'page'),
+        '-f', '1', '-l', str(settings.DOCUMENT_PREVIEW_PAGES),
+        '-scale-to', str(settings.DOCUMENT_PREVIEW_SIZE)
+    )
+    # pdftoppm zero-pads page numbers to the width of the last page number.
+    pages = sorted(
+        glob.glob(os.path.join(directory, 'page-*.jpg')),
+        key=lambda path: int(path.rsplit('-', 1)[1].split('.')[0])
+    )
+    return f'{thumbnail}.jpg', pages
+
+
+def save_asset(storage, name, path):
+    """Store a rendered image under ``name``, overwriting any previous copy."""
+    with open(path, 'rb') as image:
+        if getattr(storage, 'bucket', None) is not None:
+            parameters = {
+                'ContentType': 'image/jpeg',
+                'CacheControl': settings.DOCUMENT_PREVIEW_CACHE_CONTROL,
+            }
+            if storage.default_acl:
+                parameters['ACL'] = storage.default_acl
+            storage.bucket.Object(storage._normalize_name(clean_name(name))).put(
+                Body=image, **parameters
+            )
+        else:
+            # Cache headers come from the web server (see docker/nginx.conf).
+            storage.delete(name)
+            storage.save(name, ContentFile(image.read()))
+
+
+def render_previews(document):
+    """
+    Render and store the previews of a document's file.
+
+    Returns the number of preview pages. Files whose previews were already
+    rendered for another document are not rendered again.
+    """
+    from .models import Document
+
+    rendered = Document.objects.filter(
+        content_hash=document.content_hash, preview_pages__gt=0
+    ).values_list('preview_pages', flat=True).first()
+    if rendered:
+        return rendered
+
+    storage = document.file.storage
+    with local_copy(document.file) as source, tempfile.TemporaryDirectory() as directory:
+        thumbnail, pages = render_pages(source, directory)
+        if not pages:
+            raise PreviewError('pdftoppm rendered no pages')
+        save_asset(storage, thumbnail_name(document.content_hash), thumbnail)
+        for number, path in enumerate(pages, start=1):
+            save_asset(storage, page_name(document.content_hash, number), path)
+    return len(pages)
+
+
+def generate_previews(document_id):
+    """
+    Render previews for a document and record them on every document with
+    the same file. Returns the number of preview pages, 0 if the PDF cannot
+    be rendered; storage errors are raised so the job is retried.
+    """
+    from .models import Document
+
+    document = Document.objects.filter(pk=document_id).exclude(content_hash='').only(
+        'pk', 'file', 'content_hash'
+    ).first()
+    if document is None:
+        return 0
+    try:
+        pages = render_previews(document)
+    except PreviewError:
+        logger.exception('Could not render previews of document %s', document_id)
+        return 0
+
+    # updated_at is part of the detail ETag, which must change with the preview URLs.
+    Document.objects.filter(content_hash=document.content_hash).update(
+        preview_pages=pages, updated_at=timezone.now()
+    )
+    # Thumbnail URLs are part of list responses; update() sends no signals.
+    bump_version('documents')
+    return pages
+
+
+def schedule_previews(document_id):
+    """Queue rendering; the job becomes visible to workers when the transaction commits."""
+    enqueue(RENDER_PREVIEWS_JOB, document_id=document_id)
@@ -0,0 +1,180 @@
+"""
+Full-text search for documents.
+
+``DocumentSearchFilter`` handles the ``?q=`` parameter and delegates to a
+search backend. The backend is picked from the ``DOCUMENT_SEARCH_BACKEND``
+setting (a dotted path), or from the database vendor when it is empty:
+
+- PostgreSQL: ``Document.search_vector``, maintained by a database trigger and
+  covered by a GIN index (see migration 0002).
+- SQLite: the ``documents_fts`` FTS5 table (see migration 0003), kept in sync
+  from ``signals.py`` and ranked with bm25().
+- Anything else: the ``icontains`` matching used by ``?search=``.
+
+Title matches weigh more than tags, tags more than the description, and the
+description more than the text extracted from the file (``DocumentText``).
+Visibility rules are untouched: backends only narrow the queryset they get.
+"""
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, Q
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+# Text search configuration used by the trigger and by queries. 'simple' does
+# no stemming, which keeps English, French and Kirundi text searchable alike.
+SEARCH_CONFIG = 'simple'
+
+SEARCH_FIELDS = ['title', 'tags', 'description']
+
+# Per-alias cache of whether the FTS5 table exists (it is skipped when SQLite
+# is built without FTS5). Cleared after migrations, which may create or drop it.
+_fts_tables = {}
+
+
+def clear_fts_tables(using=None):
+    """Forget whether the FTS5 table exists, for one alias or all of them."""
+    if using is None:
+        _fts_tables.clear()
+    else:
+        _fts_tables.pop(using, None)
+
+
+class BaseSearchBackend(ABC):
+    """
+    Interface for document search backends.
+
+    ``search`` narrows a document queryset to the matches for ``query`` and,
+    when the backend can rank, annotates it with ``search_rank``.
+    ``rank_ordering`` is the ordering to apply when the client did not ask
+    for one, or None for unranked backends.
+    """
+    rank_ordering = None
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    @abstractmethod
+    def search(self, queryset, query):
+        """Return ``queryset`` narrowed to the documents matching ``query``."""
+
+    def index_document(self, document):
+        """Add or refresh a document in the index."""
+
+    def remove_document(self, document_id):
+        """Drop a document from the index."""
+
+    def rebuild(self):
+        """Rebuild the whole index from the documents table."""
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """Unindexed fallback: every term must appear in a searchable field."""
+
+    def search(self, queryset, query):
+        for term in query.split():
+            term_filter = Q()
+            for field in SEARCH_FIELDS:
+                term_filter |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(term_filter | Q(text__text__icontains=term))
+        return queryset
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Search the trigger-maintained ``search_vector`` column."""
+    rank_ordering = ['-search_rank', '-created_at']
+
+    def search(self, queryset, query):
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F('search_vector'), search_query)
+        )
+
+    def rebuild(self):
+        from .models import Document
+        # Writing the column fires the trigger, which recomputes it.
+        Document.objects.using(self.using).update(search_vector=None)
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """Search the ``documents_fts`` FTS5 table, ranked by weighted bm25()."""
+    rank_ordering = ['search_rank', '-created_at']
+
+    def search(self, queryset, query):
+        return queryset.filter(
+            search_entry__fts__match=self.build_match_expression(query)
+        ).annotate(search_rank=F('search_entry__rank'))
+
+    @staticmethod
+    def build_match_expression(query):
+        """Quote each term so user input is never parsed as FTS5 syntax."""
+        terms = ['"%s"' % term.replace('"', '""') for term in query.split()]
+        return ' '.join(terms)
+
+    def index_document(self, document):
+        from .models import DocumentText
+        content = DocumentText.objects.using(self.using).filter(
+            document_id=document.pk
+        ).values_list('text', flat=True).first()
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                'INSERT OR REPLACE INTO documents_fts(rowid, title, tags, description, content) '
+                'VALUES (%s, %s, %s, %s, %s)',
+                [document.pk, document.title, document.tags, document.description, content or '']
+            )
+
+    def remove_document(self, document_id):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute('DELETE FROM documents_fts WHERE rowid = %s', [document_id])
+
+    def rebuild(self):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute('DELETE FROM documents_fts')
+            cursor.execute(
+                'INSERT INTO documents_fts(rowid, title, tags, description, content) '
+                "SELECT d.id, d.title, d.tags, d.description, coalesce(t.text, '') "
+                'FROM documents d LEFT JOIN document_texts t ON t.document_id = d.id'
+            )
+
+
+def get_search_backend(using='default'):
+    """Return the search backend for the given database alias."""
+    if settings.DOCUMENT_SEARCH_BACKEND:
+        return import_string(settings.DOCUMENT_SEARCH_BACKEND)(using)
+
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend(using)
+    if connection.vendor == 'sqlite':
+        if using not in _fts_tables:
+            _fts_tables[using] = 'documents_fts' in connection.introspection.table_names()
+        if _fts_tables[using]:
+            return SQLiteSearchBackend(using)
+    return DatabaseSearchBackend(using)
+
+
+class DocumentSearchFilter(filters.BaseFilterBackend):
+    """
+    Filter backend for the ``?q=`` full-text search parameter.
+
+    Results are ordered by relevance unless an explicit ``?ordering=`` is given.
+    """
+    search_param = 'q'
+    ordering_param = filters.OrderingFilter.ordering_param
+
+    def get_search_query(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_search_query(request)
+        if not query:
+            return queryset
+
+        backend = get_search_backend(queryset.db)
+        queryset = backend.search(queryset, query)
+        if backend.rank_ordering and not request.query_params.get(self.ordering_param):
+            queryset = queryset.order_by(*backend.rank_ordering)
+        return queryset
@@ -1,22 +1,47 @@
 from rest_framework import serializers
 from django.conf import settings
-from .models import Document
+from .direct_uploads import copy_staged_upload, inspect_staged_upload, is_staged_name
+from .downloads import signed_download_url
+from .models import Document, Tag, UploadSession
+from .previews import page_name, thumbnail_name
+from .uploads import inspect_upload
 from djangoapp.categories.serializers import CategoryListSerializer
 
 
+# Documents one bulk moderation request may name
+BULK_MODERATION_LIMIT = 500
+
+# Documents a moderator may claim from the queue at once
+MODERATION_CLAIM_LIMIT = 50
+
+
+def preview_url(serializer, name):
+    """Return the absolute URL of a stored preview image."""
+    url = Document._meta.get_field('file').storage.url(name)
+    request = serializer.context.get('request')
+    return request.build_absolute_uri(url) if request else url
+
+
 class DocumentListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for document lists."""
     category = CategoryListSerializer(read_only=True)
     uploaded_by_username = serializers.CharField(source='uploaded_by.username', read_only=True)
     tag_list = serializers.ReadOnlyField()
+    thumbnail_url = serializers.SerializerMethodField()
     
     class Meta:
         model = Document
         fields = [
             'id', 'title', 'slug', 'description', 'category',
             'language', 'tag_list', 'status', 'uploaded_by_username',
-            'view_count', 'download_count', 'created_at'
+            'view_count', 'download_count', 'thumbnail_url', 'created_at'
         ]
+    
+    def get_thumbnail_url(self, obj):
+        """Get the first-page thumbnail, once rendered."""
+        if obj.preview_pages:
+            return preview_url(self, thumbnail_name(obj.content_hash))
+        return None
 
 
 class DocumentDetailSerializer(serializers.ModelSerializer):
@@ -26,25 +51,45 @@ class DocumentDetailSerializer(serializers.ModelSerializer):
     reviewed_by_username = serializers.CharField(source='reviewed_by.username', read_only=True, allow_null=True)
     tag_list = serializers.ReadOnlyField()
     file_url = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+    preview_urls = serializers.SerializerMethodField()
     
     class Meta:
         model = Document
         fields = [
             'id', 'title', 'slug', 'description', 'category',
-            'language', 'tags', 'tag_list', 'file', 'file_url', 'file_size',
+            'language', 'tags', 'tag_list', 'file', 'file_url', 'download_url', 'file_size', 'page_count',
+            'thumbnail_url', 'preview_urls',
             'license', 'license_details', 'status', 'uploaded_by_username',
             'reviewed_by_username', 'reviewed_at', 'rejection_reason',
-            'view_count', 'download_count', 'created_at', 'updated_at'
+            'view_count', 'download_count', 'version', 'created_at', 'updated_at'
         ]
     
     def get_file_url(self, obj):
-        """Get absolute URL for file."""
+        """Get an expiring URL displaying the file inline."""
         if obj.file:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.file.url)
-            return obj.file.url
+            return signed_download_url(obj, self.context.get('request'), inline=True)
         return None
+    
+    def get_download_url(self, obj):
+        """Get an expiring URL downloading the file."""
+        if obj.file:
+            return signed_download_url(obj, self.context.get('request'))
+        return None
+    
+    def get_thumbnail_url(self, obj):
+        """Get the first-page thumbnail, once rendered."""
+        if obj.preview_pages:
+            return preview_url(self, thumbnail_name(obj.content_hash))
+        return None
+    
+    def get_preview_urls(self, obj):
+        """Get the low-resolution images of the first pages, once rendered."""
+        return [
+            preview_url(self, page_name(obj.content_hash, number))
+            for number in range(1, obj.preview_pages + 1)
+        ]
 
 
 class DocumentCreateSerializer(serializers.ModelSerializer):
@@ -71,6 +116,8 @@ class DocumentCreateSerializer(serializers.ModelSerializer):
                 'Only PDF files are allowed.'
             )
         
+        # Hashed here so the view can spot duplicates; create() stores the result.
+        self.file_info = inspect_upload(value)
         return value
     
     def validate_category_id(self, value):
@@ -85,11 +132,15 @@ class DocumentCreateSerializer(serializers.ModelSerializer):
         category_id = validated_data.pop('category_id')
         from djangoapp.categories.models import Category
         category = Category.objects.get(id=category_id)
+        file_size, content_hash, page_count = self.file_info
         
         document = Document.objects.create(
             category=category,
             uploaded_by=self.context['request'].user,
             status='pending',  # Always pending by default
+            file_size=file_size,
+            content_hash=content_hash,
+            page_count=page_count,
             **validated_data
         )
         return document
@@ -107,6 +158,11 @@ class DocumentApprovalSerializer(serializers.Serializer):
     """Serializer for approving/rejecting documents."""
     action = serializers.ChoiceField(choices=['approve', 'reject'], required=True)
     rejection_reason = serializers.CharField(required=False, allow_blank=True)
+    version = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        help_text='Version the moderator reviewed; refused if the document changed since'
+    )
     
     def validate(self, attrs):
         if attrs['action'] == 'reject' and not attrs.get('rejection_reason'):
@@ -114,3 +170,120 @@ class DocumentApprovalSerializer(serializers.Serializer):
                 'rejection_reason': 'Rejection reason is required when rejecting a document.'
             })
         return attrs
+
+
+class DocumentQueueSerializer(DocumentListSerializer):
+    """Serializer for documents claimed from the moderation queue."""
+    
+    class Meta(DocumentListSerializer.Meta):
+        fields = DocumentListSerializer.Meta.fields + ['version', 'claim_expires_at']
+
+
+class ModerationClaimSerializer(serializers.Serializer):
+    """Serializer for claiming documents from the moderation queue."""
+    count = serializers.IntegerField(min_value=1, max_value=MODERATION_CLAIM_LIMIT, default=10)
+
+
+class ModerationReleaseSerializer(serializers.Serializer):
+    """Serializer for releasing claimed documents; all of them when omitted."""
+    documents = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        max_length=MODERATION_CLAIM_LIMIT
+    )
+
+
+class DocumentReferenceField(serializers.Field):
+    """A document given by its id (a number) or its slug (a string)."""
+    default_error_messages = {
+        'invalid': 'Expected a document id or slug.',
+    }
+    
+    def to_internal_value(self, data):
+        if isinstance(data, bool) or not isinstance(data, (int, str)) or data in ('', 0):
+            self.fail('invalid')
+        return data
+    
+    def to_representation(self, value):
+        return value
+
+
+class BulkModerationSerializer(DocumentApprovalSerializer):
+    """Serializer for approving/rejecting many documents at once."""
+    documents = serializers.ListField(
+        child=DocumentReferenceField(),
+        allow_empty=False,
+        max_length=BULK_MODERATION_LIMIT
+    )
+
+
+class TagSerializer(serializers.ModelSerializer):
+    """Serializer for tags with their approved document count."""
+    document_count = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = Tag
+        fields = ['name', 'slug', 'document_count']
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer for resumable upload sessions."""
+    
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'length', 'offset', 'created_at']
+        read_only_fields = ['id', 'offset', 'created_at']
+    
+    def validate_length(self, value):
+        """Validate the announced file size."""
+        if value <= 0:
+            raise serializers.ValidationError('File is empty.')
+        if value > settings.MAX_UPLOAD_SIZE:
+            max_size_mb = settings.MAX_UPLOAD_SIZE / (1024 * 1024)
+            raise serializers.ValidationError(
+                f'File size cannot exceed {max_size_mb}MB.'
+            )
+        return value
+
+
+class DirectUploadFinalizeSerializer(DocumentCreateSerializer):
+    """
+    Serializer creating a document from a file uploaded straight to S3.
+    
+    ``key`` is the staged name returned when the upload was signed; the
+    storage is passed in the ``storage`` context entry.
+    """
+    key = serializers.CharField(write_only=True)
+    
+    class Meta(DocumentCreateSerializer.Meta):
+        fields = [
+            'title', 'description', 'category_id', 'language',
+            'tags', 'key', 'license', 'license_details'
+        ]
+    
+    def validate_key(self, value):
+        """Validate the staged object belongs to the user and is a PDF."""
+        if not is_staged_name(self.context['request'].user, value):
+            raise serializers.ValidationError('Uploaded file not found.')
+        self.file_info = inspect_staged_upload(self.context['storage'], value)
+        return value
+    
+    def create(self, validated_data):
+        """Move the staged file to its content-addressed name and create the document."""
+        from djangoapp.categories.models import Category
+        storage = self.context['storage']
+        key = validated_data.pop('key')
+        
+        document = Document(
+            category=Category.objects.get(id=validated_data.pop('category_id')),
+            uploaded_by=self.context['request'].user,
+            status='pending',
+            **validated_data
+        )
+        document.file_size, document.content_hash, document.page_count = self.file_info
+        document.file.name = copy_staged_upload(
+            storage, key, document.file.field.generate_filename(document, key)
+        )
+        document.save()
+        storage.delete(key)
+        return document
@@ -0,0 +1,58 @@
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete
+from django.dispatch import receiver
+
+from djangoapp.categories.models import Category
+from djangoapp.core.cache import bump_version
+
+from .counters import counter_buffer
+from .models import Document, DocumentText
+from .search import SEARCH_FIELDS, clear_fts_tables, get_search_backend
+
+
+@receiver(post_save, sender=Document)
+def index_document(sender, instance, update_fields=None, using='default', **kwargs):
+    """Keep the search index in sync when searchable fields are saved."""
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+    get_search_backend(using).index_document(instance)
+
+
+@receiver(post_save, sender=DocumentText)
+def index_document_text(sender, instance, using='default', **kwargs):
+    """Reindex a document when its extracted text is stored."""
+    get_search_backend(using).index_document(instance.document)
+
+
+@receiver(post_delete, sender=Document)
+def unindex_document(sender, instance, using='default', **kwargs):
+    """Drop deleted documents from the search index."""
+    get_search_backend(using).remove_document(instance.pk)
+
+
+@receiver(post_migrate)
+def forget_search_tables(sender, using='default', **kwargs):
+    """Look the FTS5 table up again once migrations may have changed it."""
+    clear_fts_tables(using)
+
+
+@receiver(pre_delete, sender=Document)
+def uncount_document(sender, instance, **kwargs):
+    """Remove approved documents about to be deleted from their category's count."""
+    # Runs in the deletion's transaction; the lock holds until the row is gone.
+    stored = instance.lock_stored_values('status', 'category_id')
+    if stored is not None and stored['status'] == 'approved':
+        Category.adjust_approved_count(stored['category_id'], -1)
+
+
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+def bump_documents_version(sender, **kwargs):
+    """Invalidate ETags and cached responses built from documents."""
+    bump_version('documents')
+
+
+@receiver(request_finished)
+def flush_counters(sender, **kwargs):
+    """Write buffered view/download counts once the flush interval has passed."""
+    counter_buffer.flush_if_due()
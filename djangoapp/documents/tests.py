@@ -1,11 +1,18 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
+from io import StringIO
 
-from .models import Document
+from .counters import counter_buffer
+from .downloads import signed_download_url
+from .models import Document, UploadSession
 from djangoapp.categories.models import Category
 
 
@@ -60,6 +67,30 @@ class DocumentModelTest(TestCase):
         )
         
         self.assertEqual(str(document), 'Test Document')
+    
+    def test_failed_save_keeps_version(self):
+        """Test a save that fails leaves the document's version as it was."""
+        from django.db import IntegrityError, transaction
+        
+        document = Document.objects.create(
+            title='Test Document',
+            description='Test description',
+            category=self.category,
+            uploaded_by=self.user
+        )
+        document.title = None
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            document.save()
+        self.assertEqual(document.version, 0)
+        
+        document.title = 'Renamed'
+        document.save()
+        self.assertEqual(document.version, 1)
+        
+        document.save(update_fields=['title'])
+        # Not read back unless used.
+        self.assertNotIn('version', document.__dict__)
+        self.assertEqual(document.version, 2)
 
 
 class DocumentAPITest(APITestCase):
@@ -157,6 +188,17 @@ class DocumentAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
     
+    def test_full_text_search_documents(self):
+        """Test the ?q= full-text search parameter."""
+        url = reverse('document-list')
+        response = self.client.get(url, {'q': 'test document'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        
+        response = self.client.get(url, {'q': 'test unrelated'})
+        self.assertEqual(len(response.data['results']), 0)
+    
     def test_filter_by_category(self):
         """Test filtering documents by category."""
         url = reverse('document-list')
@@ -164,3 +206,1800 @@ class DocumentAPITest(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
+
+
+class DocumentSearchTest(APITestCase):
+    """Test the ?q= search backends and index maintenance."""
+    
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(
+            name='Test Category',
+            description='Test description'
+        )
+        self.document = Document.objects.create(
+            title='Rapport annuel de santé',
+            description='Statistiques sanitaires',
+            category=self.category,
+            uploaded_by=self.user,
+            tags='health, statistics',
+            status='approved'
+        )
+        self.url = reverse('document-list')
+    
+    def search(self, query):
+        response = self.client.get(self.url, {'q': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [doc['slug'] for doc in response.data['results']]
+    
+    def test_index_follows_updates_and_deletes(self):
+        """Test the index is refreshed on save and cleared on delete."""
+        self.assertEqual(self.search('rapport'), [self.document.slug])
+        
+        self.document.title = 'Budget national'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.document.save()
+        self.assertEqual(self.search('rapport'), [])
+        self.assertEqual(self.search('budget'), [self.document.slug])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.document.delete()
+        self.assertEqual(self.search('budget'), [])
+    
+    def test_title_matches_rank_first(self):
+        """Test title matches outrank description matches."""
+        other = Document.objects.create(
+            title='Budget national',
+            description='Inclut un rapport',
+            category=self.category,
+            uploaded_by=self.user,
+            status='approved'
+        )
+        self.assertEqual(self.search('rapport'), [self.document.slug, other.slug])
+    
+    def test_search_respects_visibility(self):
+        """Test pending documents stay hidden from public search."""
+        Document.objects.create(
+            title='Rapport en attente',
+            description='Pending',
+            category=self.category,
+            uploaded_by=self.user
+        )
+        self.assertEqual(self.search('rapport'), [self.document.slug])
+    
+    def test_query_syntax_is_escaped(self):
+        """Test search operators in user input are treated as text."""
+        self.assertEqual(self.search('"rapport OR -'), [])
+        self.assertEqual(self.search('statistics'), [self.document.slug])
+    
+    def test_table_lookup_is_reset_after_migrations(self):
+        """Test post_migrate drops the cached FTS5 table lookup."""
+        from djangoapp.documents import search
+        from djangoapp.documents.signals import forget_search_tables
+        
+        self.addCleanup(search.clear_fts_tables)
+        search._fts_tables['default'] = False
+        forget_search_tables(sender=None, using='default')
+        self.assertNotIn('default', search._fts_tables)
+        self.assertEqual(self.search('rapport'), [self.document.slug])
+    
+    def test_backends_must_implement_search(self):
+        """Test the backend interface cannot be used without search()."""
+        from djangoapp.documents.search import BaseSearchBackend
+        
+        with self.assertRaises(TypeError):
+            BaseSearchBackend()
+
+
+class TagTest(APITestCase):
+    """Test normalized tags, tag filtering and the tags endpoint."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(
+            name='Test Category',
+            description='Test description'
+        )
+        self.health = create_document('Health policy', self.user, self.category, tags='Health, Policy')
+        self.healthcare = create_document('Healthcare report', self.user, self.category, tags='healthcare, policy')
+        create_document('Pending health note', self.user, self.category, status='pending', tags='health')
+    
+    def list_slugs(self, params):
+        response = self.client.get(reverse('document-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {doc['slug'] for doc in response.data['results']}
+    
+    def test_tags_are_normalized(self):
+        """Test the tags string is mirrored into Tag rows."""
+        self.assertEqual(
+            set(self.health.tag_set.values_list('slug', flat=True)),
+            {'health', 'policy'}
+        )
+        self.assertEqual(self.health.tag_list, ['Health', 'Policy'])
+        
+        self.health.tags = 'policy, budget'
+        self.health.save()
+        self.assertEqual(
+            set(self.health.tag_set.values_list('slug', flat=True)),
+            {'policy', 'budget'}
+        )
+    
+    def test_filter_tags_exact_match(self):
+        """Test tag filtering matches whole tags, not substrings."""
+        self.assertEqual(self.list_slugs({'tags': 'health'}), {self.health.slug})
+        self.assertEqual(
+            self.list_slugs({'tags': 'health,healthcare'}),
+            {self.health.slug, self.healthcare.slug}
+        )
+    
+    def test_filter_tags_match_all(self):
+        """Test tag_match=all requires every tag."""
+        self.assertEqual(
+            self.list_slugs({'tags': 'health,policy', 'tag_match': 'all'}),
+            {self.health.slug}
+        )
+    
+    def test_tag_list_endpoint(self):
+        """Test the most used tags are listed with approved document counts."""
+        response = self.client.get(reverse('tag-list'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0], {'name': 'Policy', 'slug': 'policy', 'document_count': 2})
+        counts = {tag['slug']: tag['document_count'] for tag in response.data}
+        self.assertEqual(counts['health'], 1)
+
+
+class DocumentFacetsTest(APITestCase):
+    """Test the document facets endpoint."""
+    
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.health = Category.objects.create(name='Health')
+        self.education = Category.objects.create(name='Education')
+        for category, language, license_type in [
+            (self.health, 'en', 'cc-by'),
+            (self.health, 'fr', 'cc-by'),
+            (self.education, 'fr', 'cc0'),
+        ]:
+            Document.objects.create(
+                title=f'{category.name} report',
+                description='Annual report',
+                category=category,
+                uploaded_by=self.user,
+                language=language,
+                license=license_type,
+                tags='report',
+                status='approved'
+            )
+        Document.objects.create(
+            title='Pending report',
+            description='Annual report',
+            category=self.education,
+            uploaded_by=self.user,
+            status='pending'
+        )
+        self.url = reverse('document-facets')
+    
+    def test_facet_counts(self):
+        """Test counts cover approved documents only."""
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 3)
+        self.assertEqual(
+            [(row['slug'], row['count']) for row in response.data['categories']],
+            [('health', 2), ('education', 1)]
+        )
+        self.assertEqual(
+            {row['value']: row['count'] for row in response.data['languages']},
+            {'fr': 2, 'en': 1}
+        )
+        self.assertEqual(
+            {row['value']: row['count'] for row in response.data['licenses']},
+            {'cc-by': 2, 'cc0': 1}
+        )
+        self.assertEqual(response.data['tags'], [{'slug': 'report', 'name': 'report', 'count': 3}])
+    
+    def test_facets_apply_list_filters(self):
+        """Test facets accept the list endpoint filters."""
+        response = self.client.get(self.url, {'language': 'fr', 'q': 'report'})
+        
+        self.assertEqual(response.data['total'], 2)
+        self.assertEqual(
+            {row['slug']: row['count'] for row in response.data['categories']},
+            {'health': 1, 'education': 1}
+        )
+    
+    def test_facets_query_count(self):
+        """Test facets use a fixed number of queries and are cached."""
+        with self.assertNumQueries(4):
+            self.client.get(self.url, {'category': 'health'})
+        with self.assertNumQueries(0):
+            self.client.get(self.url, {'category': 'health'})
+    
+    def test_facets_follow_document_changes(self):
+        """Test cached facets are dropped when a document is approved."""
+        self.assertEqual(self.client.get(self.url).data['total'], 3)
+        
+        document = Document.objects.get(title='Pending report')
+        document.status = 'approved'
+        with self.captureOnCommitCallbacks(execute=True):
+            document.save()
+        self.assertEqual(self.client.get(self.url).data['total'], 4)
+
+
+class DocumentCursorPaginationTest(APITestCase):
+    """Test opt-in keyset pagination of the document list."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Test Category')
+        for index in range(25):
+            create_document(f'Document {index}', self.user, self.category)
+        # Force timestamp ties so the id tie-breaker is exercised.
+        Document.objects.filter(title__in=['Document 3', 'Document 4', 'Document 5']).update(
+            created_at=Document.objects.get(title='Document 4').created_at
+        )
+        self.url = reverse('document-list')
+    
+    def test_walk_all_pages(self):
+        """Test cursor pages cover every document once, newest first."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'pagination': 'cursor'})
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('OFFSET', queries[0]['sql'])
+        slugs = [doc['slug'] for doc in response.data['results']]
+        self.assertEqual(len(slugs), 20)
+        
+        # A document uploaded mid-walk does not shift the next page.
+        create_document('Late arrival', self.user, self.category)
+        response = self.client.get(response.data['next'])
+        self.assertIsNone(response.data['next'])
+        slugs += [doc['slug'] for doc in response.data['results']]
+        
+        expected = Document.objects.exclude(title='Late arrival').order_by('-created_at', '-id')
+        self.assertEqual(slugs, [doc.slug for doc in expected])
+    
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected."""
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CategoryCountTest(TestCase):
+    """Test Category.approved_count maintenance."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Health')
+        self.other = Category.objects.create(name='Education')
+        self.document = Document.objects.create(
+            title='Test Document',
+            description='Test description',
+            category=self.category,
+            uploaded_by=self.user
+        )
+    
+    def assertCounts(self, category_count, other_count):
+        self.category.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.category.document_count, category_count)
+        self.assertEqual(self.other.document_count, other_count)
+    
+    def test_counts_follow_status_and_category(self):
+        """Test counts change when documents enter, move or leave approved."""
+        self.assertCounts(0, 0)
+        
+        self.document.status = 'approved'
+        self.document.save()
+        self.assertCounts(1, 0)
+        
+        self.document.title = 'Edited'
+        self.document.save()
+        self.assertCounts(1, 0)
+        
+        document = Document.objects.get(pk=self.document.pk)
+        document.category = self.other
+        document.save()
+        self.assertCounts(0, 1)
+        
+        document.status = 'rejected'
+        document.save(update_fields=['status'])
+        self.assertCounts(0, 0)
+        
+        document.status = 'approved'
+        document.save()
+        document.delete()
+        self.assertCounts(0, 0)
+    
+    def test_stale_instances_count_once(self):
+        """Test counts follow the stored row, not values loaded before another save."""
+        first = Document.objects.get(pk=self.document.pk)
+        second = Document.objects.get(pk=self.document.pk)
+        
+        first.status = 'approved'
+        first.save()
+        second.status = 'approved'
+        second.save()
+        self.assertCounts(1, 0)
+        
+        first.status = 'rejected'
+        first.save()
+        second.delete()
+        self.assertCounts(0, 0)
+    
+    def test_recount_command(self):
+        """Test the repair command recomputes drifted counts."""
+        Document.objects.filter(pk=self.document.pk).update(status='approved')
+        Category.objects.filter(pk=self.other.pk).update(approved_count=5)
+        
+        call_command('recount_categories', stdout=StringIO())
+        self.assertCounts(1, 0)
+
+
+class DocumentCounterTest(APITestCase):
+    """Test buffered view and download counters."""
+    
+    def setUp(self):
+        """Set up test data."""
+        counter_buffer.discard()
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Health')
+        self.documents = [
+            Document.objects.create(
+                title=f'Document {index}',
+                description='Test description',
+                category=self.category,
+                uploaded_by=self.user,
+                status='approved'
+            )
+            for index in range(2)
+        ]
+    
+    def tearDown(self):
+        counter_buffer.discard()
+    
+    @override_settings(DOCUMENT_COUNTER_FLUSH_INTERVAL=3600)
+    def test_views_are_buffered_and_flushed_in_one_query(self):
+        """Test retrieves do not write, and a flush writes all counts at once."""
+        first, second = self.documents
+        url = reverse('document-detail', kwargs={'slug': first.slug})
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.data['view_count'], 1)
+        self.assertFalse([q for q in queries.captured_queries if q['sql'].startswith('UPDATE')])
+        
+        self.client.get(url)
+        second.increment_download_count()
+        self.assertEqual(counter_buffer.pending(first.pk, 'view_count'), 2)
+        
+        with self.assertNumQueries(1):
+            counter_buffer.flush()
+        
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.view_count, first.download_count), (2, 0))
+        self.assertEqual((second.view_count, second.download_count), (0, 1))
+        self.assertEqual(counter_buffer.pending(first.pk, 'view_count'), 0)
+    
+    @override_settings(DOCUMENT_COUNTER_FLUSH_INTERVAL=0)
+    def test_unbuffered_increments_write_immediately(self):
+        """Test a zero interval writes each increment with an F() update."""
+        document = self.documents[0]
+        stale = Document.objects.get(pk=document.pk)
+        
+        document.increment_view_count()
+        stale.increment_view_count()
+        
+        document.refresh_from_db()
+        self.assertEqual(document.view_count, 2)
+
+
+class DocumentDownloadTest(APITestCase):
+    """Test document downloads and signed download links."""
+    
+    def setUp(self):
+        """Set up test data."""
+        counter_buffer.discard()
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Health')
+        self.document = Document.objects.create(
+            title='Santé publique',
+            description='Test description',
+            category=self.category,
+            uploaded_by=self.user,
+            status='approved',
+            file=SimpleUploadedFile('test.pdf', b'%PDF-1.4 test', content_type='application/pdf')
+        )
+        self.url = reverse('document-download', kwargs={'slug': self.document.slug})
+    
+    def tearDown(self):
+        counter_buffer.discard()
+        self.document.file.delete(save=False)
+    
+    @override_settings(DOCUMENT_DOWNLOAD_BACKEND='django')
+    def test_download_streams_file(self):
+        """Test the django backend streams the file as an attachment."""
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 test')
+        self.assertIn("attachment; filename*=utf-8''Sant%C3%A9", response['Content-Disposition'])
+        self.assertEqual(counter_buffer.pending(self.document.pk, 'download_count'), 1)
+    
+    @override_settings(DOCUMENT_DOWNLOAD_BACKEND='nginx', DOCUMENT_DOWNLOAD_ACCEL_LOCATION='/protected-media/')
+    def test_download_hands_off_to_nginx(self):
+        """Test the nginx backend returns X-Accel-Redirect and no body."""
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.document.file.name)
+        self.assertEqual(response.content, b'')
+        
+        # Resumed transfers are not counted again
+        self.client.get(self.url, HTTP_RANGE='bytes=100-')
+        self.assertEqual(counter_buffer.pending(self.document.pk, 'download_count'), 1)
+    
+    def test_signed_link_grants_access_to_unapproved_document(self):
+        """Test a link issued to the owner works without authentication, unlike a plain request."""
+        Document.objects.filter(pk=self.document.pk).update(status='pending')
+        
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+        
+        from django.test import RequestFactory
+        request = RequestFactory().get('/')
+        request.user = self.user
+        response = self.client.get(signed_download_url(self.document, request, inline=True))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Disposition'].startswith('inline'))
+        self.assertEqual(counter_buffer.pending(self.document.pk, 'download_count'), 0)
+        
+        # Links issued to anyone else follow the public visibility rule.
+        response = self.client.get(signed_download_url(self.document, inline=True))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        
+        response = self.client.get(self.url, {'token': 'forged:token'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(DOCUMENT_DOWNLOAD_BACKEND='s3')
+class DocumentS3DownloadTest(APITestCase):
+    """Test presigned S3 redirects against moto."""
+    
+    def setUp(self):
+        """Set up test data."""
+        import boto3
+        from moto import mock_s3
+        from storages.backends.s3 import S3Storage
+        
+        self.s3 = mock_s3()
+        self.s3.start()
+        self.addCleanup(self.s3.stop)
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='isokodocs-test')
+        
+        file_field = Document._meta.get_field('file')
+        self.addCleanup(setattr, file_field, 'storage', file_field.storage)
+        file_field.storage = S3Storage(
+            bucket_name='isokodocs-test',
+            access_key='testing',
+            secret_key='testing',
+            region_name='us-east-1',
+            custom_domain='isokodocs-test.s3.amazonaws.com'
+        )
+        
+        counter_buffer.discard()
+        self.addCleanup(counter_buffer.discard)
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.document = Document.objects.create(
+            title='Rapport annuel',
+            description='Test description',
+            category=Category.objects.create(name='Health'),
+            uploaded_by=self.user,
+            status='approved',
+            file=SimpleUploadedFile('test.pdf', b'%PDF-1.4 s3', content_type='application/pdf')
+        )
+    
+    def test_download_redirects_to_presigned_url(self):
+        """Test downloads redirect to a signed URL serving the file with its filename."""
+        import requests
+        from urllib.parse import parse_qs, urlparse
+        
+        response = self.client.get(reverse('document-download', kwargs={'slug': self.document.slug}))
+        
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertIn('Signature=', response['Location'])
+        self.assertEqual(counter_buffer.pending(self.document.pk, 'download_count'), 1)
+        
+        params = parse_qs(urlparse(response['Location']).query)
+        self.assertEqual(params['response-content-disposition'], ['attachment; filename="Rapport annuel.pdf"'])
+        self.assertEqual(requests.get(response['Location']).content, b'%PDF-1.4 s3')
+    
+    def test_unapproved_document_is_not_redirected(self):
+        """Test approval is still enforced before presigning."""
+        Document.objects.filter(pk=self.document.pk).update(status='pending')
+        
+        response = self.client.get(reverse('document-download', kwargs={'slug': self.document.slug}))
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ConditionalGetTest(APITestCase):
+    """Test ETag/Last-Modified validation of document and category responses."""
+    
+    def setUp(self):
+        """Set up test data."""
+        counter_buffer.discard()
+        self.addCleanup(counter_buffer.discard)
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Health')
+        self.document = Document.objects.create(
+            title='Test Document',
+            description='Test description',
+            category=self.category,
+            uploaded_by=self.user,
+            status='approved'
+        )
+    
+    def test_list_revalidation_runs_no_queries(self):
+        """Test a matching If-None-Match gets a 304 without querying, until a document changes."""
+        url = reverse('document-list')
+        etag = self.client.get(url)['ETag']
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        self.assertNotEqual(self.client.get(url + '?language=fr')['ETag'], etag)
+        
+        self.document.title = 'Edited'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.document.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_versions_change_on_commit(self):
+        """Test ETags keep matching until the change commits."""
+        url = reverse('document-list')
+        etag = self.client.get(url)['ETag']
+        
+        self.document.title = 'Edited'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.document.save()
+            # Still in the transaction: other requests read the old rows.
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    @override_settings(DOCUMENT_COUNTER_FLUSH_INTERVAL=3600)
+    def test_detail_revalidation_is_not_counted(self):
+        """Test 304 detail responses do not count as views."""
+        url = reverse('document-detail', kwargs={'slug': self.document.slug})
+        first = self.client.get(url)
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(counter_buffer.pending(self.document.pk, 'view_count'), 1)
+    
+    def test_detail_etag_follows_link_period(self):
+        """Test detail ETags change with the signing period of their download links."""
+        from unittest import mock
+        
+        cache.clear()
+        url = reverse('document-detail', kwargs={'slug': self.document.slug})
+        with mock.patch('djangoapp.documents.views.link_period', return_value=1):
+            etag = self.client.get(url)['ETag']
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        with mock.patch('djangoapp.documents.views.link_period', return_value=2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_category_etag_follows_documents(self):
+        """Test category ETags change when document counts can change."""
+        url = reverse('category-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+        
+        self.document.status = 'rejected'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.document.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+
+class AnonymousResponseCacheTest(APITestCase):
+    """Test the versioned response cache for anonymous users."""
+    
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        counter_buffer.discard()
+        self.addCleanup(counter_buffer.discard)
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Health')
+        self.document = Document.objects.create(
+            title='Test Document',
+            description='Test description',
+            category=self.category,
+            uploaded_by=self.user,
+            status='approved'
+        )
+    
+    @override_settings(API_CACHE_ALLOW_LOCAL=False)
+    def test_process_local_cache_is_not_trusted(self):
+        """Test responses are neither validated nor cached without a shared cache."""
+        url = reverse('document-list')
+        response = self.client.get(url)
+        self.assertNotIn('ETag', response)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertTrue(queries)
+        self.assertEqual(response.data['count'], 1)
+    
+    def test_list_is_cached_until_a_document_changes(self):
+        """Test anonymous lists are served from the cache and invalidated by moderation."""
+        url = reverse('document-list')
+        pending = Document.objects.create(
+            title='Pending Document',
+            description='Test description',
+            category=self.category,
+            uploaded_by=self.user
+        )
+        self.assertEqual(self.client.get(url + '?language=en&ordering=title').data['count'], 1)
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(url + '?ordering=title&language=en')
+        self.assertEqual(response.data['count'], 1)
+        
+        pending.status = 'approved'
+        with self.captureOnCommitCallbacks(execute=True):
+            pending.save()
+        self.assertEqual(self.client.get(url + '?language=en&ordering=title').data['count'], 2)
+    
+    def test_cached_detail_still_counts_views(self):
+        """Test a detail served from the cache counts a view."""
+        url = reverse('document-detail', kwargs={'slug': self.document.slug})
+        self.client.get(url)
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        
+        self.assertEqual(response.data['title'], 'Test Document')
+        self.assertEqual(counter_buffer.pending(self.document.pk, 'view_count'), 2)
+    
+    def test_authenticated_responses_are_not_cached(self):
+        """Test authenticated users bypass the response cache."""
+        url = reverse('document-list')
+        self.client.get(url)
+        self.client.force_authenticate(user=self.user)
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertTrue(queries.captured_queries)
+    
+    def test_concurrent_miss_waits_for_the_computing_request(self):
+        """Test a miss while another request holds the lock waits for its result."""
+        from unittest import mock
+        from djangoapp.core.cache import get_or_compute
+        
+        cache.add('stampede:lock', 1)
+        compute = mock.Mock(return_value='recomputed')
+        
+        def other_request_finishes(seconds):
+            cache.set('stampede', 'computed by the lock holder')
+        
+        with mock.patch('djangoapp.core.cache.time.sleep', side_effect=other_request_finishes):
+            value = get_or_compute('stampede', compute, timeout=60)
+        
+        self.assertEqual(value, 'computed by the lock holder')
+        compute.assert_not_called()
+
+
+class DocumentSlugTest(TestCase):
+    """Test slug allocation."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Health')
+    
+    def test_duplicate_titles_get_next_suffix_in_one_query(self):
+        """Test duplicates get the lowest free suffix, found with a single query."""
+        slugs = [create_document('Rapport annuel', self.user, self.category).slug for _ in range(3)]
+        create_document('Rapport annuel 2024', self.user, self.category)
+        create_document('Rapport annuel 4', self.user, self.category)
+        create_document('Rapport annuel synthèse', self.user, self.category)
+        
+        self.assertEqual(slugs, ['rapport-annuel', 'rapport-annuel-1', 'rapport-annuel-2'])
+        with self.assertNumQueries(1):
+            self.assertEqual(Document.allocate_slug('Rapport annuel'), 'rapport-annuel-3')
+        create_document('Rapport annuel', self.user, self.category)
+        self.assertEqual(Document.allocate_slug('Rapport annuel'), 'rapport-annuel-5')
+        
+        Document.objects.filter(slug='rapport-annuel-1').delete()
+        self.assertEqual(Document.allocate_slug('Rapport annuel'), 'rapport-annuel-1')
+        self.assertEqual(Document.allocate_slug('???'), 'document')
+    
+    def test_slug_taken_concurrently_is_reallocated(self):
+        """Test a unique constraint violation on the slug retries with a new one."""
+        from unittest import mock
+        
+        create_document('Rapport annuel', self.user, self.category)
+        with mock.patch.object(
+            Document, 'allocate_slug', side_effect=['rapport-annuel', 'rapport-annuel-1']
+        ):
+            document = create_document('Rapport annuel', self.user, self.category)
+        
+        self.assertEqual(document.slug, 'rapport-annuel-1')
+
+
+class FileMetadataTest(TestCase):
+    """Test file metadata captured at upload."""
+    
+    PDF = b'%PDF-1.4\n1 0 obj << /Type /Pages /Kids [2 0 R 3 0 R] /Count 2 >> endobj\n' \
+          b'2 0 obj << /Type /Page /Parent 1 0 R >> endobj\n3 0 obj << /Type/Page >> endobj\n%%EOF'
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.document = Document.objects.create(
+            title='Test Document',
+            description='Test description',
+            category=Category.objects.create(name='Health'),
+            uploaded_by=self.user,
+            file=SimpleUploadedFile('test.pdf', self.PDF, content_type='application/pdf')
+        )
+        self.addCleanup(self.document.file.delete, save=False)
+    
+    def test_metadata_is_read_from_the_upload(self):
+        """Test size, hash and page count are recorded when the file is uploaded."""
+        import hashlib
+        
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.file_size, len(self.PDF))
+        self.assertEqual(self.document.content_hash, hashlib.sha256(self.PDF).hexdigest())
+        self.assertEqual(self.document.page_count, 2)
+    
+    def test_page_count_spans_chunks(self):
+        """Test page objects split across chunk boundaries are counted once."""
+        from .uploads import inspect_chunks
+        
+        for size in (1, 7, 50):
+            chunks = [self.PDF[i:i + size] for i in range(0, len(self.PDF), size)]
+            self.assertEqual(inspect_chunks(chunks).page_count, 2)
+    
+    def test_later_saves_do_not_touch_storage(self):
+        """Test saves that keep the file do no storage I/O."""
+        from unittest import mock
+        from django.core.files.storage import FileSystemStorage
+        
+        document = Document.objects.get(pk=self.document.pk)
+        document.status = 'approved'
+        with mock.patch.object(FileSystemStorage, 'size') as size, \
+                mock.patch.object(FileSystemStorage, 'open') as open_file:
+            document.save()
+        
+        size.assert_not_called()
+        open_file.assert_not_called()
+
+
+class DocumentDeduplicationTest(APITestCase):
+    """Test uploads are content-addressed and duplicates are refused."""
+    
+    PDF = b'%PDF-1.4 /Type /Page official gazette'
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Health')
+        self.document = Document.objects.create(
+            title='Official Gazette',
+            description='Test description',
+            category=self.category,
+            uploaded_by=self.user,
+            status='approved',
+            file=SimpleUploadedFile('gazette.pdf', self.PDF, content_type='application/pdf')
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def upload(self, title):
+        return self.client.post(reverse('document-list'), {
+            'title': title,
+            'description': 'Same bytes again',
+            'category_id': self.category.id,
+            'language': 'en',
+            'license': 'cc-by',
+            'file': SimpleUploadedFile('copy.pdf', self.PDF, content_type='application/pdf'),
+        }, format='multipart')
+    
+    def test_file_is_content_addressed(self):
+        """Test files are stored under their SHA-256."""
+        content_hash = self.document.content_hash
+        self.assertEqual(self.document.file.name, f'documents/{content_hash[:2]}/{content_hash}.pdf')
+    
+    def test_duplicate_upload_reports_existing_document(self):
+        """Test uploading archived bytes points at the existing document."""
+        response = self.upload('Gazette, again')
+        
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['slug'], self.document.slug)
+        self.assertEqual(Document.objects.count(), 1)
+    
+    def test_reupload_after_rejection_shares_stored_file(self):
+        """Test a new document with the bytes of a rejected one reuses its file."""
+        self.document.status = 'rejected'
+        self.document.save()
+        
+        response = self.upload('Gazette, resubmitted')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        document = Document.objects.get(title='Gazette, resubmitted')
+        self.assertEqual(document.file.name, self.document.file.name)
+        self.assertEqual(document.file_size, len(self.PDF))
+    
+    def test_upload_is_read_once(self):
+        """Test validating and saving an upload hash its stream in one pass."""
+        from unittest import mock
+        from . import uploads
+        
+        self.document.delete()
+        with mock.patch.object(uploads, 'inspect_chunks', wraps=uploads.inspect_chunks) as inspect:
+            response = self.upload('Gazette, first copy')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(inspect.call_count, 1)
+        document = Document.objects.get(title='Gazette, first copy')
+        self.addCleanup(document.file.delete, save=False)
+        self.assertEqual(
+            (document.file_size, document.content_hash, document.page_count),
+            tuple(uploads.inspect_chunks([self.PDF]))
+        )
+
+
+class ResumableUploadTest(APITestCase):
+    """Test the resumable upload API."""
+    
+    PDF = b'%PDF-1.4\n' + b'x' * 1000 + b'\n%%EOF'
+    
+    def setUp(self):
+        """Set up test data."""
+        import shutil
+        import tempfile
+        
+        upload_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, upload_dir, ignore_errors=True)
+        settings_override = override_settings(UPLOAD_SESSION_DIR=upload_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Health')
+        self.client.force_authenticate(user=self.user)
+    
+    def start(self, content):
+        response = self.client.post(
+            reverse('upload-list'), {'filename': 'rapport.pdf', 'length': len(content)}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response['Location']
+    
+    def send(self, url, offset, chunk):
+        return self.client.generic(
+            'PATCH', url, chunk,
+            content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset)
+        )
+    
+    def test_upload_resumes_and_finalizes_into_pending_document(self):
+        """Test chunks are appended at offsets and finalized into a document."""
+        from unittest import mock
+        from . import uploads
+        
+        url = self.start(self.PDF)
+        
+        self.assertEqual(self.send(url, 0, self.PDF[:400]).status_code, status.HTTP_204_NO_CONTENT)
+        # Connection dropped: ask where to resume
+        self.assertEqual(self.client.head(url)['Upload-Offset'], '400')
+        self.assertEqual(self.send(url, 0, self.PDF[:400]).status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.client.post(url + 'finalize/').status_code, status.HTTP_409_CONFLICT)
+        
+        response = self.send(url, 400, self.PDF[400:])
+        self.assertEqual(response['Upload-Offset'], str(len(self.PDF)))
+        
+        with mock.patch.object(uploads, 'inspect_chunks', wraps=uploads.inspect_chunks) as inspect:
+            response = self.client.post(url + 'finalize/', {
+                'title': 'Rapport',
+                'description': 'Test description',
+                'category_id': self.category.pk,
+                'language': 'fr',
+                'license': 'cc-by'
+            }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(inspect.call_count, 1)
+        document = Document.objects.get(slug=response.data['slug'])
+        self.addCleanup(document.file.delete, save=False)
+        self.assertEqual(document.status, 'pending')
+        self.assertEqual(document.file.read(), self.PDF)
+        self.assertFalse(UploadSession.objects.exists())
+    
+    def test_concurrent_chunk_is_rejected_before_writing(self):
+        """Test a chunk sent while another one is being written leaves the part file alone."""
+        import fcntl
+        
+        url = self.start(self.PDF)
+        self.send(url, 0, self.PDF[:400])
+        session = UploadSession.objects.get()
+        
+        with open(session.part_path, 'rb') as part:
+            fcntl.flock(part, fcntl.LOCK_EX)
+            response = self.send(url, 400, b'y' * 600)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response['Upload-Offset'], '400')
+        with open(session.part_path, 'rb') as part:
+            self.assertEqual(part.read(), self.PDF[:400])
+        
+        self.assertEqual(self.send(url, 400, self.PDF[400:]).status_code, status.HTTP_204_NO_CONTENT)
+    
+    def test_finalize_rejects_non_pdf(self):
+        """Test finalizing checks the file's magic bytes."""
+        content = b'GIF89a not a pdf'
+        url = self.start(content)
+        self.send(url, 0, content)
+        
+        response = self.client.post(url + 'finalize/', {'title': 'Image'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_cleanup_removes_stale_sessions(self):
+        """Test the cleanup command deletes inactive sessions and their part files."""
+        import os
+        
+        url = self.start(self.PDF)
+        self.send(url, 0, self.PDF[:10])
+        session = UploadSession.objects.get()
+        
+        call_command('cleanup_upload_sessions', stdout=StringIO())
+        self.assertTrue(UploadSession.objects.exists())
+        
+        call_command('cleanup_upload_sessions', '--max-age=-1', stdout=StringIO())
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(os.path.exists(session.part_path))
+
+
+class DirectUploadTest(APITestCase):
+    """Test direct-to-S3 uploads against moto."""
+    
+    def setUp(self):
+        """Set up test data."""
+        import boto3
+        from moto import mock_s3
+        from storages.backends.s3 import S3Storage
+        
+        self.s3 = mock_s3()
+        self.s3.start()
+        self.addCleanup(self.s3.stop)
+        self.bucket = boto3.client('s3', region_name='us-east-1')
+        self.bucket.create_bucket(Bucket='isokodocs-test')
+        
+        file_field = Document._meta.get_field('file')
+        self.addCleanup(setattr, file_field, 'storage', file_field.storage)
+        file_field.storage = self.storage = S3Storage(
+            bucket_name='isokodocs-test',
+            access_key='testing',
+            secret_key='testing',
+            region_name='us-east-1',
+            location='media'
+        )
+        
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Health')
+        self.client.force_authenticate(user=self.user)
+    
+    def upload(self, content):
+        """Sign a presigned POST and send the file with it, as a browser would."""
+        import requests
+        
+        response = self.client.post(reverse('upload-direct'))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        upload = requests.post(
+            response.data['url'],
+            data=response.data['fields'],
+            files={'file': ('report.pdf', content)}
+        )
+        self.assertEqual(upload.status_code, 204)
+        return response.data['key']
+    
+    def finalize(self, key):
+        return self.client.post(reverse('upload-finalize-direct'), {
+            'key': key,
+            'title': 'Rapport annuel',
+            'description': 'Test description',
+            'category_id': self.category.id,
+            'language': 'fr',
+            'license': 'cc-by',
+        })
+    
+    def test_presigned_post_policy(self):
+        """Test the policy pins the content type and the size limit."""
+        import base64
+        import json
+        
+        response = self.client.post(reverse('upload-direct'))
+        
+        self.assertTrue(response.data['key'].startswith(f'uploads/{self.user.pk}/'))
+        self.assertEqual(response.data['fields']['key'], f'media/{response.data["key"]}')
+        policy = json.loads(base64.b64decode(response.data['fields']['policy']))
+        self.assertIn({'Content-Type': 'application/pdf'}, policy['conditions'])
+        self.assertIn(['content-length-range', 1, 52428800], policy['conditions'])
+    
+    def test_finalize_creates_pending_document(self):
+        """Test finalizing moves the staged file and records its metadata."""
+        import hashlib
+        
+        key = self.upload(b'%PDF-1.4 /Type /Page direct')
+        
+        response = self.finalize(key)
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        document = Document.objects.get(slug=response.data['slug'])
+        self.assertEqual(document.status, 'pending')
+        self.assertEqual(
+            document.file.name, f'documents/{document.content_hash[:2]}/{document.content_hash}.pdf'
+        )
+        self.assertEqual(document.file_size, 27)
+        # Counted by text extraction, which reads the file in a worker.
+        self.assertIsNone(document.page_count)
+        self.assertEqual(
+            document.content_hash, hashlib.sha256(b'%PDF-1.4 /Type /Page direct').hexdigest()
+        )
+        self.assertEqual(document.file.read(), b'%PDF-1.4 /Type /Page direct')
+        self.assertFalse(self.storage.exists(key))
+    
+    def test_finalize_reads_only_the_signature(self):
+        """Test finalizing downloads the first bytes of the file, not all of it."""
+        from unittest import mock
+        
+        key = self.upload(b'%PDF-1.4 ' + b'x' * 4096)
+        client = self.storage.bucket.meta.client
+        with mock.patch.object(client, 'get_object', wraps=client.get_object) as get_object:
+            response = self.finalize(key)
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(get_object.call_count, 1)
+        self.assertEqual(get_object.call_args.kwargs['Range'], 'bytes=0-1023')
+    
+    def test_finalize_rejects_non_pdf(self):
+        """Test a staged file without the PDF signature is refused."""
+        key = self.upload(b'<html>not a pdf</html>')
+        
+        response = self.finalize(key)
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('key', response.data)
+        self.assertFalse(Document.objects.exists())
+    
+    def test_finalize_rejects_other_users_upload(self):
+        """Test a key signed for another user cannot be finalized."""
+        other = get_user_model().objects.create_user(
+            username='other', email='other@example.com', password='testpass123'
+        )
+        key = self.upload(b'%PDF-1.4 direct')
+        self.client.force_authenticate(user=other)
+        
+        response = self.finalize(key)
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(self.storage.exists(key))
+    
+    def test_direct_upload_requires_s3(self):
+        """Test direct uploads are refused on local storage."""
+        from django.core.files.storage import FileSystemStorage
+        
+        Document._meta.get_field('file').storage = FileSystemStorage()
+        
+        response = self.client.post(reverse('upload-direct'))
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_finalize_duplicate_reports_existing_document(self):
+        """Test finalizing archived bytes drops the staged copy and points at the document."""
+        existing = self.finalize(self.upload(b'%PDF-1.4 direct')).data['slug']
+        key = self.upload(b'%PDF-1.4 direct')
+        
+        response = self.finalize(key)
+        
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['slug'], existing)
+        self.assertFalse(self.storage.exists(key))
+
+
+def create_document(title, user, category, status='approved', tags='', content=None):
+    """Create a document; ``content`` gives it a PDF file with these bytes."""
+    fields = {}
+    if content is not None:
+        fields['file'] = SimpleUploadedFile('test.pdf', content, content_type='application/pdf')
+    return Document.objects.create(
+        title=title,
+        description='Test description',
+        category=category,
+        uploaded_by=user,
+        status=status,
+        tags=tags,
+        **fields
+    )
+
+
+def fake_render_pages(source, directory):
+    """Stand in for pdftoppm: write one thumbnail and two pages."""
+    import os
+    
+    paths = []
+    for name in ('thumbnail.jpg', 'page-1.jpg', 'page-2.jpg'):
+        path = os.path.join(directory, name)
+        with open(path, 'wb') as image:
+            image.write(b'\xff\xd8 ' + name.encode())
+        paths.append(path)
+    return paths[0], paths[1:]
+
+
+class DocumentPreviewTest(APITestCase):
+    """Test thumbnail and preview rendering."""
+    
+    PDF = b'%PDF-1.4 preview'
+    
+    def setUp(self):
+        """Set up test data."""
+        from unittest import mock
+        
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Health')
+        self.document = create_document('Rapport annuel', self.user, self.category, content=self.PDF)
+        self.render_pages = mock.patch(
+            'djangoapp.documents.previews.render_pages', side_effect=fake_render_pages
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+        self.addCleanup(counter_buffer.discard)
+    
+    def test_upload_queues_rendering_job(self):
+        """Test a new file queues a rendering job, other saves do not."""
+        from djangoapp.jobs.models import Job
+        
+        jobs = Job.objects.filter(name='documents.render_previews')
+        document = create_document('Another report', self.user, self.category, content=self.PDF)
+        self.assertEqual(
+            list(jobs.order_by('pk').values_list('args', flat=True)),
+            [{'document_id': self.document.pk}, {'document_id': document.pk}]
+        )
+        
+        self.document.title = 'Renamed'
+        self.document.save()
+        self.assertEqual(jobs.count(), 2)
+        
+        call_command('run_worker', once=True, stdout=StringIO())
+        self.assertFalse(Job.objects.exists())
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.preview_pages, 2)
+    
+    def test_generate_previews_stores_assets_by_content_hash(self):
+        """Test previews are stored under the hash and shared by identical files."""
+        from django.core.files.storage import default_storage
+        from .previews import generate_previews, page_name, thumbnail_name
+        
+        duplicate = create_document('Same file', self.user, self.category, status='rejected', content=self.PDF)
+        
+        self.assertEqual(generate_previews(self.document.pk), 2)
+        
+        content_hash = self.document.content_hash
+        self.assertTrue(default_storage.exists(thumbnail_name(content_hash)))
+        self.assertTrue(default_storage.exists(page_name(content_hash, 2)))
+        duplicate.refresh_from_db()
+        self.assertEqual(duplicate.preview_pages, 2)
+        
+        self.assertEqual(generate_previews(duplicate.pk), 2)
+        self.assertEqual(self.render_pages.call_count, 1)
+    
+    def test_rendering_changes_the_detail_etag(self):
+        """Test a client revalidating a document's details sees its new previews."""
+        from .previews import generate_previews
+        
+        url = reverse('document-detail', kwargs={'slug': self.document.slug})
+        response = self.client.get(url)
+        self.assertEqual(response.data['preview_urls'], [])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_previews(self.document.pk)
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['preview_urls']), 2)
+    
+    def test_failed_rendering_leaves_no_previews(self):
+        """Test a PDF pdftoppm cannot render keeps the document without previews."""
+        from .previews import PreviewError, generate_previews
+        
+        self.render_pages.side_effect = PreviewError('broken')
+        
+        with self.assertLogs('djangoapp.documents.previews', 'ERROR'):
+            self.assertEqual(generate_previews(self.document.pk), 0)
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.preview_pages, 0)
+    
+    def test_thumbnail_url_in_list(self):
+        """Test lists expose the thumbnail once rendered."""
+        url = reverse('document-list')
+        self.assertIsNone(self.client.get(url).data['results'][0]['thumbnail_url'])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('render_previews', workers=0, stdout=StringIO())
+        
+        content_hash = self.document.content_hash
+        response = self.client.get(url)
+        self.assertTrue(response.data['results'][0]['thumbnail_url'].endswith(
+            f'/media/previews/{content_hash[:2]}/{content_hash}/thumbnail.jpg'
+        ))
+        response = self.client.get(reverse('document-detail', kwargs={'slug': self.document.slug}))
+        self.assertEqual(len(response.data['preview_urls']), 2)
+
+
+class DocumentTextTest(APITestCase):
+    """Test PDF text extraction and search over it."""
+    
+    def setUp(self):
+        """Set up test data."""
+        import subprocess
+        from unittest import mock
+        
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Health')
+        self.document = Document.objects.create(
+            title='Rapport annuel',
+            description='Test description',
+            category=self.category,
+            uploaded_by=self.user,
+            status='approved',
+            file=SimpleUploadedFile('test.pdf', b'%PDF-1.4 text', content_type='application/pdf')
+        )
+        self.pdftotext = mock.patch(
+            'djangoapp.documents.extraction.subprocess.run',
+            return_value=subprocess.CompletedProcess(
+                [], 0, stdout=b'Vaccination  campaign\nresults\f\fAnnex\f'
+            )
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+        self.addCleanup(counter_buffer.discard)
+    
+    def search(self, query):
+        response = self.client.get(reverse('document-list'), {'q': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [doc['slug'] for doc in response.data['results']]
+    
+    def test_upload_queues_extraction_job(self):
+        """Test a new file queues a text extraction job."""
+        from djangoapp.jobs.models import Job
+        from djangoapp.jobs.queue import run_job
+        
+        job = Job.objects.get(name='documents.extract_text')
+        self.assertEqual(job.args, {'document_id': self.document.pk})
+        self.assertTrue(run_job(job))
+        self.assertEqual(self.document.text.text, 'Vaccination campaign results Annex')
+    
+    def test_search_matches_file_text(self):
+        """Test ?q= finds documents by the text of their PDF."""
+        from .extraction import store_document_text
+        
+        self.assertEqual(self.search('vaccination'), [])
+        # An incrementally updated file: the upload estimate counted old page revisions.
+        Document.objects.filter(pk=self.document.pk).update(page_count=5)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(store_document_text(self.document.pk))
+        self.assertEqual(self.search('vaccination'), [self.document.slug])
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.page_count, 3)
+    
+    def test_identical_files_are_extracted_once(self):
+        """Test text is reused for documents with the same file."""
+        from .extraction import store_document_text
+        
+        duplicate = Document.objects.create(
+            title='Copie',
+            description='Test description',
+            category=self.category,
+            uploaded_by=self.user,
+            status='approved',
+            file=SimpleUploadedFile('copy.pdf', b'%PDF-1.4 text', content_type='application/pdf')
+        )
+        store_document_text(self.document.pk)
+        store_document_text(duplicate.pk)
+        
+        self.assertEqual(self.pdftotext.call_count, 1)
+        self.assertCountEqual(self.search('annex'), [self.document.slug, duplicate.slug])
+    
+    def test_failed_extraction_is_recorded(self):
+        """Test a PDF pdftotext cannot read is recorded without text."""
+        import subprocess
+        from .extraction import store_document_text
+        
+        self.pdftotext.side_effect = subprocess.CalledProcessError(1, 'pdftotext')
+        with self.assertLogs('djangoapp.documents.extraction', 'WARNING'):
+            self.assertFalse(store_document_text(self.document.pk))
+        
+        self.assertEqual(self.document.text.text, '')
+        self.assertIn('pdftotext failed', self.document.text.error)
+        self.assertEqual(self.search('vaccination'), [])
+    
+    def test_pdftotext_timeout_raises_extraction_error(self):
+        """Test a stalled pdftotext is stopped and reported as an extraction error."""
+        import subprocess
+        from .extraction import ExtractionError, run_pdftotext
+        
+        self.pdftotext.side_effect = subprocess.TimeoutExpired('pdftotext', 120)
+        with self.assertRaises(ExtractionError):
+            run_pdftotext('test.pdf')
+        self.assertEqual(self.pdftotext.call_args.kwargs['timeout'], 120)
+    
+    @override_settings(DOCUMENT_TEXT_MEMORY_LIMIT=64)
+    def test_tools_run_under_prlimit(self):
+        """Test the memory limit is set by prlimit, not in the forked child."""
+        from .extraction import run_pdftotext
+        
+        run_pdftotext('test.pdf')
+        args = self.pdftotext.call_args.args[0]
+        self.assertEqual(args[:4], ['prlimit', f'--as={64 * 1024 * 1024}', '--', 'pdftotext'])
+        self.assertNotIn('preexec_fn', self.pdftotext.call_args.kwargs)
+        
+        with override_settings(DOCUMENT_TEXT_MEMORY_LIMIT=0):
+            run_pdftotext('test.pdf')
+        self.assertEqual(self.pdftotext.call_args.args[0][0], 'pdftotext')
+    
+    def test_command_extracts_missing_and_stale_text(self):
+        """Test the command extracts documents without text for their current file."""
+        from .models import DocumentText
+        
+        call_command('extract_text', workers=0, stdout=StringIO())
+        self.assertEqual(self.pdftotext.call_count, 1)
+        
+        call_command('extract_text', workers=0, stdout=StringIO())
+        self.assertEqual(self.pdftotext.call_count, 1)
+        
+        DocumentText.objects.update(content_hash='stale')
+        call_command('extract_text', workers=0, stdout=StringIO())
+        self.assertEqual(self.pdftotext.call_count, 2)
+    
+    @staticmethod
+    def tool_args(args):
+        """The tool command, without the prlimit wrapper."""
+        return args[args.index('--') + 1:] if '--' in args else args
+    
+    def fake_tools(self, args, **kwargs):
+        """Stand in for pdftotext, pdftoppm and tesseract."""
+        import subprocess
+        
+        args = self.tool_args(args)
+        if args[0] == 'pdftoppm':
+            with open(f'{args[-1]}.png', 'wb') as image:
+                image.write(b'\x89PNG')
+            stdout = b''
+        elif args[0] == 'tesseract':
+            number = args[1].rsplit('-', 1)[1].split('.')[0]
+            stdout = f'Recensement page {number}\n'.encode()
+        else:
+            stdout = b'Vaccination  campaign\nresults\f\fAnnex\f'
+        return subprocess.CompletedProcess(args, 0, stdout=stdout)
+    
+    def tesseract_calls(self):
+        calls = [self.tool_args(call.args[0]) for call in self.pdftotext.call_args_list]
+        return [args for args in calls if args[0] == 'tesseract']
+    
+    def test_scanned_pages_are_read_by_ocr(self):
+        """Test pages without a text layer are OCRed into the searchable text."""
+        from djangoapp.jobs.models import Job
+        from .extraction import store_document_text
+        from .ocr import ocr_document_text
+        
+        self.pdftotext.side_effect = self.fake_tools
+        store_document_text(self.document.pk)
+        self.assertTrue(
+            Job.objects.filter(name='documents.ocr_text', args={'document_id': self.document.pk}).exists()
+        )
+        self.assertEqual(self.search('recensement'), [])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(ocr_document_text(self.document.pk), 2)
+        
+        self.document.text.refresh_from_db()
+        self.assertEqual(
+            self.document.text.text, 'Vaccination campaign results Recensement page 2 Recensement page 3'
+        )
+        self.assertEqual(self.document.text.ocr_pages, 2)
+        self.assertEqual(self.tesseract_calls()[0][3:], ['-l', 'fra+eng'])
+        self.assertEqual(self.search('recensement'), [self.document.slug])
+    
+    def test_ocr_results_are_cached_by_content_hash(self):
+        """Test re-runs and duplicate files reuse the OCR of each page."""
+        from .extraction import store_document_text
+        from .models import OcrPage
+        from .ocr import ocr_document_text
+        
+        self.pdftotext.side_effect = self.fake_tools
+        duplicate = Document.objects.create(
+            title='Copie',
+            description='Test description',
+            category=self.category,
+            uploaded_by=self.user,
+            status='approved',
+            file=SimpleUploadedFile('copy.pdf', b'%PDF-1.4 text', content_type='application/pdf')
+        )
+        store_document_text(self.document.pk)
+        store_document_text(duplicate.pk)
+        
+        ocr_document_text(self.document.pk)
+        self.assertEqual(len(self.tesseract_calls()), 2)
+        self.assertEqual(OcrPage.objects.filter(content_hash=self.document.content_hash).count(), 2)
+        self.assertCountEqual(self.search('recensement'), [self.document.slug, duplicate.slug])
+        
+        self.assertEqual(ocr_document_text(duplicate.pk), 2)
+        call_command('extract_text', workers=0, ocr=True, stdout=StringIO())
+        self.assertEqual(len(self.tesseract_calls()), 2)
+    
+    def test_ocr_can_be_disabled(self):
+        """Test no OCR job is queued without OCR languages."""
+        from djangoapp.jobs.models import Job
+        from .extraction import store_document_text
+        
+        self.pdftotext.side_effect = self.fake_tools
+        with override_settings(DOCUMENT_OCR_LANGUAGES=''):
+            store_document_text(self.document.pk)
+        self.assertFalse(Job.objects.filter(name='documents.ocr_text').exists())
+
+
+class BulkModerationTest(APITestCase):
+    """Test approving and rejecting many documents at once."""
+    
+    def setUp(self):
+        """Set up test data."""
+        from django.contrib.auth.models import Group
+        
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.moderator = get_user_model().objects.create_user(
+            username='moderator',
+            email='mod@example.com',
+            password='modpass123'
+        )
+        moderators_group, _ = Group.objects.get_or_create(name='moderators')
+        self.moderator.groups.add(moderators_group)
+        self.category = Category.objects.create(name='Health')
+        self.other = Category.objects.create(name='Education')
+        self.pending = [
+            create_document(f'Rapport {number}', self.user, self.category, status='pending')
+            for number in range(3)
+        ]
+        self.approved = create_document('Budget', self.user, self.other)
+        self.url = reverse('document-bulk-moderate')
+    
+    def assertCounts(self, category_count, other_count):
+        self.category.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.category.approved_count, category_count)
+        self.assertEqual(self.other.approved_count, other_count)
+    
+    def test_approve_by_id_and_slug(self):
+        """Test documents named by id or slug are approved with one UPDATE."""
+        first, second, third = self.pending
+        list_url = reverse('document-list')
+        self.assertEqual(self.client.get(list_url, {'category': self.category.slug}).data['results'], [])
+        
+        self.client.force_authenticate(user=self.moderator)
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {
+                'action': 'approve',
+                'documents': [first.pk, second.slug, 'missing', 999999],
+            }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(response.data['results'], [
+            {'id': first.pk, 'slug': first.slug, 'status': 'approved'},
+            {'id': second.pk, 'slug': second.slug, 'status': 'approved'},
+        ])
+        self.assertEqual(response.data['not_found'], ['missing', 999999])
+        self.assertEqual(
+            len([query for query in queries if query['sql'].startswith('UPDATE "documents"')]), 1
+        )
+        
+        first.refresh_from_db()
+        self.assertEqual(first.status, 'approved')
+        self.assertEqual(first.reviewed_by, self.moderator)
+        third.refresh_from_db()
+        self.assertEqual(third.status, 'pending')
+        self.assertCounts(2, 1)
+        
+        # Cached anonymous lists are invalidated.
+        self.client.force_authenticate(user=None)
+        response = self.client.get(list_url, {'category': self.category.slug})
+        self.assertEqual(len(response.data['results']), 2)
+    
+    def test_reject_requires_reason_and_updates_counts(self):
+        """Test rejections need a reason and leave the approved counts."""
+        self.client.force_authenticate(user=self.moderator)
+        documents = [self.pending[0].pk, self.approved.pk]
+        
+        response = self.client.post(self.url, {'action': 'reject', 'documents': documents}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('rejection_reason', response.data)
+        
+        response = self.client.post(self.url, {
+            'action': 'reject', 'documents': documents, 'rejection_reason': 'Spam'
+        }, format='json')
+        self.assertEqual(response.data['updated'], 2)
+        self.approved.refresh_from_db()
+        self.assertEqual(self.approved.status, 'rejected')
+        self.assertEqual(self.approved.rejection_reason, 'Spam')
+        self.assertCounts(0, 0)
+    
+    def test_invalid_requests(self):
+        """Test malformed document lists and non-moderators are refused."""
+        self.client.force_authenticate(user=self.moderator)
+        for documents in ([], [True], [{'id': 1}], ''):
+            response = self.client.post(self.url, {'action': 'approve', 'documents': documents}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            self.url, {'action': 'approve', 'documents': [self.pending[0].pk]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_admin_actions(self):
+        """Test the admin approves and rejects the selected documents."""
+        self.moderator.is_staff = True
+        self.moderator.is_superuser = True
+        self.moderator.save()
+        self.client.force_login(self.moderator)
+        url = reverse('admin:documents_document_changelist')
+        
+        self.client.post(url, {
+            'action': 'approve_documents',
+            '_selected_action': [document.pk for document in self.pending[:2]],
+        })
+        self.assertCounts(2, 1)
+        
+        self.client.post(url, {'action': 'reject_documents', '_selected_action': [self.pending[0].pk]})
+        self.pending[0].refresh_from_db()
+        self.assertEqual(self.pending[0].status, 'rejected')
+        self.assertEqual(self.pending[0].reviewed_by, self.moderator)
+        self.assertCounts(1, 1)
+
+
+class ModerationQueueTest(APITestCase):
+    """Test claiming pending documents and optimistic moderation."""
+    
+    def setUp(self):
+        """Set up test data."""
+        from django.contrib.auth.models import Group
+        
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        moderators_group, _ = Group.objects.get_or_create(name='moderators')
+        self.moderators = []
+        for name in ('alice', 'bruno'):
+            moderator = get_user_model().objects.create_user(
+                username=name,
+                email=f'{name}@example.com',
+                password='modpass123'
+            )
+            moderator.groups.add(moderators_group)
+            self.moderators.append(moderator)
+        self.category = Category.objects.create(name='Health')
+        self.documents = [
+            Document.objects.create(
+                title=f'Rapport {number}',
+                description='Test description',
+                category=self.category,
+                uploaded_by=self.user
+            )
+            for number in range(3)
+        ]
+        self.addCleanup(counter_buffer.discard)
+    
+    def claim(self, moderator, count):
+        self.client.force_authenticate(user=moderator)
+        response = self.client.post(reverse('document-claim'), {'count': count}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [document['id'] for document in response.data['results']]
+    
+    def moderate(self, moderator, document, **data):
+        self.client.force_authenticate(user=moderator)
+        return self.client.post(
+            reverse('document-approve-reject', kwargs={'slug': document.slug}),
+            {'action': 'approve', **data},
+            format='json'
+        )
+    
+    def test_moderators_claim_different_documents(self):
+        """Test concurrent claims hand out each pending document once."""
+        alice, bruno = self.moderators
+        oldest = sorted(document.pk for document in self.documents)
+        
+        self.assertEqual(self.claim(alice, 2), oldest[:2])
+        self.assertEqual(self.claim(bruno, 2), oldest[2:])
+        # Claiming again renews the documents already held.
+        self.assertEqual(self.claim(alice, 2), oldest[:2])
+        
+        response = self.client.get(reverse('document-queue'))
+        self.assertEqual([document['id'] for document in response.data['results']], oldest[:2])
+    
+    def test_claim_skips_locked_rows(self):
+        """Test the claim query does not wait on rows being claimed elsewhere."""
+        if not connection.features.has_select_for_update_skip_locked:
+            self.skipTest('The database has no SKIP LOCKED.')
+        with CaptureQueriesContext(connection) as queries:
+            self.claim(self.moderators[0], 2)
+        self.assertTrue(any('SKIP LOCKED' in query['sql'] for query in queries))
+    
+    def test_expired_and_released_claims_are_free(self):
+        """Test leases run out on their own and can be given back."""
+        from datetime import timedelta
+        from django.utils import timezone
+        
+        alice, bruno = self.moderators
+        claimed = self.claim(alice, 3)
+        self.assertEqual(self.claim(bruno, 3), [])
+        
+        Document.objects.filter(pk=claimed[0]).update(claim_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.claim(bruno, 3), claimed[:1])
+        
+        self.client.force_authenticate(user=alice)
+        response = self.client.post(reverse('document-release'), {}, format='json')
+        self.assertEqual(response.data['released'], 2)
+        self.assertEqual(self.claim(bruno, 3), claimed)
+    
+    def test_claimed_document_cannot_be_moderated_by_others(self):
+        """Test another moderator's live claim refuses decisions with 409."""
+        alice, bruno = self.moderators
+        document = Document.objects.get(pk=self.claim(alice, 1)[0])
+        
+        response = self.moderate(bruno, document)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        document.refresh_from_db()
+        self.assertEqual(document.status, 'pending')
+        
+        response = self.moderate(alice, document)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        document.refresh_from_db()
+        self.assertEqual(document.status, 'approved')
+        self.assertIsNone(document.claimed_by)
+    
+    def test_stale_version_is_refused(self):
+        """Test a decision on a document changed since it was loaded is refused."""
+        alice = self.moderators[0]
+        document = self.documents[0]
+        self.client.force_authenticate(user=alice)
+        version = self.client.get(
+            reverse('document-detail', kwargs={'slug': document.slug})
+        ).data['version']
+        
+        document.description = 'Edited meanwhile'
+        document.save()
+        self.assertEqual(document.version, version + 1)
+        
+        response = self.moderate(alice, document, version=version)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['version'], version + 1)
+        
+        response = self.moderate(alice, document, version=version + 1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['document']['status'], 'approved')
+        self.assertEqual(response.data['document']['version'], version + 2)
+        
+        # The same decision sent twice does not apply twice.
+        response = self.moderate(alice, document, version=version + 1)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+    
+    def test_bulk_moderation_skips_claimed_documents(self):
+        """Test bulk decisions leave documents another moderator is reviewing."""
+        alice, bruno = self.moderators
+        claimed = self.claim(alice, 1)[0]
+        
+        self.client.force_authenticate(user=bruno)
+        response = self.client.post(reverse('document-bulk-moderate'), {
+            'action': 'approve',
+            'documents': [document.pk for document in self.documents],
+        }, format='json')
+        self.assertEqual(response.data['updated'], 2)
+        statuses = {result['id']: result['status'] for result in response.data['results']}
+        self.assertEqual(statuses.pop(claimed), 'claimed')
+        self.assertEqual(set(statuses.values()), {'approved'})
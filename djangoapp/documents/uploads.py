@@ -0,0 +1,87 @@
+"""
+Inspection of uploaded document files.
+
+File metadata (size, SHA-256 content hash, page count) is read once from the
+upload stream when a new file is saved (see ``Document.save``) and stored on
+the document, so later saves never touch the storage backend.
+"""
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from collections import namedtuple
+from contextlib import contextmanager
+
+FileInfo = namedtuple('FileInfo', ['size', 'content_hash', 'page_count'])
+
+# Page objects of an uncompressed PDF page tree; /Type /Pages (the tree nodes)
+# is excluded by the lookahead. This only estimates the page count: pages
+# inside compressed object streams are not visible this way (the count is
+# then left unknown), and incrementally updated PDFs keep earlier revisions
+# of edited or deleted pages, which are counted too. Text extraction replaces
+# the estimate with the number of pages pdftotext reads from the page tree.
+PAGE_PATTERN = re.compile(rb'/Type\s{0,8}/Page(?![A-Za-z])')
+
+# Bytes kept from the previous chunk so matches spanning chunks are found
+CHUNK_OVERLAP = 32
+
+
+def inspect_chunks(chunks):
+    """Return the FileInfo of a file given as an iterable of byte chunks."""
+    digest = hashlib.sha256()
+    size = 0
+    pages = 0
+    tail = b''
+    for chunk in chunks:
+        digest.update(chunk)
+        size += len(chunk)
+        buffer = tail + chunk
+        # Count each match once: those ending in the tail were counted with
+        # the previous chunk, those ending on the last byte wait for the
+        # next one, which decides the lookahead.
+        pages += sum(
+            1 for match in PAGE_PATTERN.finditer(buffer)
+            if len(tail) <= match.end() < len(buffer)
+        )
+        tail = buffer[-CHUNK_OVERLAP:]
+    pages += sum(1 for match in PAGE_PATTERN.finditer(tail) if match.end() == len(tail))
+    return FileInfo(size, digest.hexdigest(), pages or None)
+
+
+def inspect_upload(file):
+    """
+    Return the FileInfo of an uploaded file.
+
+    The result is cached on the given file object, so inspecting the same
+    upload again does not read the stream again.
+    """
+    info = getattr(file, '_document_file_info', None)
+    if info is None:
+        info = inspect_chunks(file.chunks())
+        file._document_file_info = info
+        file.seek(0)
+    return info
+
+
+@contextmanager
+def local_copy(file):
+    """
+    Yield a local path holding a stored file, for command-line tools.
+
+    Files on the local filesystem are used in place; others (S3) are copied
+    to a temporary file that is removed afterwards.
+    """
+    try:
+        path = file.path
+    except NotImplementedError:
+        path = None
+    if path:
+        yield path
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'source.pdf')
+        with file.open('rb') as source, open(path, 'wb') as copy:
+            shutil.copyfileobj(source, copy, 1024 * 1024)
+        yield path
@@ -2,24 +2,58 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
-from django.db.models import Q
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
 from django.utils import timezone
-from django.http import FileResponse
+from django.utils.http import urlencode
+from django.core.files.uploadedfile import UploadedFile
+from django.shortcuts import get_object_or_404
+from django.contrib.auth import get_user_model
+from django.urls import reverse
 from django_ratelimit.decorators import ratelimit
 from django.utils.decorators import method_decorator
+from slugify import slugify
+from functools import partial
 
-from .models import Document
+from .counters import counter_buffer
+from .direct_uploads import create_presigned_post, get_s3_storage
+from .downloads import is_initial_request, link_period, serve_document, verify_download
+from .models import Document, DocumentTag, Tag, UploadSession
+from .search import DocumentSearchFilter
 from .serializers import (
     DocumentListSerializer,
     DocumentDetailSerializer,
     DocumentCreateSerializer,
     DocumentUpdateSerializer,
-    DocumentApprovalSerializer
+    DocumentApprovalSerializer,
+    BulkModerationSerializer,
+    DocumentQueueSerializer,
+    ModerationClaimSerializer,
+    ModerationReleaseSerializer,
+    DirectUploadFinalizeSerializer,
+    TagSerializer,
+    UploadSessionSerializer
 )
-from djangoapp.accounts.permissions import IsModerator, IsOwnerOrModerator
+from djangoapp.accounts.permissions import IsModerator, IsOwnerOrModerator, is_moderator
+from djangoapp.core.cache import api_caching_enabled, get_versions, make_etag
+from djangoapp.core.mixins import AnonymousCacheMixin, ConditionalGetMixin
+from djangoapp.core.pagination import KeysetPagination
 
 
-class DocumentViewSet(viewsets.ModelViewSet):
+# Shared by direct uploads and finalized resumable uploads
+upload_ratelimit = ratelimit(key='user', rate='10/h', method='POST', group='documents.upload')
+
+
+def duplicate_response(document):
+    """Point the uploader at the document already holding the same file."""
+    return Response(
+        {'error': 'This document is already in the archive.', 'slug': document.slug},
+        status=status.HTTP_409_CONFLICT
+    )
+
+
+class DocumentViewSet(AnonymousCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     API endpoint for viewing and managing documents.
     
@@ -27,9 +61,29 @@ class DocumentViewSet(viewsets.ModelViewSet):
     Create: Authenticated users (rate limited)
     Update/Delete: Owner or moderators
     Approve/Reject: Moderators only
+    
+    Moderation queue: moderators claim pending documents under an expiring
+    lease (``queue/claim``), so concurrent moderators get different ones;
+    decisions carry the reviewed ``version`` and are refused with 409 when
+    the document changed meanwhile.
+    
+    Search: ``?q=`` runs a ranked full-text search (see ``search.py``);
+    ``?search=`` keeps the plain substring matching.
+    
+    Pagination: page numbers by default; ``?pagination=cursor`` switches the
+    list, pending and my-documents endpoints to keyset pagination ordered by
+    newest first, which skips the COUNT query and ignores ``?ordering=``.
+    
+    Conditional GET: list and retrieve send ETags (plus Last-Modified for a
+    document) and answer matching revalidations with 304 Not Modified.
+    Anonymous list and retrieve responses are cached until documents or
+    categories change (see ``AnonymousCacheMixin``).
     """
     lookup_field = 'slug'
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    conditional_versions = ('documents', 'categories', 'document-counts')
+    cached_versions = ('documents', 'categories')
+    cursor_pagination_class = KeysetPagination
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter, DocumentSearchFilter]
     search_fields = ['title', 'description', 'tags']
     ordering_fields = ['created_at', 'view_count', 'download_count', 'title']
     ordering = ['-created_at']
@@ -42,10 +96,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
         queryset = Document.objects.select_related('category', 'uploaded_by')
         
         # Moderators see all documents
-        if self.request.user.is_authenticated and (
-            self.request.user.is_staff or 
-            self.request.user.groups.filter(name='moderators').exists()
-        ):
+        if is_moderator(self.request.user):
             pass  # Return all documents
         else:
             # Non-moderators only see approved documents
@@ -68,23 +119,30 @@ class DocumentViewSet(viewsets.ModelViewSet):
         
         # Filter by status (moderators only)
         status_filter = self.request.query_params.get('status', None)
-        if status_filter and self.request.user.is_authenticated and (
-            self.request.user.is_staff or 
-            self.request.user.groups.filter(name='moderators').exists()
-        ):
+        if status_filter and is_moderator(self.request.user):
             queryset = queryset.filter(status=status_filter)
         
-        # Filter by tags
+        # Filter by tags (exact slug match; any tag by default, all with tag_match=all)
         tags = self.request.query_params.get('tags', None)
         if tags:
-            tag_list = [tag.strip() for tag in tags.split(',')]
-            q_objects = Q()
-            for tag in tag_list:
-                q_objects |= Q(tags__icontains=tag)
-            queryset = queryset.filter(q_objects)
+            slugs = {slugify(tag) for tag in tags.split(',')} - {''}
+            tagged = DocumentTag.objects.filter(tag__slug__in=slugs)
+            if self.request.query_params.get('tag_match') == 'all':
+                tagged = tagged.values('document').annotate(
+                    matched=Count('tag')
+                ).filter(matched=len(slugs))
+            queryset = queryset.filter(pk__in=tagged.values('document'))
         
         return queryset
     
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = self.cursor_pagination_class()
+        return super().paginator
+    
     def get_serializer_class(self):
         if self.action == 'list':
             return DocumentListSerializer
@@ -99,15 +157,17 @@ class DocumentViewSet(viewsets.ModelViewSet):
             permission_classes = [IsAuthenticated]
         elif self.action in ['update', 'partial_update', 'destroy']:
             permission_classes = [IsOwnerOrModerator]
-        elif self.action in ['approve_reject', 'pending_documents']:
+        elif self.action in [
+            'approve_reject', 'bulk_moderate', 'pending_documents', 'queue', 'claim', 'release'
+        ]:
             permission_classes = [IsModerator]
         else:
             permission_classes = [IsAuthenticatedOrReadOnly]
         return [permission() for permission in permission_classes]
     
-    @method_decorator(ratelimit(key='user', rate='10/h', method='POST'))
+    @method_decorator(upload_ratelimit)
     def create(self, request, *args, **kwargs):
-        """Create a new document (rate limited to 10 per hour)."""
+        """Create a new document (rate limited to 10 per hour), unless its file is already archived."""
         # Check if user is banned
         if request.user.is_banned:
             return Response(
@@ -115,65 +175,263 @@ class DocumentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        duplicate = Document.find_duplicate(serializer.file_info.content_hash)
+        if duplicate:
+            return duplicate_response(duplicate)
+        self.perform_create(serializer)
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
     
     def retrieve(self, request, *args, **kwargs):
-        """Retrieve document and increment view count."""
+        """
+        Retrieve document and increment view count.
+        
+        Revalidations answered with 304 Not Modified are not counted as views;
+        responses served from the anonymous cache are.
+        """
+        return self.get_cached_response(
+            partial(self.get_detail_response, request), on_hit=self.count_cached_view
+        )
+    
+    def get_response_cache_parts(self):
+        # Details carry signed download links, renewed every signing period.
+        return (link_period(),) if self.action == 'retrieve' else ()
+    
+    def count_cached_view(self, data):
+        counter_buffer.increment(data['id'], 'view_count')
+    
+    def get_detail_response(self, request):
         instance = self.get_object()
+        etag = self.get_etag(
+            instance.pk, instance.updated_at.isoformat(), instance.view_count,
+            instance.download_count, link_period(), versions=['categories']
+        )
+        not_modified = self.get_not_modified_response(etag, instance.updated_at)
+        if not_modified is not None:
+            return not_modified
+        
         instance.increment_view_count()
         serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        return self.set_validators(Response(serializer.data), etag, instance.updated_at)
     
     @action(detail=True, methods=['get'], url_path='download')
     def download(self, request, slug=None):
-        """Download document file and increment download count."""
-        document = self.get_object()
-        document.increment_download_count()
+        """
+        Download document file and increment download count.
+        
+        A signed ``token`` (see downloads.py) grants access without
+        authentication; ``inline=1`` displays the file instead of downloading
+        it and is not counted. Range requests resuming a transfer are not
+        counted either.
+        """
+        token = request.query_params.get('token')
+        if token:
+            user_id = verify_download(token, slug)
+            if user_id is None:
+                return Response(
+                    {'error': 'Invalid or expired download link.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            # The link reaches what the user it was issued to may see now, so
+            # links stop working once a document is hidden or rejected.
+            issued_to = get_user_model().objects.filter(pk=user_id).first() if user_id else None
+            document = get_object_or_404(
+                Document.objects.filter(Document.visible_to(issued_to or request.user)), slug=slug
+            )
+        else:
+            document = self.get_object()
         
-        if document.file:
-            response = FileResponse(document.file.open('rb'), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="{document.title}.pdf"'
-            return response
+        if not document.file:
+            return Response(
+                {'error': 'File not found.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
         
-        return Response(
-            {'error': 'File not found.'},
-            status=status.HTTP_404_NOT_FOUND
-        )
+        inline = request.query_params.get('inline') == '1'
+        if not inline and is_initial_request(request):
+            document.increment_download_count()
+        return serve_document(document, inline=inline)
     
     @action(detail=True, methods=['post'], url_path='approve-reject')
     def approve_reject(self, request, slug=None):
-        """Approve or reject a document (moderators only)."""
+        """
+        Approve or reject a document (moderators only).
+        
+        With ``version``, the decision only applies to the document as the
+        moderator reviewed it; a document changed since, or claimed by
+        another moderator, is refused with 409 Conflict.
+        """
         document = self.get_object()
         serializer = DocumentApprovalSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        if serializer.is_valid():
-            action_type = serializer.validated_data['action']
-            
-            if action_type == 'approve':
-                document.status = 'approved'
-                document.reviewed_by = request.user
-                document.reviewed_at = timezone.now()
-                document.rejection_reason = ''
-                document.save()
-                
-                return Response({
-                    'message': 'Document approved successfully.',
-                    'document': DocumentDetailSerializer(document, context={'request': request}).data
-                })
-            
-            elif action_type == 'reject':
-                document.status = 'rejected'
-                document.reviewed_by = request.user
-                document.reviewed_at = timezone.now()
-                document.rejection_reason = serializer.validated_data.get('rejection_reason', '')
-                document.save()
-                
-                return Response({
-                    'message': 'Document rejected.',
-                    'document': DocumentDetailSerializer(document, context={'request': request}).data
-                })
-        
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        action_type = serializer.validated_data['action']
+        documents = Document.objects.filter(pk=document.pk)
+        if 'version' in serializer.validated_data:
+            documents = documents.filter(version=serializer.validated_data['version'])
+        moderated = Document.moderate(
+            documents,
+            action_type,
+            request.user,
+            serializer.validated_data.get('rejection_reason', '')
+        )
+        document.refresh_from_db()
+        if not moderated:
+            if document.is_claimed_by_other(request.user):
+                return Response(
+                    {'error': 'This document is claimed by another moderator.'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            return Response(
+                {'error': 'This document changed since it was loaded.', 'version': document.version},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        return Response({
+            'message': 'Document approved successfully.' if action_type == 'approve' else 'Document rejected.',
+            'document': DocumentDetailSerializer(document, context={'request': request}).data
+        })
+    
+    @action(detail=False, methods=['post'], url_path='bulk-moderate')
+    def bulk_moderate(self, request):
+        """
+        Approve or reject many documents, given by id or slug (moderators only).
+        
+        Everything is applied in one transaction with set-based updates; the
+        response lists the new status of each document ("claimed" for those
+        another moderator is reviewing), and the documents that were not found.
+        """
+        serializer = BulkModerationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        references = serializer.validated_data['documents']
+        ids = [reference for reference in references if isinstance(reference, int)]
+        slugs = [reference for reference in references if isinstance(reference, str)]
+        found = {}
+        for pk, slug in Document.objects.filter(Q(pk__in=ids) | Q(slug__in=slugs)).values_list('pk', 'slug'):
+            found[pk] = found[slug] = (pk, slug)
+        
+        action_type = serializer.validated_data['action']
+        moderated = set(Document.moderate(
+            Document.objects.filter(pk__in={pk for pk, slug in found.values()}),
+            action_type,
+            request.user,
+            serializer.validated_data.get('rejection_reason', '')
+        ))
+        new_status = 'approved' if action_type == 'approve' else 'rejected'
+        results = {}
+        for pk, slug in (found[reference] for reference in references if reference in found):
+            results[pk] = {'id': pk, 'slug': slug, 'status': new_status if pk in moderated else 'claimed'}
+        
+        return Response({
+            'updated': len(moderated),
+            'results': list(results.values()),
+            'not_found': [reference for reference in references if reference not in found],
+        })
+    
+    @action(detail=False, methods=['get'], url_path='queue')
+    def queue(self, request):
+        """List the pending documents the current moderator has claimed."""
+        claimed = Document.objects.filter(
+            status='pending', claimed_by=request.user, claim_expires_at__gt=timezone.now()
+        ).select_related('category', 'uploaded_by').order_by('created_at', 'pk')
+        return Response({
+            'results': DocumentQueueSerializer(claimed, many=True, context={'request': request}).data
+        })
+    
+    @action(detail=False, methods=['post'], url_path='queue/claim')
+    def claim(self, request):
+        """
+        Claim the next pending documents to review (moderators only).
+        
+        Each moderator gets different documents, leased for
+        ``MODERATION_CLAIM_TIMEOUT`` seconds; claiming again renews the lease
+        of the documents still held.
+        """
+        serializer = ModerationClaimSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        Document.claim_pending(request.user, serializer.validated_data['count'])
+        return self.queue(request)
+    
+    @action(detail=False, methods=['post'], url_path='queue/release')
+    def release(self, request):
+        """Give back claimed documents (the given ids, or all of them)."""
+        serializer = ModerationReleaseSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        released = Document.release_claims(request.user, serializer.validated_data.get('documents'))
+        return Response({'released': released})
+    
+    @action(detail=False, methods=['get'], url_path='facets')
+    def facets(self, request):
+        """
+        Get document counts per category, language, license and tag.
+        
+        Accepts the same filters as the list endpoint. Counts come from one
+        grouped query per facet and are cached per filter combination until
+        a document or category changes.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        if not api_caching_enabled():
+            return Response(self.compute_facets(queryset))
+        
+        params = sorted(
+            (key, value) for key, value in request.query_params.lists()
+            if key not in ('page', 'page_size', 'ordering')
+        )
+        cache_key = 'documents:facets:%s:%s' % (
+            'moderator' if is_moderator(request.user) else 'public',
+            make_etag(
+                *get_versions('documents', 'categories'), urlencode(params, doseq=True)
+            ).strip('"')
+        )
+        
+        data = cache.get(cache_key)
+        if data is None:
+            data = self.compute_facets(queryset)
+            cache.set(cache_key, data, settings.DOCUMENT_FACETS_CACHE_TIMEOUT)
+        return Response(data)
+    
+    def compute_facets(self, queryset):
+        """Count documents per facet value with one grouped query per facet."""
+        def counts(*fields):
+            return list(
+                queryset.values(*fields).annotate(count=Count('pk')).order_by('-count', *fields)
+            )
+        
+        language_labels = dict(Document.LANGUAGE_CHOICES)
+        license_labels = dict(Document.LICENSE_CHOICES)
+        languages = [
+            {'value': row['language'], 'label': language_labels.get(row['language']), 'count': row['count']}
+            for row in counts('language')
+        ]
+        tags = DocumentTag.objects.filter(document__in=queryset).values(
+            'tag__slug', 'tag__name'
+        ).annotate(count=Count('pk')).order_by('-count', 'tag__name')[:20]
+        
+        return {
+            'total': sum(row['count'] for row in languages),
+            'categories': [
+                {'slug': row['category__slug'], 'name': row['category__name'], 'count': row['count']}
+                for row in counts('category__slug', 'category__name')
+            ],
+            'languages': languages,
+            'licenses': [
+                {'value': row['license'], 'label': license_labels.get(row['license']), 'count': row['count']}
+                for row in counts('license')
+            ],
+            'tags': [
+                {'slug': row['tag__slug'], 'name': row['tag__name'], 'count': row['count']}
+                for row in tags
+            ],
+        }
     
     @action(detail=False, methods=['get'], url_path='pending')
     def pending_documents(self, request):
@@ -206,3 +464,226 @@ class DocumentViewSet(viewsets.ModelViewSet):
         
         serializer = DocumentListSerializer(my_docs, many=True, context={'request': request})
         return Response(serializer.data)
+
+
+class TagViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint for document tags.
+    
+    List returns the most used tags (by approved documents) with their counts,
+    limited by ``?limit=`` (default 50, max 200).
+    """
+    serializer_class = TagSerializer
+    lookup_field = 'slug'
+    pagination_class = None
+    default_limit = 50
+    max_limit = 200
+    
+    def get_queryset(self):
+        return Tag.objects.filter(
+            document_tags__document__status='approved'
+        ).annotate(
+            document_count=Count('document_tags')
+        ).order_by('-document_count', 'name')
+    
+    def list(self, request, *args, **kwargs):
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+        
+        serializer = self.get_serializer(self.get_queryset()[:limit], many=True)
+        return Response(serializer.data)
+
+
+class UploadSessionViewSet(viewsets.GenericViewSet):
+    """
+    API endpoint for resumable uploads, in the style of tus.
+    
+    POST   /uploads/                Start a session ({"filename", "length"})
+    HEAD   /uploads/{id}/           Upload-Offset tells where to resume
+    PATCH  /uploads/{id}/           Append the body (application/offset+octet-stream)
+                                    at the Upload-Offset header
+    POST   /uploads/{id}/finalize/  Create the pending document (document fields)
+    DELETE /uploads/{id}/           Abandon the upload
+    
+    Chunks are streamed to disk and are not rate limited; finalizing counts
+    against the same limit as a direct upload.
+    
+    With S3 storage, browsers can skip the API for the file itself:
+    
+    POST   /uploads/direct/           Sign a presigned POST ({"url", "fields", "key"})
+    POST   /uploads/direct/finalize/  Create the pending document ("key" and document fields)
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+    chunk_content_type = 'application/offset+octet-stream'
+    
+    def get_queryset(self):
+        return UploadSession.objects.filter(uploaded_by=self.request.user)
+    
+    def get_offset_headers(self, session):
+        return {
+            'Upload-Offset': str(session.offset),
+            'Upload-Length': str(session.length),
+            'Cache-Control': 'no-store',
+        }
+    
+    def banned_response(self):
+        return Response(
+            {'error': 'You are banned from uploading documents.'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    def create(self, request):
+        """Start an upload session."""
+        if request.user.is_banned:
+            return self.banned_response()
+        
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = serializer.save(uploaded_by=request.user)
+        
+        headers = self.get_offset_headers(session)
+        headers['Location'] = request.build_absolute_uri(
+            reverse('upload-detail', kwargs={'pk': session.pk})
+        )
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+    
+    def retrieve(self, request, pk=None):
+        """Report how many bytes were received (also answers HEAD)."""
+        session = self.get_object()
+        return Response(self.get_serializer(session).data, headers=self.get_offset_headers(session))
+    
+    def partial_update(self, request, pk=None):
+        """Append a chunk, streamed to the part file."""
+        session = self.get_object()
+        if request.content_type != self.chunk_content_type:
+            return Response(
+                {'error': f'Chunks must be sent as {self.chunk_content_type}.'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers.get('Content-Length') or 0)
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'Upload-Offset and Content-Length headers are required.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if offset != session.offset:
+            return Response(
+                {'error': 'Upload-Offset does not match the bytes received.'},
+                status=status.HTTP_409_CONFLICT,
+                headers=self.get_offset_headers(session)
+            )
+        if offset + length > session.length:
+            return Response(
+                {'error': 'Chunk goes past the announced upload length.'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        
+        # Only one request may write from where this one started.
+        new_offset = session.append(offset, request.stream, length)
+        if new_offset is None:
+            session.refresh_from_db()
+            return Response(
+                {'error': 'Another chunk was received concurrently.'},
+                status=status.HTTP_409_CONFLICT,
+                headers=self.get_offset_headers(session)
+            )
+        session.offset = new_offset
+        return Response(status=status.HTTP_204_NO_CONTENT, headers=self.get_offset_headers(session))
+    
+    def destroy(self, request, pk=None):
+        """Abandon an upload."""
+        self.get_object().discard()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @action(detail=True, methods=['post'], url_path='finalize')
+    @method_decorator(upload_ratelimit)
+    def finalize(self, request, pk=None):
+        """Create a pending document from a complete upload."""
+        session = self.get_object()
+        if request.user.is_banned:
+            return self.banned_response()
+        if not session.is_complete:
+            return Response(
+                {'error': 'Upload is incomplete.'},
+                status=status.HTTP_409_CONFLICT,
+                headers=self.get_offset_headers(session)
+            )
+        
+        with open(session.part_path, 'rb') as part:
+            if part.read(5) != b'%PDF-':
+                return Response(
+                    {'error': 'Only PDF files are allowed.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            part.seek(0)
+            data = {key: value for key, value in request.data.items()}
+            data['file'] = UploadedFile(
+                part, name=session.filename, content_type='application/pdf', size=session.length
+            )
+            serializer = DocumentCreateSerializer(data=data, context=self.get_serializer_context())
+            serializer.is_valid(raise_exception=True)
+            duplicate = Document.find_duplicate(serializer.file_info.content_hash)
+            if not duplicate:
+                document = serializer.save()
+        
+        session.discard()
+        if duplicate:
+            return duplicate_response(duplicate)
+        return Response(
+            DocumentDetailSerializer(document, context=self.get_serializer_context()).data,
+            status=status.HTTP_201_CREATED
+        )
+    
+    def get_direct_upload_storage(self):
+        storage = get_s3_storage(Document)
+        if storage is None:
+            return None, Response(
+                {'error': 'Direct uploads require S3 storage.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return storage, None
+    
+    @action(detail=False, methods=['post'], url_path='direct')
+    def direct(self, request):
+        """Sign a presigned POST uploading one PDF straight to the bucket."""
+        if request.user.is_banned:
+            return self.banned_response()
+        storage, error = self.get_direct_upload_storage()
+        if error:
+            return error
+        return Response(
+            create_presigned_post(storage, request.user),
+            status=status.HTTP_201_CREATED,
+            headers={'Cache-Control': 'no-store'}
+        )
+    
+    @action(detail=False, methods=['post'], url_path='direct/finalize')
+    @method_decorator(upload_ratelimit)
+    def finalize_direct(self, request):
+        """Create a pending document from a file uploaded straight to the bucket."""
+        if request.user.is_banned:
+            return self.banned_response()
+        storage, error = self.get_direct_upload_storage()
+        if error:
+            return error
+        
+        context = self.get_serializer_context()
+        context['storage'] = storage
+        serializer = DirectUploadFinalizeSerializer(data=request.data, context=context)
+        serializer.is_valid(raise_exception=True)
+        duplicate = Document.find_duplicate(serializer.file_info.content_hash)
+        if duplicate:
+            storage.delete(serializer.validated_data['key'])
+            return duplicate_response(duplicate)
+        document = serializer.save()
+        return Response(
+            DocumentDetailSerializer(document, context=self.get_serializer_context()).data,
+            status=status.HTTP_201_CREATED
+        )
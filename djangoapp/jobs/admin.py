@@ -0,0 +1,22 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Admin interface for Job model."""
+    
+    list_display = ['name', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'created_at']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'last_error']
+    readonly_fields = ['attempts', 'locked_by', 'locked_at', 'slot', 'created_at', 'updated_at']
+    actions = ['retry_jobs']
+    
+    @admin.action(description='Retry selected jobs now')
+    def retry_jobs(self, request, queryset):
+        """Queue failed jobs again with a fresh set of attempts."""
+        updated = queryset.exclude(status='running').update(
+            status='queued', attempts=0, run_at=timezone.now(), updated_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} jobs queued.')
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'djangoapp.jobs'
+    label = 'jobs'
+    
+    def ready(self):
+        # Job types are registered by the jobs module of each app.
+        autodiscover_modules('jobs')
@@ -0,0 +1,59 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    Background job waiting for, or being processed by, a worker.
+    
+    Succeeded jobs are deleted; failed ones are kept for inspection.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('failed', 'Failed'),
+    ]
+    
+    name = models.CharField(max_length=100, help_text='Registered job type')
+    args = models.JSONField(default=dict, blank=True, help_text='Keyword arguments of the job')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    run_at = models.DateTimeField(default=timezone.now, help_text='Not run before this time')
+    
+    # Retries
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    last_error = models.TextField(blank=True)
+    
+    # Claim by a worker
+    locked_by = models.CharField(max_length=255, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    slot = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        help_text='Concurrency slot of the job type held while running'
+    )
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'jobs'
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+        ordering = ['run_at']
+        indexes = [
+            models.Index(fields=['status', 'run_at']),
+        ]
+        constraints = [
+            # Two running jobs of a type never hold the same slot.
+            models.UniqueConstraint(
+                fields=['name', 'slot'],
+                condition=Q(status='running'),
+                name='jobs_running_slot_unique'
+            ),
+        ]
+    
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,200 @@
+"""
+Database-backed background job queue.
+
+Jobs are rows of the ``jobs`` table, so no broker is needed and a job queued
+inside a transaction only becomes visible if that transaction commits.
+``manage.py run_worker`` processes claim due jobs with ``SELECT ... FOR UPDATE
+SKIP LOCKED`` (workers never wait on rows another worker is claiming), run
+them, and retry failures with exponential backoff. While a job runs, its
+worker renews the claim's ``locked_at`` so that long jobs are not taken for
+lost; a worker that lost its claim anyway leaves the job to its new owner.
+
+A job type may cap how many of its jobs run at once across all workers: a
+running job holds one of its type's numbered slots, which a partial unique
+constraint keeps exclusive.
+
+Job types are registered in the ``jobs`` module of each app::
+
+    @register('documents.render_previews', concurrency=2)
+    def render_previews(document_id):
+        ...
+
+and queued from models, signals or views with::
+
+    enqueue('documents.render_previews', document_id=document.pk)
+"""
+import logging
+import threading
+import traceback
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+JobType = namedtuple('JobType', ['name', 'func', 'concurrency', 'max_attempts'])
+
+registry = {}
+
+
+def register(name, concurrency=None, max_attempts=None):
+    """
+    Register the decorated function as a job type.
+
+    ``concurrency`` caps the jobs of this type running at once (None for no
+    limit); ``max_attempts`` defaults to ``JOB_MAX_ATTEMPTS``.
+    """
+    def decorator(func):
+        registry[name] = JobType(name, func, concurrency, max_attempts)
+        return func
+    return decorator
+
+
+def enqueue(job_name, run_at=None, **kwargs):
+    """Queue a job calling the registered function with JSON-serializable ``kwargs``."""
+    if job_name not in registry:
+        raise ValueError(f'Unknown job type: {job_name}')
+    return Job.objects.create(
+        name=job_name,
+        args=kwargs,
+        run_at=run_at or timezone.now(),
+        max_attempts=registry[job_name].max_attempts or settings.JOB_MAX_ATTEMPTS
+    )
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next try of a job that failed ``attempts`` times."""
+    return min(settings.JOB_RETRY_DELAY * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_DELAY)
+
+
+def free_slot(job_type):
+    """Return a concurrency slot no running job of the type holds, or None."""
+    taken = set(
+        Job.objects.filter(name=job_type.name, status='running').values_list('slot', flat=True)
+    )
+    return next((slot for slot in range(job_type.concurrency) if slot not in taken), None)
+
+
+def claim_job(worker_id):
+    """Mark the next due job as running for ``worker_id`` and return it, or None."""
+    saturated = set()
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            job = Job.objects.select_for_update(skip_locked=True).filter(
+                status='queued', run_at__lte=now, name__in=set(registry) - saturated
+            ).order_by('run_at', 'pk').first()
+            if job is None:
+                return None
+
+            slot = None
+            job_type = registry[job.name]
+            if job_type.concurrency is not None:
+                slot = free_slot(job_type)
+                if slot is None:
+                    saturated.add(job.name)
+                    continue
+
+            try:
+                with transaction.atomic():
+                    # Compare-and-set, for databases without row locks (SQLite).
+                    claimed = Job.objects.filter(pk=job.pk, status='queued').update(
+                        status='running', slot=slot, locked_by=worker_id, locked_at=now,
+                        attempts=F('attempts') + 1, updated_at=now
+                    )
+            except IntegrityError:
+                # Another worker took the slot meanwhile.
+                continue
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def held_claim(job):
+    """The job's row, if it is still running under the claim ``job`` was given."""
+    return Job.objects.filter(
+        pk=job.pk, status='running', locked_by=job.locked_by, attempts=job.attempts
+    )
+
+
+def renew_lease(job):
+    """Move the claim's ``locked_at`` to now; return False if the claim was lost."""
+    return bool(held_claim(job).update(locked_at=timezone.now()))
+
+
+def release_job(job, **fields):
+    return held_claim(job).update(
+        slot=None, locked_by='', locked_at=None, updated_at=timezone.now(), **fields
+    )
+
+
+def keep_lease(job, stopped):
+    """Renew the job's lease until ``stopped`` is set (run in a thread next to the job)."""
+    interval = max(settings.JOB_LEASE_TIMEOUT / 3, 1)
+    try:
+        while not stopped.wait(interval):
+            try:
+                if not renew_lease(job):
+                    logger.warning('Job %s was claimed by another worker', job)
+                    return
+            except DatabaseError:
+                # The next beat tries again; the lease timeout leaves room for a few.
+                logger.exception('Could not renew the lease of job %s', job)
+    finally:
+        connection.close()
+
+
+def run_job(job):
+    """Run a claimed job, renewing its lease meanwhile; return True if it succeeded."""
+    stopped = threading.Event()
+    heartbeat = threading.Thread(target=keep_lease, args=(job, stopped), daemon=True)
+    heartbeat.start()
+    error = None
+    try:
+        registry[job.name].func(**job.args)
+    except Exception:
+        logger.exception('Job %s failed (attempt %s of %s)', job, job.attempts, job.max_attempts)
+        error = traceback.format_exc()
+    finally:
+        stopped.set()
+        heartbeat.join()
+
+    # Only the claim this worker holds is finished; a job requeued as stale
+    # and claimed again belongs to the other worker.
+    if error is None:
+        finished, _ = held_claim(job).delete()
+    elif job.attempts < job.max_attempts:
+        finished = release_job(
+            job, status='queued', last_error=error,
+            run_at=timezone.now() + timedelta(seconds=retry_delay(job.attempts))
+        )
+    else:
+        finished = release_job(job, status='failed', last_error=error)
+    if not finished:
+        logger.warning('Job %s was claimed by another worker before it finished', job)
+    return error is None
+
+
+def requeue_stale_jobs():
+    """
+    Release jobs whose worker died while running them (running for longer
+    than ``JOB_LEASE_TIMEOUT``); jobs out of attempts are marked failed.
+    """
+    stale = Job.objects.filter(
+        status='running',
+        locked_at__lt=timezone.now() - timedelta(seconds=settings.JOB_LEASE_TIMEOUT)
+    )
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', slot=None, locked_by='', locked_at=None,
+        last_error='Worker stopped while running the job.', updated_at=timezone.now()
+    )
+    requeued = stale.update(
+        status='queued', slot=None, locked_by='', locked_at=None, updated_at=timezone.now()
+    )
+    return requeued + failed
@@ -0,0 +1,151 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .models import Job
+from .queue import (
+    JobType, claim_job, enqueue, registry, renew_lease, requeue_stale_jobs, run_job
+)
+
+
+@override_settings(JOB_RETRY_DELAY=30, JOB_RETRY_MAX_DELAY=3600, JOB_MAX_ATTEMPTS=3)
+class JobQueueTest(TestCase):
+    """Test the database-backed job queue."""
+    
+    def setUp(self):
+        """Register job types for the tests."""
+        self.calls = []
+        
+        def record(**kwargs):
+            self.calls.append(kwargs)
+        
+        def fail(**kwargs):
+            raise RuntimeError('boom')
+        
+        patcher = mock.patch.dict(registry, {
+            'tests.record': JobType('tests.record', record, None, None),
+            'tests.limited': JobType('tests.limited', record, 1, None),
+            'tests.fail': JobType('tests.fail', fail, None, None),
+        }, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_enqueue_unknown_job_type(self):
+        """Test queueing an unregistered job type fails early."""
+        with self.assertRaises(ValueError):
+            enqueue('tests.unknown')
+    
+    def test_worker_runs_due_jobs(self):
+        """Test run_worker runs due jobs with their arguments and deletes them."""
+        enqueue('tests.record', document_id=1)
+        later = enqueue('tests.record', run_at=timezone.now() + timedelta(hours=1), document_id=2)
+        
+        call_command('run_worker', once=True, stdout=StringIO())
+        
+        self.assertEqual(self.calls, [{'document_id': 1}])
+        self.assertEqual(list(Job.objects.all()), [later])
+    
+    def test_claim_skips_locked_rows(self):
+        """Test claims lock the job row without waiting on other workers' rows."""
+        enqueue('tests.record')
+        
+        with CaptureQueriesContext(connection) as queries:
+            job = claim_job('worker-1')
+        
+        self.assertEqual((job.status, job.locked_by, job.attempts), ('running', 'worker-1', 1))
+        if connection.features.has_select_for_update_skip_locked:
+            self.assertTrue(any('FOR UPDATE SKIP LOCKED' in query['sql'] for query in queries))
+        self.assertIsNone(claim_job('worker-2'))
+    
+    def test_failed_job_is_retried_with_backoff(self):
+        """Test failures are retried later, with a doubled delay each time, then kept as failed."""
+        job = enqueue('tests.fail')
+        
+        for attempt, delay in [(1, 30), (2, 60)]:
+            before = timezone.now()
+            with self.assertLogs('djangoapp.jobs.queue', 'ERROR'):
+                self.assertFalse(run_job(claim_job('worker')))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ('queued', attempt))
+            self.assertGreaterEqual(job.run_at, before + timedelta(seconds=delay))
+            self.assertIn('RuntimeError: boom', job.last_error)
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        
+        with self.assertLogs('djangoapp.jobs.queue', 'ERROR'):
+            run_job(claim_job('worker'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.slot), ('failed', 3, None))
+    
+    def test_concurrency_limit_per_job_type(self):
+        """Test a saturated job type waits while other types still run."""
+        enqueue('tests.limited')
+        enqueue('tests.limited')
+        enqueue('tests.record')
+        
+        first = claim_job('worker-1')
+        second = claim_job('worker-2')
+        
+        self.assertEqual((first.name, first.slot), ('tests.limited', 0))
+        self.assertEqual(second.name, 'tests.record')
+        self.assertIsNone(claim_job('worker-3'))
+        
+        run_job(first)
+        third = claim_job('worker-3')
+        self.assertEqual((third.name, third.slot), ('tests.limited', 0))
+    
+    @override_settings(JOB_LEASE_TIMEOUT=60)
+    def test_stale_jobs_are_requeued(self):
+        """Test jobs left running by a dead worker are queued again."""
+        job = enqueue('tests.limited')
+        claim_job('dead-worker')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(minutes=5))
+        
+        self.assertEqual(requeue_stale_jobs(), 1)
+        
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.slot, job.locked_by), ('queued', None, ''))
+        self.assertEqual(claim_job('worker').pk, job.pk)
+    
+    @override_settings(JOB_LEASE_TIMEOUT=60)
+    def test_renewed_lease_is_not_stale(self):
+        """Test a running job whose worker renews its lease is not requeued."""
+        job = enqueue('tests.record')
+        claimed = claim_job('worker')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(minutes=5))
+        
+        self.assertTrue(renew_lease(claimed))
+        
+        self.assertEqual(requeue_stale_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), ('running', 'worker'))
+    
+    @override_settings(JOB_LEASE_TIMEOUT=60)
+    def test_lost_claim_leaves_job_to_new_worker(self):
+        """Test a worker whose job was requeued as stale does not finish the new claim."""
+        job = enqueue('tests.fail')
+        stale = claim_job('slow-worker')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(minutes=5))
+        requeue_stale_jobs()
+        current = claim_job('worker')
+        
+        self.assertFalse(renew_lease(stale))
+        with self.assertLogs('djangoapp.jobs.queue', 'WARNING') as logs:
+            run_job(stale)
+        
+        self.assertIn('claimed by another worker', logs.output[-1])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, job.attempts), ('running', 'worker', 2))
+        self.assertEqual(job.locked_at, current.locked_at)
+        
+        Job.objects.filter(pk=job.pk).update(name='tests.record')
+        stale.name = current.name = 'tests.record'
+        run_job(stale)
+        self.assertTrue(Job.objects.filter(pk=job.pk).exists())
+        run_job(current)
+        self.assertFalse(Job.objects.filter(pk=job.pk).exists())
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:54
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+import django.db.models.deletion
+
+
+REASONS = ['copyright', 'spam', 'personal_info', 'inappropriate', 'other']
+
+
+def populate_report_stats(apps, schema_editor):
+    """Count the pending reports of every document, in total and per reason."""
+    Report = apps.get_model('reports', 'Report')
+    DocumentReportStats = apps.get_model('reports', 'DocumentReportStats')
+    db_alias = schema_editor.connection.alias
+
+    counts = Report.objects.using(db_alias).filter(status='pending').values('document_id').annotate(
+        pending_count=Count('pk'),
+        **{f'{reason}_count': Count('pk', filter=Q(reason=reason)) for reason in REASONS}
+    ).order_by()
+    DocumentReportStats.objects.using(db_alias).bulk_create(
+        [DocumentReportStats(**row) for row in counts],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0012_alter_document_status'),
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentReportStats',
+            fields=[
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='report_stats', serialize=False, to='documents.document')),
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('copyright_count', models.PositiveIntegerField(default=0)),
+                ('spam_count', models.PositiveIntegerField(default=0)),
+                ('personal_info_count', models.PositiveIntegerField(default=0)),
+                ('inappropriate_count', models.PositiveIntegerField(default=0)),
+                ('other_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Document Report Stats',
+                'verbose_name_plural': 'Document Report Stats',
+                'db_table': 'document_report_stats',
+            },
+        ),
+        migrations.RunPython(populate_report_stats, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.conf import settings
 
 
@@ -64,3 +65,119 @@ class Report(models.Model):
     
     def __str__(self):
         return f"Report on '{self.document.title}' by {self.reported_by.username}"
+    
+    def lock_stored_values(self):
+        """
+        Lock this report's row and return its stored document, reason and
+        status, or None if it is not stored. Must run inside a transaction.
+        """
+        return Report.objects.select_for_update().filter(pk=self.pk).values(
+            'document_id', 'reason', 'status'
+        ).first()
+    
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            # Read under the row lock: concurrent saves count each change once.
+            previous = None if self._state.adding else self.lock_stored_values()
+            super().save(*args, **kwargs)
+            self.update_report_stats(previous)
+    
+    def update_report_stats(self, previous):
+        """
+        Move this report's contribution to DocumentReportStats after it was
+        created or its status, reason or document changed, and hide the
+        document once it reaches ``REPORT_HIDE_THRESHOLD`` pending reports.
+        """
+        was_pending = previous is not None and previous['status'] == 'pending'
+        is_pending = self.status == 'pending'
+        moved = previous is not None and (
+            previous['document_id'] != self.document_id or previous['reason'] != self.reason
+        )
+        
+        if was_pending and (moved or not is_pending):
+            DocumentReportStats.adjust(previous['document_id'], previous['reason'], -1)
+        if is_pending and (moved or not was_pending):
+            pending_count = DocumentReportStats.adjust(self.document_id, self.reason, 1)
+            threshold = settings.REPORT_HIDE_THRESHOLD
+            if threshold and pending_count >= threshold:
+                from djangoapp.documents.models import Document
+                Document.hide_for_review(self.document_id)
+
+
+class DocumentReportStats(models.Model):
+    """
+    Pending report counters of a document, in total and per reason.
+    
+    Kept up to date one report at a time by ``Report.save`` and the
+    ``pre_delete`` signal, so no path has to count reports; ``manage.py
+    reconcile_report_stats`` rebuilds them from the reports table.
+    """
+    document = models.OneToOneField(
+        'documents.Document',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='report_stats'
+    )
+    pending_count = models.PositiveIntegerField(default=0)
+    copyright_count = models.PositiveIntegerField(default=0)
+    spam_count = models.PositiveIntegerField(default=0)
+    personal_info_count = models.PositiveIntegerField(default=0)
+    inappropriate_count = models.PositiveIntegerField(default=0)
+    other_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'document_report_stats'
+        verbose_name = 'Document Report Stats'
+        verbose_name_plural = 'Document Report Stats'
+    
+    def __str__(self):
+        return f'Pending reports of document {self.document_id}'
+    
+    @classmethod
+    def reason_field(cls, reason):
+        return f'{reason}_count'
+    
+    @classmethod
+    def adjust(cls, document_id, reason, delta):
+        """
+        Atomically add ``delta`` to a document's pending and per-reason
+        counts, and return its new pending count.
+        """
+        if delta > 0:
+            cls.objects.bulk_create([cls(document_id=document_id)], ignore_conflicts=True)
+        stats = cls.objects.filter(pk=document_id)
+        if delta < 0:
+            stats = stats.filter(pending_count__gte=-delta, **{f'{cls.reason_field(reason)}__gte': -delta})
+        stats.update(**{
+            'pending_count': F('pending_count') + delta,
+            cls.reason_field(reason): F(cls.reason_field(reason)) + delta,
+        })
+        return cls.objects.filter(pk=document_id).values_list('pending_count', flat=True).first() or 0
+    
+    @classmethod
+    def reconcile(cls):
+        """Rebuild every document's counters from its pending reports; return the rows written."""
+        from django.db.models import Count, Q
+        
+        counts = Report.objects.filter(status='pending').values('document_id').annotate(
+            pending_count=Count('pk'),
+            **{
+                cls.reason_field(reason): Count('pk', filter=Q(reason=reason))
+                for reason, label in Report.REASON_CHOICES
+            }
+        ).order_by()
+        rows = [cls(**row) for row in counts]
+        with transaction.atomic():
+            cls.objects.exclude(
+                document_id__in=Report.objects.filter(status='pending').values('document_id')
+            ).delete()
+            cls.objects.bulk_create(
+                rows,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['document'],
+                update_fields=['pending_count'] + [
+                    cls.reason_field(reason) for reason, label in Report.REASON_CHOICES
+                ]
+            )
+        return len(rows)
@@ -72,3 +72,24 @@ class ReportUpdateSerializer(serializers.Serializer):
         required=True
     )
     moderator_notes = serializers.CharField(required=False, allow_blank=True)
+
+
+class ReportTriageSerializer(serializers.Serializer):
+    """Serializer for the pending reports of one document, aggregated."""
+    document = serializers.SerializerMethodField()
+    report_count = serializers.IntegerField()
+    reasons = serializers.SerializerMethodField()
+    first_reported_at = serializers.DateTimeField()
+    last_reported_at = serializers.DateTimeField()
+    
+    def get_document(self, row):
+        return {
+            'id': row['document_id'],
+            'slug': row['document__slug'],
+            'title': row['document__title'],
+            'status': row['document__status'],
+        }
+    
+    def get_reasons(self, row):
+        """Pending reports per reason, for every reason."""
+        return {reason: row[f'{reason}_count'] for reason, label in Report.REASON_CHOICES}
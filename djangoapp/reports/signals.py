@@ -0,0 +1,13 @@
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from .models import DocumentReportStats, Report
+
+
+@receiver(pre_delete, sender=Report)
+def uncount_report(sender, instance, **kwargs):
+    """Remove pending reports about to be deleted from their document's counters."""
+    # Runs in the deletion's transaction; the lock holds until the row is gone.
+    stored = instance.lock_stored_values()
+    if stored is not None and stored['status'] == 'pending':
+        DocumentReportStats.adjust(stored['document_id'], stored['reason'], -1)
@@ -1,10 +1,12 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
 
 from .models import Report
+from djangoapp.documents.counters import counter_buffer
 from djangoapp.documents.models import Document
 from djangoapp.categories.models import Category
 
@@ -218,3 +220,266 @@ class ReportAPITest(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
+
+
+class ReportTriageTest(APITestCase):
+    """Test the per-document triage of pending reports."""
+    
+    def setUp(self):
+        """Set up test data."""
+        from django.contrib.auth.models import Group
+        
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.moderator = get_user_model().objects.create_user(
+            username='moderator',
+            email='mod@example.com',
+            password='modpass123'
+        )
+        moderators_group, _ = Group.objects.get_or_create(name='moderators')
+        self.moderator.groups.add(moderators_group)
+        self.reporters = [
+            get_user_model().objects.create_user(
+                username=f'reporter{number}',
+                email=f'reporter{number}@example.com',
+                password='reportpass123'
+            )
+            for number in range(3)
+        ]
+        self.category = Category.objects.create(name='Test Category')
+        self.documents = [
+            Document.objects.create(
+                title=f'Document {number}',
+                description='Test description',
+                category=self.category,
+                uploaded_by=self.user,
+                status='approved'
+            )
+            for number in range(3)
+        ]
+        # Three reports on the first document, two on the second, one on the last
+        reasons = ['copyright', 'spam', 'copyright']
+        for document_number, document in enumerate(self.documents):
+            for reporter, reason in list(zip(self.reporters, reasons))[document_number:]:
+                Report.objects.create(
+                    document=document, reported_by=reporter, reason=reason, description='Test report.'
+                )
+        Report.objects.filter(document=self.documents[2]).update(status='dismissed')
+        self.url = reverse('report-triage')
+        self.client.force_authenticate(user=self.moderator)
+    
+    def test_groups_pending_reports_by_document(self):
+        """Test counts per reason, report times and status come from one query."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len([query for query in queries if 'FROM "reports"' in query['sql']]), 1)
+        first, second = response.data['results']
+        self.assertEqual(first['document']['slug'], self.documents[0].slug)
+        self.assertEqual(first['document']['status'], 'approved')
+        self.assertEqual(first['report_count'], 3)
+        self.assertEqual(first['reasons']['copyright'], 2)
+        self.assertEqual(first['reasons']['spam'], 1)
+        self.assertEqual(first['reasons']['other'], 0)
+        self.assertLessEqual(first['first_reported_at'], first['last_reported_at'])
+        self.assertEqual(second['report_count'], 2)
+        self.assertIsNone(response.data['next'])
+    
+    def test_keyset_pages_and_sorting(self):
+        """Test cursor pages cover every document once, in the chosen order."""
+        from unittest import mock
+        from djangoapp.core.pagination import KeysetPagination
+        
+        Report.objects.update(status='pending')
+        slugs = [document.slug for document in self.documents]
+        
+        def walk(sort):
+            seen = []
+            response = self.client.get(self.url, {'sort': sort})
+            while True:
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                seen += [row['document']['slug'] for row in response.data['results']]
+                if not response.data['next']:
+                    return seen
+                response = self.client.get(response.data['next'])
+        
+        with mock.patch.object(KeysetPagination, 'page_size', 1):
+            self.assertEqual(walk('reports'), slugs)
+            self.assertEqual(walk('oldest'), slugs)
+            self.assertEqual(walk('recent'), slugs[::-1])
+        
+        response = self.client.get(self.url, {'sort': 'size'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_filters(self):
+        """Test ?reason= and ?document_status= narrow the triage."""
+        response = self.client.get(self.url, {'reason': 'spam'})
+        # Equal counts: the latest reported document first
+        self.assertEqual(
+            [(row['document']['slug'], row['report_count']) for row in response.data['results']],
+            [(self.documents[1].slug, 1), (self.documents[0].slug, 1)]
+        )
+        self.documents[1].status = 'rejected'
+        self.documents[1].save()
+        response = self.client.get(self.url, {'document_status': 'rejected'})
+        self.assertEqual(len(response.data['results']), 1)
+        
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ReportStatsTest(APITestCase):
+    """Test the pending report counters and the hide threshold."""
+    
+    def setUp(self):
+        """Set up test data."""
+        from django.contrib.auth.models import Group
+        
+        self.user = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.moderator = get_user_model().objects.create_user(
+            username='moderator',
+            email='mod@example.com',
+            password='modpass123'
+        )
+        moderators_group, _ = Group.objects.get_or_create(name='moderators')
+        self.moderator.groups.add(moderators_group)
+        self.reporters = [
+            get_user_model().objects.create_user(
+                username=f'reporter{number}',
+                email=f'reporter{number}@example.com',
+                password='reportpass123'
+            )
+            for number in range(3)
+        ]
+        self.category = Category.objects.create(name='Test Category')
+        self.document = Document.objects.create(
+            title='Test Document',
+            description='Test description',
+            category=self.category,
+            uploaded_by=self.user,
+            status='approved',
+            file=SimpleUploadedFile('test.pdf', b'%PDF-1.4 reported', content_type='application/pdf')
+        )
+        self.addCleanup(counter_buffer.discard)
+    
+    def report(self, reporter, reason='copyright'):
+        self.client.force_authenticate(user=reporter)
+        response = self.client.post(reverse('report-list'), {
+            'document_slug': self.document.slug,
+            'reason': reason,
+            'description': 'Test report.',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Report.objects.get(document=self.document, reported_by=reporter)
+    
+    def assertStats(self, pending, copyright, spam):
+        from .models import DocumentReportStats
+        
+        stats = DocumentReportStats.objects.get(document=self.document)
+        self.assertEqual(
+            (stats.pending_count, stats.copyright_count, stats.spam_count), (pending, copyright, spam)
+        )
+    
+    def test_counters_follow_report_changes(self):
+        """Test counters change with new reports, status changes and deletes."""
+        first = self.report(self.reporters[0])
+        second = self.report(self.reporters[1], reason='spam')
+        self.assertStats(2, 1, 1)
+        
+        self.client.force_authenticate(user=self.moderator)
+        self.client.post(
+            reverse('report-update-status', kwargs={'pk': first.pk}), {'status': 'dismissed'}, format='json'
+        )
+        self.assertStats(1, 0, 1)
+        
+        second.reason = 'copyright'
+        second.save()
+        self.assertStats(1, 1, 0)
+        
+        second.delete()
+        self.assertStats(0, 0, 0)
+    
+    def test_stale_instances_count_once(self):
+        """Test counters follow the stored row, not values loaded before another save."""
+        report = self.report(self.reporters[0])
+        stale = Report.objects.get(pk=report.pk)
+        
+        report.status = 'resolved'
+        report.save()
+        stale.status = 'dismissed'
+        stale.save()
+        self.assertStats(0, 0, 0)
+        
+        report.status = 'pending'
+        report.save()
+        self.assertStats(1, 1, 0)
+        stale.delete()
+        self.assertStats(0, 0, 0)
+    
+    @override_settings(REPORT_HIDE_THRESHOLD=2)
+    def test_threshold_hides_document(self):
+        """Test reaching the threshold hides the document without counting reports."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from djangoapp.documents.downloads import signed_download_url
+        
+        self.report(self.reporters[0])
+        download_url = signed_download_url(self.document)
+        self.assertEqual(self.client.get(download_url).status_code, status.HTTP_200_OK)
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.approved_count, 1)
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.report(self.reporters[1])
+        self.assertFalse(
+            [query for query in queries if 'COUNT(' in query['sql'] and '"reports"' in query['sql']]
+        )
+        
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.status, 'hidden')
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.approved_count, 0)
+        self.client.force_authenticate(user=None)
+        detail_url = reverse('document-detail', kwargs={'slug': self.document.slug})
+        self.assertEqual(self.client.get(detail_url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(download_url).status_code, status.HTTP_404_NOT_FOUND)
+        
+        # A moderator approving it again puts it back.
+        self.client.force_authenticate(user=self.moderator)
+        response = self.client.post(
+            reverse('document-approve-reject', kwargs={'slug': self.document.slug}),
+            {'action': 'approve'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.approved_count, 1)
+    
+    def test_reconcile_command_rebuilds_counters(self):
+        """Test the command rebuilds drifted counters from the reports."""
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import DocumentReportStats
+        
+        self.report(self.reporters[0])
+        self.report(self.reporters[1], reason='spam')
+        Report.objects.filter(reason='spam').update(status='resolved')
+        DocumentReportStats.objects.update(copyright_count=7)
+        
+        call_command('reconcile_report_stats', stdout=StringIO())
+        self.assertStats(1, 1, 0)
+        
+        Report.objects.update(status='resolved')
+        call_command('reconcile_report_stats', stdout=StringIO())
+        self.assertFalse(DocumentReportStats.objects.exists())
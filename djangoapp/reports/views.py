@@ -2,15 +2,26 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db.models import Count, Max, Min, Q
 from django.utils import timezone
 
 from .models import Report
 from .serializers import (
     ReportSerializer,
     ReportCreateSerializer,
+    ReportTriageSerializer,
     ReportUpdateSerializer
 )
 from djangoapp.accounts.permissions import IsModerator
+from djangoapp.core.pagination import KeysetPagination
+
+
+# Orderings of the triage endpoint (?sort=); each ends with a unique field
+TRIAGE_ORDERINGS = {
+    'reports': ('-report_count', '-last_reported_at', '-document_id'),
+    'recent': ('-last_reported_at', '-document_id'),
+    'oldest': ('first_reported_at', 'document_id'),
+}
 
 
 class ReportViewSet(viewsets.ModelViewSet):
@@ -74,7 +85,7 @@ class ReportViewSet(viewsets.ModelViewSet):
     def pending_reports(self, request):
         """Get all pending reports (moderators only)."""
         pending = Report.objects.filter(status='pending').select_related(
-            'document', 'reported_by'
+            'document', 'reported_by', 'reviewed_by'
         )
         page = self.paginate_queryset(pending)
         
@@ -85,6 +96,50 @@ class ReportViewSet(viewsets.ModelViewSet):
         serializer = ReportSerializer(pending, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'], url_path='triage')
+    def triage(self, request):
+        """
+        Get pending reports grouped by document (moderators only).
+        
+        Each row has the document's report count per reason, its first and
+        last report times and the document status, all from one aggregate
+        query. ``?sort=`` orders by report volume (``reports``, default),
+        latest report (``recent``) or longest waiting (``oldest``); pages
+        follow the ``next`` cursor. ``?reason=`` and ``?document_status=``
+        narrow the reports and documents considered.
+        """
+        sort = request.query_params.get('sort', 'reports')
+        if sort not in TRIAGE_ORDERINGS:
+            return Response(
+                {'error': f'Unknown sort. Choose one of: {", ".join(TRIAGE_ORDERINGS)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        pending = Report.objects.filter(status='pending')
+        reason = request.query_params.get('reason')
+        if reason:
+            pending = pending.filter(reason=reason)
+        document_status = request.query_params.get('document_status')
+        if document_status:
+            pending = pending.filter(document__status=document_status)
+        
+        rows = pending.values(
+            'document_id', 'document__slug', 'document__title', 'document__status'
+        ).annotate(
+            report_count=Count('pk'),
+            first_reported_at=Min('created_at'),
+            last_reported_at=Max('created_at'),
+            **{
+                f'{choice}_count': Count('pk', filter=Q(reason=choice))
+                for choice, label in Report.REASON_CHOICES
+            }
+        )
+        
+        paginator = KeysetPagination()
+        paginator.ordering = TRIAGE_ORDERINGS[sort]
+        page = paginator.paginate_queryset(rows, request, view=self)
+        return paginator.get_paginated_response(ReportTriageSerializer(page, many=True).data)
+    
     @action(detail=False, methods=['get'], url_path='my-reports')
     def my_reports(self, request):
         """Get current user's reports."""
@@ -94,7 +149,9 @@ class ReportViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
-        my_reports = Report.objects.filter(reported_by=request.user).select_related('document')
+        my_reports = Report.objects.filter(reported_by=request.user).select_related(
+            'document', 'reported_by', 'reviewed_by'
+        )
         page = self.paginate_queryset(my_reports)
         
         if page is not None:
@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'djangoapp.categories',
     'djangoapp.documents',
     'djangoapp.reports',
+    'djangoapp.jobs',
     'djangoapp.core',
 ]
 
@@ -153,7 +154,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'djangoapp.accounts.authentication.RoleClaimJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -193,6 +194,134 @@ CORS_ALLOW_CREDENTIALS = True
 MAX_UPLOAD_SIZE = config('MAX_UPLOAD_SIZE', default=52428800, cast=int)  # 50MB
 ALLOWED_DOCUMENT_TYPES = ['application/pdf']
 
+# Resumable uploads: where partial files are kept, and after how many seconds
+# without activity cleanup_upload_sessions removes them
+UPLOAD_SESSION_DIR = config('UPLOAD_SESSION_DIR', default=BASE_DIR / 'upload_sessions')
+UPLOAD_SESSION_MAX_AGE = config('UPLOAD_SESSION_MAX_AGE', default=86400, cast=int)
+
+# Seconds a presigned S3 POST for a direct upload stays valid (S3 storage only)
+DIRECT_UPLOAD_EXPIRE = config('DIRECT_UPLOAD_EXPIRE', default=3600, cast=int)
+
+# Moderation Queue
+# Seconds a moderator keeps the documents claimed from the queue; claims
+# that are not acted on are free to claim again afterwards.
+MODERATION_CLAIM_TIMEOUT = config('MODERATION_CLAIM_TIMEOUT', default=900, cast=int)
+
+# Pending reports after which an approved document is hidden from the
+# public until a moderator reviews it again (0 disables)
+REPORT_HIDE_THRESHOLD = config('REPORT_HIDE_THRESHOLD', default=5, cast=int)
+
+# Cache
+# Version stamps and cached responses must be shared by every process
+# (gunicorn workers, job workers): set REDIS_URL in production. Without it
+# the cache is process-local, and ETags and response caching stay off
+# unless API_CACHE_ALLOW_LOCAL is set (on by default with DEBUG).
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+API_CACHE_ALLOW_LOCAL = config('API_CACHE_ALLOW_LOCAL', default=DEBUG, cast=bool)
+
+# Document Search
+# Dotted path to a search backend class; empty picks one from the database
+# vendor (PostgreSQL full-text, SQLite FTS5, or plain icontains).
+DOCUMENT_SEARCH_BACKEND = config('DOCUMENT_SEARCH_BACKEND', default='')
+
+# Seconds to cache /api/documents/facets/ results per filter combination
+DOCUMENT_FACETS_CACHE_TIMEOUT = config('DOCUMENT_FACETS_CACHE_TIMEOUT', default=300, cast=int)
+
+# Seconds to cache anonymous document and category responses (0 disables);
+# cached responses are dropped as soon as documents or categories change.
+API_RESPONSE_CACHE_TIMEOUT = config('API_RESPONSE_CACHE_TIMEOUT', default=60, cast=int)
+
+# Seconds between writes of buffered view/download counts; 0 writes each hit
+DOCUMENT_COUNTER_FLUSH_INTERVAL = config('DOCUMENT_COUNTER_FLUSH_INTERVAL', default=10, cast=int)
+
+# Document Downloads
+# How file bytes are sent: 'django' streams them from the worker, 'nginx'
+# hands them to nginx with X-Accel-Redirect (see docker/nginx.conf), 's3'
+# redirects to a presigned S3 URL. Empty picks 's3' with USE_S3, else 'django'.
+DOCUMENT_DOWNLOAD_BACKEND = config('DOCUMENT_DOWNLOAD_BACKEND', default='') or ('s3' if USE_S3 else 'django')
+
+# Internal nginx location mapped to MEDIA_ROOT
+DOCUMENT_DOWNLOAD_ACCEL_LOCATION = config('DOCUMENT_DOWNLOAD_ACCEL_LOCATION', default='/protected-media/')
+
+# Seconds a signed download link stays valid
+DOCUMENT_DOWNLOAD_LINK_MAX_AGE = config('DOCUMENT_DOWNLOAD_LINK_MAX_AGE', default=3600, cast=int)
+
+# Seconds a presigned S3 download URL stays valid
+DOCUMENT_DOWNLOAD_PRESIGNED_EXPIRE = config('DOCUMENT_DOWNLOAD_PRESIGNED_EXPIRE', default=300, cast=int)
+
+# Document Previews
+# Thumbnails and preview pages are rendered with pdftoppm (poppler-utils) by
+# background jobs, at most this many at a time across all workers.
+DOCUMENT_PREVIEW_CONCURRENCY = config('DOCUMENT_PREVIEW_CONCURRENCY', default=2, cast=int)
+DOCUMENT_PREVIEW_PDFTOPPM = config('DOCUMENT_PREVIEW_PDFTOPPM', default='pdftoppm')
+
+# Seconds allowed to render one document
+DOCUMENT_PREVIEW_TIMEOUT = config('DOCUMENT_PREVIEW_TIMEOUT', default=60, cast=int)
+
+# Number of preview pages, and the longest side of images in pixels
+DOCUMENT_PREVIEW_PAGES = config('DOCUMENT_PREVIEW_PAGES', default=3, cast=int)
+DOCUMENT_PREVIEW_SIZE = config('DOCUMENT_PREVIEW_SIZE', default=800, cast=int)
+DOCUMENT_THUMBNAIL_SIZE = config('DOCUMENT_THUMBNAIL_SIZE', default=320, cast=int)
+
+# Preview names include the content hash, so their content never changes
+DOCUMENT_PREVIEW_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Document Text Extraction
+# Text is extracted with pdftotext (poppler-utils) by background jobs, at
+# most this many at a time across all workers.
+DOCUMENT_TEXT_CONCURRENCY = config('DOCUMENT_TEXT_CONCURRENCY', default=2, cast=int)
+DOCUMENT_TEXT_PDFTOTEXT = config('DOCUMENT_TEXT_PDFTOTEXT', default='pdftotext')
+
+# Limits of one extraction: seconds, address space in MB (0 for none, set
+# with prlimit from util-linux), and characters of text kept
+DOCUMENT_TEXT_TIMEOUT = config('DOCUMENT_TEXT_TIMEOUT', default=120, cast=int)
+DOCUMENT_TEXT_MEMORY_LIMIT = config('DOCUMENT_TEXT_MEMORY_LIMIT', default=512, cast=int)
+DOCUMENT_TEXT_MAX_LENGTH = config('DOCUMENT_TEXT_MAX_LENGTH', default=1000000, cast=int)
+DOCUMENT_TEXT_PRLIMIT = config('DOCUMENT_TEXT_PRLIMIT', default='prlimit')
+
+# OCR of Scanned Pages
+# Pages with fewer non-space characters than DOCUMENT_OCR_MIN_CHARACTERS in
+# their text layer are read with tesseract in these languages (empty to
+# disable OCR). Each OCR job runs up to DOCUMENT_OCR_WORKERS tesseract
+# processes, and at most DOCUMENT_OCR_CONCURRENCY jobs run at a time.
+DOCUMENT_OCR_LANGUAGES = config('DOCUMENT_OCR_LANGUAGES', default='fra+eng')
+DOCUMENT_OCR_TESSERACT = config('DOCUMENT_OCR_TESSERACT', default='tesseract')
+DOCUMENT_OCR_MIN_CHARACTERS = config('DOCUMENT_OCR_MIN_CHARACTERS', default=10, cast=int)
+DOCUMENT_OCR_WORKERS = config('DOCUMENT_OCR_WORKERS', default=2, cast=int)
+DOCUMENT_OCR_CONCURRENCY = config('DOCUMENT_OCR_CONCURRENCY', default=1, cast=int)
+DOCUMENT_OCR_DPI = config('DOCUMENT_OCR_DPI', default=300, cast=int)
+
+# Seconds per page, and pages read per document
+DOCUMENT_OCR_TIMEOUT = config('DOCUMENT_OCR_TIMEOUT', default=120, cast=int)
+DOCUMENT_OCR_MAX_PAGES = config('DOCUMENT_OCR_MAX_PAGES', default=200, cast=int)
+
+# Background Jobs (processed by manage.py run_worker)
+# Seconds an idle worker waits before looking for due jobs again
+JOB_POLL_INTERVAL = config('JOB_POLL_INTERVAL', default=1.0, cast=float)
+
+# Tries per job, and the retry delay in seconds: doubled after each failure
+# up to the maximum
+JOB_MAX_ATTEMPTS = config('JOB_MAX_ATTEMPTS', default=5, cast=int)
+JOB_RETRY_DELAY = config('JOB_RETRY_DELAY', default=30, cast=int)
+JOB_RETRY_MAX_DELAY = config('JOB_RETRY_MAX_DELAY', default=3600, cast=int)
+
+# Seconds after which a running job is assumed lost with its worker and queued
+# again; workers renew the lease of the job they run every third of it
+JOB_LEASE_TIMEOUT = config('JOB_LEASE_TIMEOUT', default=1800, cast=int)
+
 # Rate Limiting
 RATELIMIT_ENABLE = config('RATELIMIT_ENABLE', default=True, cast=bool)
 